@@ -2,6 +2,30 @@
 Dependencies — Injeção de dependências para os routers.
 """
 from infra.database import get_session
+from infra.http_clients import HttpClientRegistry, http_clients
+from infra.queue import job_queue
+from services.pncp_client import PNCPClient
+from services.anvisa_client import AnvisaClient
+
+
+def get_http_clients() -> HttpClientRegistry:
+    """Registro de clients HTTP compartilhados (aberto/fechado no lifespan)."""
+    return http_clients
+
+
+async def get_job_queue():
+    """Pool arq para enfileirar jobs no worker (fechado no lifespan)."""
+    return await job_queue.pool()
+
+
+def get_pncp_client() -> PNCPClient:
+    """PNCPClient sobre o pool keep-alive compartilhado de pncp.gov.br."""
+    return PNCPClient(client=http_clients.get("pncp"))
+
+
+def get_anvisa_client() -> AnvisaClient:
+    return AnvisaClient(client=http_clients.get("anvisa"))
+
 
 # Re-export para uso nos routers
-__all__ = ["get_session"]
+__all__ = ["get_session", "get_http_clients", "get_job_queue", "get_pncp_client", "get_anvisa_client"]
@@ -6,9 +6,11 @@ from fastapi import APIRouter, Depends
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 
-from infra.database import get_session
+from app.dependencies import get_session, get_http_clients
+from infra.http_clients import HttpClientRegistry
 from domain.models import Licitacao, LicitacaoItem
 from domain.exceptions import LicitacaoNotFound
+from services.me_epp_classifier import MeEppClassifier
 
 logger = logging.getLogger("AnalysisRouter")
 
@@ -18,7 +20,8 @@ router = APIRouter(prefix="/api", tags=["Análise IA"])
 @router.post("/licitacoes/{licitacao_id}/analyze")
 async def analyze_licitacao_endpoint(
     licitacao_id: int,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    http: HttpClientRegistry = Depends(get_http_clients)
 ):
     licitacao = await session.get(Licitacao, licitacao_id)
     if not licitacao:
@@ -34,15 +37,13 @@ async def analyze_licitacao_endpoint(
 
         if licitacao.link_edital:
             try:
-                import httpx
                 from pypdf import PdfReader
                 import io
 
                 logger.info(f"📥 Download do edital: {licitacao.link_edital}")
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                    "Accept": "application/pdf,application/octet-stream,text/html"
-                }
+                headers = {"Accept": "application/pdf,application/octet-stream,text/html"}
+                pncp_client = http.get("pncp")
+                download_client = http.get("downloads")
 
                 # Detectar link PNCP e buscar PDF real
                 final_pdf_url = licitacao.link_edital
@@ -57,45 +58,43 @@ async def analyze_licitacao_endpoint(
 
                             for api_type in ["compras", "licitacoes"]:
                                 api_url = f"https://pncp.gov.br/api/pncp/v1/orgaos/{cnpj}/{api_type}/{ano}/{seq}/arquivos"
-                                async with httpx.AsyncClient(timeout=10.0) as api_client:
-                                    api_resp = await api_client.get(api_url)
-                                    if api_resp.status_code == 200:
-                                        arquivos = api_resp.json()
-                                        editais = [
-                                            a for a in arquivos
-                                            if "edital" in a.get("titulo", "").lower() or
-                                               "edital" in a.get("tipoDocumentoNome", "").lower()
-                                        ]
-                                        if editais:
-                                            final_pdf_url = editais[0].get("url") or editais[0].get("uri")
-                                            logger.info(f"🎯 PDF via API PNCP ({api_type}): {final_pdf_url}")
-                                            break
+                                api_resp = await pncp_client.get(api_url, timeout=10.0)
+                                if api_resp.status_code == 200:
+                                    arquivos = api_resp.json()
+                                    editais = [
+                                        a for a in arquivos
+                                        if "edital" in a.get("titulo", "").lower() or
+                                           "edital" in a.get("tipoDocumentoNome", "").lower()
+                                    ]
+                                    if editais:
+                                        final_pdf_url = editais[0].get("url") or editais[0].get("uri")
+                                        logger.info(f"🎯 PDF via API PNCP ({api_type}): {final_pdf_url}")
+                                        break
                     except Exception as e:
                         logger.warning(f"⚠️ Falha ao buscar PDF na API PNCP: {e}")
 
-                async with httpx.AsyncClient(timeout=90.0, follow_redirects=True, headers=headers) as client:
-                    resp = await client.get(final_pdf_url)
-
-                    content_type = resp.headers.get("Content-Type", "").lower()
-                    if resp.status_code == 200 and ("pdf" in content_type or len(resp.content) > 10000):
-                        logger.info(f"✅ Download concluído: {len(resp.content)} bytes.")
-                        reader = PdfReader(io.BytesIO(resp.content))
-                        logger.info(f"📄 PDF: {len(reader.pages)} páginas.")
-
-                        total_pages = len(reader.pages)
-                        pages_to_read = set(range(min(15, total_pages))) | set(range(max(0, total_pages-35), total_pages))
-
-                        pdf_extracted = ""
-                        for i in sorted(pages_to_read):
-                            pg = reader.pages[i].extract_text()
-                            if pg:
-                                pdf_extracted += f"\n--- PÁGINA {i+1} ---\n{pg}"
-
-                        if pdf_extracted:
-                            full_text = pdf_extracted
-                            source_label = "LIDO DO EDITAL COMPLETO (PDF)"
-                    else:
-                        logger.warning(f"❌ Download falhou. Status: {resp.status_code}")
+                resp = await download_client.get(final_pdf_url, headers=headers)
+
+                content_type = resp.headers.get("Content-Type", "").lower()
+                if resp.status_code == 200 and ("pdf" in content_type or len(resp.content) > 10000):
+                    logger.info(f"✅ Download concluído: {len(resp.content)} bytes.")
+                    reader = PdfReader(io.BytesIO(resp.content))
+                    logger.info(f"📄 PDF: {len(reader.pages)} páginas.")
+
+                    total_pages = len(reader.pages)
+                    pages_to_read = set(range(min(15, total_pages))) | set(range(max(0, total_pages-35), total_pages))
+
+                    pdf_extracted = ""
+                    for i in sorted(pages_to_read):
+                        pg = reader.pages[i].extract_text()
+                        if pg:
+                            pdf_extracted += f"\n--- PÁGINA {i+1} ---\n{pg}"
+
+                    if pdf_extracted:
+                        full_text = pdf_extracted
+                        source_label = "LIDO DO EDITAL COMPLETO (PDF)"
+                else:
+                    logger.warning(f"❌ Download falhou. Status: {resp.status_code}")
             except Exception as pdf_err:
                 logger.error(f"⚠️ Erro ao processar PDF: {type(pdf_err).__name__} - {pdf_err}")
 
@@ -129,9 +128,12 @@ async def analyze_licitacao_endpoint(
 
         # 3. Atualizar banco se IA encontrou dados melhores
         updated = False
-        new_me_epp = analysis.get("me_epp_status")
+        # ME/EPP direto do texto do edital (determinístico); a leitura da IA fica de reserva
+        edital_me_epp = MeEppClassifier.classify(full_text) if source_label.startswith("LIDO DO EDITAL") else "nao"
+        new_me_epp = edital_me_epp if edital_me_epp != "nao" else analysis.get("me_epp_status")
         if new_me_epp and new_me_epp != licitacao.me_epp_status:
-            logger.info(f"✅ IA corrigiu ME/EPP: {licitacao.me_epp_status} -> {new_me_epp}")
+            origem = "edital" if edital_me_epp != "nao" else "IA"
+            logger.info(f"✅ ME/EPP corrigido ({origem}): {licitacao.me_epp_status} -> {new_me_epp}")
             licitacao.me_epp_status = new_me_epp
             updated = True
 
@@ -5,9 +5,10 @@ from fastapi import APIRouter, Depends, UploadFile, File
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 
-from infra.database import get_session
+from app.dependencies import get_session, get_anvisa_client
 from domain.models import LicitacaoItem
 from domain.exceptions import InvalidFileFormat
+from services.anvisa_client import AnvisaClient
 
 router = APIRouter(prefix="/api", tags=["ANVISA"])
 
@@ -15,17 +16,15 @@ router = APIRouter(prefix="/api", tags=["ANVISA"])
 @router.post("/cmed/upload")
 async def upload_cmed(
     file: UploadFile = File(...),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    client: AnvisaClient = Depends(get_anvisa_client)
 ):
     """Upload da planilha CMED da Secretaria Executiva da ANVISA."""
     if not file.filename.endswith(('.xls', '.xlsx')):
         raise InvalidFileFormat(".xls ou .xlsx")
 
     contents = await file.read()
-    from services.anvisa_client import AnvisaClient
-    client = AnvisaClient()
     count = await client.import_cmed_from_xls(session, file_bytes=contents)
-    await client.close()
 
     return {
         "status": "success",
@@ -40,7 +39,6 @@ async def search_cmed(
     q: str, tipo: str = None, classe: str = None,
     limit: int = 20, session: AsyncSession = Depends(get_session)
 ):
-    from services.anvisa_client import AnvisaClient
     results = await AnvisaClient.search_medicamentos(
         session, query=q, limit=limit,
         tipo_produto=tipo, classe_terapeutica=classe
@@ -65,7 +63,6 @@ async def search_cmed(
 async def cruzar_licitacao_cmed(
     licitacao_id: int, session: AsyncSession = Depends(get_session)
 ):
-    from services.anvisa_client import AnvisaClient
     result = await session.exec(
         select(LicitacaoItem).where(LicitacaoItem.licitacao_id == licitacao_id)
     )
@@ -88,5 +85,4 @@ async def cruzar_licitacao_cmed(
 
 @router.get("/cmed/stats")
 async def cmed_stats(session: AsyncSession = Depends(get_session)):
-    from services.anvisa_client import AnvisaClient
     return await AnvisaClient.get_stats(session)
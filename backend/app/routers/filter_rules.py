@@ -0,0 +1,68 @@
+"""
+Router: Regras de filtro — termos do FilterEngine editáveis sem deploy
+(ver services/filter_rule_service.py). Cada edição dispara o rescore das
+licitações já gravadas no worker.
+"""
+from typing import Literal, Optional
+
+from arq.connections import ArqRedis
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dependencies import get_job_queue
+from infra.database import get_session
+from services.filter_engine import FilterEngine
+from services.filter_rule_service import FilterRuleService
+
+router = APIRouter(prefix="/api/filter-rules", tags=["Regras de Filtro"])
+
+
+class FilterRuleIn(BaseModel):
+    category: Literal["black", "white", "high", "medium"]
+    term: str
+
+
+async def enqueue_rescore(queue: ArqRedis) -> Optional[str]:
+    job = await queue.enqueue_job("task_rescore")
+    return job.job_id if job else None
+
+
+@router.get("")
+async def list_rules(category: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    return {
+        "version": FilterEngine.RULES_VERSION,
+        "items": await FilterRuleService.list_rules(session, category=category),
+    }
+
+
+@router.post("")
+async def add_rule(
+    payload: FilterRuleIn,
+    session: AsyncSession = Depends(get_session),
+    queue: ArqRedis = Depends(get_job_queue),
+):
+    """Cria (ou reativa) um termo e reclassifica o que já está no banco."""
+    try:
+        rule = await FilterRuleService.add(session, payload.category, payload.term)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"status": "success", "rule": rule, "rescore_job_id": await enqueue_rescore(queue)}
+
+
+@router.delete("/{rule_id}")
+async def remove_rule(
+    rule_id: int,
+    session: AsyncSession = Depends(get_session),
+    queue: ArqRedis = Depends(get_job_queue),
+):
+    rule = await FilterRuleService.remove(session, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Regra não encontrada")
+    return {"status": "success", "rule": rule, "rescore_job_id": await enqueue_rescore(queue)}
+
+
+@router.post("/rescore")
+async def rescore(queue: ArqRedis = Depends(get_job_queue)):
+    """Reclassifica agora as licitações com as regras atuais (job `task_rescore`)."""
+    return {"status": "queued", "job_id": await enqueue_rescore(queue)}
@@ -1,20 +1,24 @@
 """
-Router: Licitações — CRUD, listagem, busca, exportação CSV.
+Router: Licitações — CRUD, listagem, busca, exportação (CSV/XLSX/Parquet).
 """
-import csv
-from io import StringIO
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, func, col
 
-from infra.database import get_session
+from app.dependencies import get_session, get_pncp_client
 from domain.models import Licitacao, LicitacaoItem, EditalVersion, ImpugnacaoEsclarecimento
 from domain.schemas import StatusUpdate, ItemCreate, ImpugnacaoCreate, ProposalRequest
-from domain.exceptions import LicitacaoNotFound, ItemNotFound, ItemMismatch
+from domain.exceptions import LicitacaoNotFound, ItemNotFound, ItemMismatch, ExportFormatUnavailable
+from infra.database import async_session_factory
+from infra.licitacao_repository import LISTING_ORDER, LicitacaoRepository
+from services import export_service
+from services.export_service import EXPORT_COLUMNS, ExportService
+from services.pncp_client import PNCPClient
+from services.relevance_service import RelevanceService
 
 router = APIRouter(prefix="/api", tags=["Licitações"])
 
@@ -29,9 +33,23 @@ async def list_licitacoes(
     search: Optional[str] = Query(None, min_length=2, max_length=200),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    pagination: Literal["page", "cursor"] = "page",
+    cursor: Optional[str] = None,
+    count: Optional[Literal["exact", "cached", "none"]] = None,
     session: AsyncSession = Depends(get_session)
 ):
+    """
+    Duas formas de paginar:
+      page   — page/limit com OFFSET e total exato (padrão, compatível)
+      cursor — `next_cursor` da resposta anterior (scroll infinito): custo
+               constante em qualquer profundidade; total do cache de counts
+    `count` troca o total ("cached" ou "none" dispensa o count exato).
+    """
     offset = (page - 1) * limit
+    keyset = pagination == "cursor" or cursor is not None
+    if keyset and search:
+        raise HTTPException(status_code=422, detail="Busca ordena por relevância: use pagination=page")
+    count = count or ("cached" if keyset else "exact")
 
     # Base query
     query = select(Licitacao)
@@ -62,112 +80,91 @@ async def list_licitacoes(
         query = query.where(Licitacao.status == status)
         count_query = count_query.where(Licitacao.status == status)
 
-    # Execution Logic (Fuzzy vs Standard)
+    order_by = list(LISTING_ORDER)
     if search:
-        from thefuzz import fuzz
-
-        result = await session.exec(query)
-        all_candidates = result.all()
-
-        scored_items = []
-        search_lower = search.lower()
-
-        for item in all_candidates:
-            t_title = item.titulo or ""
-            t_org = item.orgao_nome or ""
-            t_city = item.cidade or ""
-            target_str = f"{t_title} {t_org} {t_city}".lower()
-
-            if search_lower in target_str:
-                scored_items.append((item, 100))
-                continue
-
-            score = fuzz.token_set_ratio(search_lower, target_str)
-            if score >= 80:
-                scored_items.append((item, score))
-
-        scored_items.sort(key=lambda x: (x[1], x[0].data_publicacao), reverse=True)
-        total = len(scored_items)
-        items = [x[0] for x in scored_items[offset : offset + limit]]
+        # Full-text + substring + aproximada, ranqueadas no Postgres (ver LicitacaoRepository.search)
+        matches, rank = await LicitacaoRepository.search(session, search)
+        query = query.where(matches)
+        count_query = count_query.where(matches)
+        order_by.insert(0, rank.desc())
+
+    if count == "exact":
+        total = (await session.exec(count_query)).one()
+    elif count == "cached":
+        total = await LicitacaoRepository.cached_count(session, count_query)
     else:
-        total_result = await session.exec(count_query)
-        total = total_result.one()
-        query = query.order_by(Licitacao.score.desc(), Licitacao.data_publicacao.desc()).offset(offset).limit(limit)
-        result = await session.exec(query)
-        items = result.all()
+        total = None
+
+    if keyset:
+        if cursor:
+            try:
+                query = query.where(LicitacaoRepository.after_cursor(cursor))
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+        # Uma linha a mais diz se há próxima página, sem count
+        result = await session.exec(query.order_by(*order_by).limit(limit + 1))
+        items = list(result.all())
+        has_more = len(items) > limit
+        items = items[:limit]
+        return {
+            "items": items,
+            "total": total,
+            "limit": limit,
+            "next_cursor": LicitacaoRepository.encode_cursor(items[-1]) if has_more else None,
+        }
+
+    query = query.order_by(*order_by).offset(offset).limit(limit)
+    result = await session.exec(query)
+    items = result.all()
 
     return {
         "items": items,
         "total": total,
         "page": page,
         "limit": limit,
-        "pages": (total + limit - 1) // limit if limit > 0 else 1
+        "pages": (total + limit - 1) // limit if total is not None else None
     }
 
 
-# ─── Exportação CSV ───────────────────────────────────────────────────────────
+# ─── Exportação (CSV / XLSX / Parquet) ────────────────────────────────────────
 
-@router.get("/licitacoes/export/csv")
-async def export_licitacoes_csv(
+@router.get("/licitacoes/export/{fmt}")
+async def export_licitacoes(
+    fmt: Literal["csv", "xlsx", "parquet"],
     status: Optional[str] = None,
     priority: Optional[str] = None,
     days: Optional[int] = None,
     search: Optional[str] = None,
-    session: AsyncSession = Depends(get_session)
 ):
-    query = select(Licitacao)
-    if days:
-        cutoff_date = datetime.now() - timedelta(days=days)
-        query = query.where(Licitacao.data_publicacao >= cutoff_date)
-
-    if status == 'rejeitado':
-        query = query.where(Licitacao.status == 'rejeitado')
-    elif status == 'aprovado':
-        query = query.where(Licitacao.status == 'aprovado')
-    elif priority == 'alta':
-        query = query.where(Licitacao.priority == 'alta', Licitacao.status != 'rejeitado')
-    else:
-        query = query.where(Licitacao.status != 'rejeitado')
-
-    result = await session.exec(query)
-    all_items = list(result.all())
-
-    if search:
-        from thefuzz import fuzz
-        search_items = []
-        search_lower = search.lower()
-        for item in all_items:
-            target_str = f"{item.titulo or ''} {item.orgao_nome or ''} {item.cidade or ''}".lower()
-            if search_lower in target_str or fuzz.token_set_ratio(search_lower, target_str) >= 80:
-                search_items.append(item)
-        all_items = search_items
-
-    output = StringIO()
-    output.write('\ufeff')
-    writer = csv.writer(output, delimiter=';')
-
-    writer.writerow([
-        "ID", "Titulo", "Orgao", "CNPJ", "UF", "Cidade", "Publicacao",
-        "Abertura", "Modalidade", "SRP", "ME/EPP", "Status", "Prioridade", "Score", "Link"
-    ])
-
-    for item in all_items:
-        writer.writerow([
-            item.pncp_id, item.titulo, item.orgao_nome, item.orgao_cnpj,
-            item.estado_sigla, item.cidade,
-            item.data_publicacao.strftime("%d/%m/%Y") if item.data_publicacao else "",
-            item.data_abertura_proposta.strftime("%d/%m/%Y") if item.data_abertura_proposta else "",
-            item.modalidade, "Sim" if item.srp else "Não",
-            item.me_epp_status, item.status, item.priority, item.score, item.link_edital
-        ])
-
-    output.seek(0)
-    filename = f"licitacoes_export_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
-
+    """Mesmos filtros da listagem, em streaming (ver ExportService)."""
+    if fmt == "parquet" and export_service.pq is None:
+        raise ExportFormatUnavailable("parquet", "pyarrow")
+
+    async def build_query(session: AsyncSession):
+        query = select(*EXPORT_COLUMNS)
+        if days:
+            cutoff_date = datetime.now() - timedelta(days=days)
+            query = query.where(Licitacao.data_publicacao >= cutoff_date)
+
+        if status == 'rejeitado':
+            query = query.where(Licitacao.status == 'rejeitado')
+        elif status == 'aprovado':
+            query = query.where(Licitacao.status == 'aprovado')
+        elif priority == 'alta':
+            query = query.where(Licitacao.priority == 'alta', Licitacao.status != 'rejeitado')
+        else:
+            query = query.where(Licitacao.status != 'rejeitado')
+
+        if search:
+            matches, rank = await LicitacaoRepository.search(session, search)
+            query = query.where(matches).order_by(rank.desc(), Licitacao.data_publicacao.desc())
+        return query
+
+    batches = ExportService.batches(async_session_factory, build_query)
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        ExportService.chunks(fmt, batches),
+        media_type=export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={ExportService.filename(fmt)}"}
     )
 
 
@@ -183,11 +180,14 @@ async def update_status(
     if not licitacao:
         raise LicitacaoNotFound(licitacao_id)
 
+    from_status = licitacao.status
     licitacao.status = data.status.value
     if data.rejection_reason:
         licitacao.rejection_reason = data.rejection_reason
 
     session.add(licitacao)
+    # A decisão vira exemplo para o classificador de relevância (task_train_relevance)
+    RelevanceService.record_status_change(session, licitacao, from_status)
     await session.commit()
     await session.refresh(licitacao)
     return licitacao
@@ -213,14 +213,12 @@ async def create_item(id: int, item: ItemCreate, session: AsyncSession = Depends
 
 
 @router.get("/licitacoes/{licitacao_id}/items")
-async def get_licitacao_items(licitacao_id: int, session: AsyncSession = Depends(get_session)):
-    from services.pncp_client import PNCPClient
-    client = PNCPClient()
-    try:
-        items = await client.fetch_items(session, licitacao_id)
-        return items
-    finally:
-        await client.close()
+async def get_licitacao_items(
+    licitacao_id: int,
+    session: AsyncSession = Depends(get_session),
+    client: PNCPClient = Depends(get_pncp_client)
+):
+    return await client.fetch_items(session, licitacao_id)
 
 
 @router.delete("/licitacoes/{licitacao_id}/items/{item_id}")
@@ -264,7 +262,11 @@ async def extract_items_from_pdf(
 # ─── Editais ──────────────────────────────────────────────────────────────────
 
 @router.get("/licitacoes/{licitacao_id}/editais")
-async def get_licitacao_attachments(licitacao_id: int, session: AsyncSession = Depends(get_session)):
+async def get_licitacao_attachments(
+    licitacao_id: int,
+    session: AsyncSession = Depends(get_session),
+    client: PNCPClient = Depends(get_pncp_client)
+):
     licitacao = await session.get(Licitacao, licitacao_id)
     if not licitacao:
         return []
@@ -272,17 +274,15 @@ async def get_licitacao_attachments(licitacao_id: int, session: AsyncSession = D
     if "transferegov" in licitacao.pncp_id or "google" in licitacao.pncp_id:
         return []
 
-    from services.pncp_client import PNCPClient
-    client = PNCPClient()
-    try:
-        versions = await client.fetch_edital_versions(licitacao.pncp_id)
-        return versions
-    finally:
-        await client.close()
+    return await client.fetch_edital_versions(licitacao.pncp_id)
 
 
 @router.get("/licitacoes/{id}/editais-v2")
-async def get_licitacao_editais(id: int, session: AsyncSession = Depends(get_session)):
+async def get_licitacao_editais(
+    id: int,
+    session: AsyncSession = Depends(get_session),
+    client: PNCPClient = Depends(get_pncp_client)
+):
     """Retorna histórico de editais com cache local."""
     licitacao = await session.get(Licitacao, id)
     if not licitacao:
@@ -294,24 +294,19 @@ async def get_licitacao_editais(id: int, session: AsyncSession = Depends(get_ses
     versions = db_versions.all()
 
     if not versions:
-        from services.pncp_client import PNCPClient
-        client = PNCPClient()
-        try:
-            versions_data = await client.fetch_edital_versions(licitacao.pncp_id)
-            for v in versions_data:
-                ev = EditalVersion(
-                    licitacao_id=id,
-                    versao=v['versao'],
-                    titulo_arquivo=v['titulo_arquivo'],
-                    url=v['url'],
-                    data_publicacao=datetime.fromisoformat(v['data_publicacao'].replace('Z', '+00:00')),
-                    is_latest=v['is_latest']
-                )
-                session.add(ev)
-            await session.commit()
-            return versions_data
-        finally:
-            await client.close()
+        versions_data = await client.fetch_edital_versions(licitacao.pncp_id)
+        for v in versions_data:
+            ev = EditalVersion(
+                licitacao_id=id,
+                versao=v['versao'],
+                titulo_arquivo=v['titulo_arquivo'],
+                url=v['url'],
+                data_publicacao=datetime.fromisoformat(v['data_publicacao'].replace('Z', '+00:00')),
+                is_latest=v['is_latest']
+            )
+            session.add(ev)
+        await session.commit()
+        return versions_data
 
     return versions
 
@@ -346,18 +341,14 @@ async def list_impugnacoes(id: int, session: AsyncSession = Depends(get_session)
 async def generate_proposal(
     licitacao_id: int,
     request: ProposalRequest,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    client: PNCPClient = Depends(get_pncp_client)
 ):
     licitacao = await session.get(Licitacao, licitacao_id)
     if not licitacao:
         raise LicitacaoNotFound(licitacao_id)
 
-    from services.pncp_client import PNCPClient
-    client = PNCPClient()
-    try:
-        items = await client.fetch_items(session, licitacao_id)
-    finally:
-        await client.close()
+    items = await client.fetch_items(session, licitacao_id)
 
     from services.proposal_generator import ProposalGenerator
     generator = ProposalGenerator()
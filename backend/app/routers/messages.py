@@ -48,14 +48,3 @@ async def approve_message(
     msg.approval_status = action.status
     await session.commit()
     return msg
-
-
-@router.post("/sync")
-async def sync_all(days: int = 3, session: AsyncSession = Depends(get_session)):
-    """Sincronização geral PNCP + fontes."""
-    from services.ingestion_service import IngestionService
-    try:
-        count = await IngestionService.sync_all(session, days=days)
-        return {"status": "success", "new_items": count}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
@@ -0,0 +1,159 @@
+"""
+Router: Sincronização — disparo de jobs no worker e estado da ingestão
+incremental (watermarks).
+"""
+from datetime import date
+from typing import List, Literal, Optional
+
+from arq.connections import ArqRedis
+from arq.jobs import Job
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dependencies import get_job_queue
+from domain.enums import SyncStrategy
+from infra.database import get_session
+from infra.queue import enqueue_backfill, enqueue_sync
+from services.backfill_service import BackfillService
+from services.dead_letter_service import DeadLetterService
+from services.ingestion_service import IngestionService
+from services.pncp_client import PNCPClient
+from services.sync_state_service import SyncStateService
+from services.sync_tracker import SyncTracker
+
+router = APIRouter(prefix="/api/sync", tags=["Sincronização"])
+
+
+@router.post("")
+async def sync_all(
+    days: int = 3,
+    strategy: Optional[SyncStrategy] = None,
+    sources: Optional[List[str]] = Query(None),
+    queue: ArqRedis = Depends(get_job_queue),
+):
+    """
+    Enfileira a sincronização no worker (um job por fonte, ou por shard de UFs
+    com SYNC_UF_SHARDS > 1) e retorna na hora
+    com os IDs dos jobs — acompanhe em GET /api/sync/jobs/{job_id}.
+    """
+    sources = sources or list(IngestionService.SOURCES)
+    unknown = [s for s in sources if s not in IngestionService.SOURCES]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Fontes desconhecidas: {', '.join(unknown)}")
+
+    jobs = await enqueue_sync(
+        queue, sources, days=days, strategy=strategy.value if strategy else None,
+        uf_sources=IngestionService.UF_SOURCES,
+    )
+    return {"status": "queued", "jobs": jobs}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, queue: ArqRedis = Depends(get_job_queue)):
+    job = Job(job_id, queue)
+    status = await job.status()
+    if status.value == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado (ou resultado já expirou)")
+
+    info = await job.result_info()
+    return {
+        "job_id": job_id,
+        "status": status.value,
+        "result": info.result if info else None,
+        "finished_at": info.finish_time if info else None,
+    }
+
+
+@router.post("/backfill")
+async def start_backfill(
+    start: date,
+    end: date,
+    window_days: Optional[int] = Query(None, ge=1, le=31),
+    ufs: Optional[List[str]] = Query(None),
+    modalidades: Optional[List[str]] = Query(None),
+    session: AsyncSession = Depends(get_session),
+    queue: ArqRedis = Depends(get_job_queue),
+):
+    """
+    Backfill histórico do PNCP: fatia [start, end] em janelas por UF/modalidade e
+    enfileira cada uma na fila de backfill (worker.BackfillWorkerSettings).
+    Pode ser chamado de novo para o mesmo intervalo: só o que falta é reenfileirado.
+    """
+    if end < start:
+        raise HTTPException(status_code=422, detail="`end` deve ser maior ou igual a `start`")
+
+    backfill_id, window_ids = await BackfillService.plan(
+        session, start, end, window_days=window_days,
+        states=[uf.upper() for uf in ufs] if ufs else None, modalities=modalidades,
+    )
+    queued = await enqueue_backfill(queue, window_ids)
+    return {"status": "queued", "backfill_id": backfill_id, "windows": queued}
+
+
+@router.get("/backfill/{backfill_id}")
+async def backfill_progress(backfill_id: str, session: AsyncSession = Depends(get_session)):
+    return await BackfillService.progress(session, backfill_id)
+
+
+@router.get("/dead-letters")
+async def list_dead_letters(
+    status: Optional[str] = Query("pending", pattern="^(pending|resolved|abandoned)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+):
+    """Páginas que falharam na ingestão (e o que o retry já resolveu ou abandonou)."""
+    return {
+        "counts": await DeadLetterService.counts(session),
+        "items": await DeadLetterService.list_units(session, status=status, limit=limit),
+    }
+
+
+@router.post("/dead-letters/retry")
+async def retry_dead_letters(queue: ArqRedis = Depends(get_job_queue)):
+    """Dispara agora a re-busca das páginas pendentes cujo backoff já venceu."""
+    job = await queue.enqueue_job("task_retry_dead_letters")
+    return {"status": "queued", "job_id": job.job_id if job else None}
+
+
+@router.get("/runs")
+async def list_runs(
+    source: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+    session: AsyncSession = Depends(get_session),
+):
+    """Histórico de execuções (mais recentes primeiro), com métricas por etapa."""
+    return await SyncTracker.list_runs(session, source=source, limit=limit)
+
+
+@router.get("/runs/{run_id}")
+async def get_run(run_id: int, session: AsyncSession = Depends(get_session)):
+    """Progresso de uma execução — atualizado a cada SYNC_PROGRESS_FLUSH_SECONDS enquanto roda."""
+    run = await SyncTracker.get_run(session, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return run
+
+
+# Feeds do PNCP com watermark (o de propostas abertas é um retrato, sem watermark)
+WatermarkSource = Literal[PNCPClient.SYNC_SOURCE, PNCPClient.UPDATES_SYNC_SOURCE]
+
+
+@router.get("/watermarks")
+async def list_watermarks(
+    source: WatermarkSource = PNCPClient.SYNC_SOURCE,
+    session: AsyncSession = Depends(get_session)
+):
+    states = await SyncStateService.load(session, source)
+    return sorted(states.values(), key=lambda s: (s.uf, int(s.modalidade)))
+
+
+@router.delete("/watermarks")
+async def reset_watermarks(
+    source: WatermarkSource = PNCPClient.SYNC_SOURCE,
+    uf: Optional[str] = None,
+    modalidade: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """Reseta watermarks de um feed para forçar a janela completa no próximo sync."""
+    removed = await SyncStateService.reset(session, source, uf=uf, modalidade=modalidade)
+    return {"status": "success", "source": source, "removed": removed}
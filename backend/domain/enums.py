@@ -3,6 +3,7 @@ Enums do domínio — centraliza valores válidos para status, prioridade, etc.
 Substitui strings mágicas por valores tipados e validáveis.
 """
 from enum import Enum
+from typing import Optional
 
 
 class LicitacaoStatus(str, Enum):
@@ -13,6 +14,23 @@ class LicitacaoStatus(str, Enum):
     REJEITADO = "rejeitado"
 
 
+# Status atribuídos pela ingestão; os demais vêm de decisão humana (kanban) e
+# não são sobrescritos por replay nem rescore
+MACHINE_STATUSES = (LicitacaoStatus.RECEBIDO.value, LicitacaoStatus.REJEITADO.value)
+# Motivos de rejeição gravados pela própria ingestão (ver verdict_fields). O
+# operador também rejeita pelo kanban: "rejeitado" com outro motivo (ou sem
+# motivo) é decisão humana. Um motivo novo do gatekeeper precisa entrar aqui.
+SEMANTIC_REJECTION_REASON = "Blacklist/Not Whitelisted"
+MACHINE_REJECTION_REASONS = (SEMANTIC_REJECTION_REASON,)
+
+
+def machine_owned(status: str, rejection_reason: Optional[str]) -> bool:
+    """O status ainda é o da classificação automática (replay/rescore podem regravá-lo)."""
+    if status == LicitacaoStatus.RECEBIDO.value:
+        return True
+    return status == LicitacaoStatus.REJEITADO.value and rejection_reason in MACHINE_REJECTION_REASONS
+
+
 class Priority(str, Enum):
     ALTA = "alta"
     MEDIA = "media"
@@ -42,6 +60,11 @@ class ApprovalStatus(str, Enum):
     REJECTED = "rejected"
 
 
+class SyncStrategy(str, Enum):
+    PUBLICACAO = "publicacao"            # Varredura por data de publicação
+    PROPOSTA_ABERTA = "proposta_aberta"  # Só contratações recebendo propostas
+
+
 # Mapeamento de códigos de modalidade PNCP
 MODALIDADE_MAP = {
     1: "Leilão Eletrônico",
@@ -54,3 +77,12 @@ MODALIDADE_MAP = {
     8: "Dispensa de Licitação",
     9: "Inexigibilidade",
 }
+
+
+# Mapeamento de códigos de modo de disputa PNCP
+MODO_DISPUTA_MAP = {
+    1: "aberto",
+    2: "fechado",
+    3: "aberto/fechado",
+    4: "fechado/aberto",
+}
@@ -34,3 +34,11 @@ class InvalidFileFormat(HTTPException):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Formato inválido. Envie um arquivo {expected}."
         )
+
+
+class ExportFormatUnavailable(HTTPException):
+    def __init__(self, fmt: str, package: str):
+        super().__init__(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Exportação {fmt} indisponível: instale o pacote '{package}'."
+        )
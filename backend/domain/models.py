@@ -3,8 +3,10 @@ Domain Models — Entidades SQLModel do banco de dados.
 Mantém a mesma estrutura de tabelas, mas com imports organizados.
 """
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Computed, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 
 # ─── Licitação ────────────────────────────────────────────────────────────────
@@ -22,6 +24,7 @@ class LicitacaoBase(SQLModel):
     data_abertura_proposta: Optional[datetime] = None
     data_encerramento_proposta: Optional[datetime] = None
     link_edital: Optional[str] = None
+    valor_estimado_total: Optional[float] = None
 
     # Tipo e Modo de Disputa
     modalidade: Optional[str] = None
@@ -48,14 +51,42 @@ class LicitacaoBase(SQLModel):
     # Inteligência (Smart Prioritization)
     priority: str = Field(default="media", index=True)
     score: int = Field(default=0)
+    # Probabilidade de relevância do classificador treinado no kanban (None = sem modelo)
+    relevance: Optional[float] = Field(default=None, index=True)
 
 
 class Licitacao(LicitacaoBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Texto normalizado (domain.text.normalize_text), calculado uma vez na ingestão:
+    # o título alimenta o FilterEngine; título + órgão + cidade, a busca
+    titulo_normalizado: str = Field(default="")
+    busca_normalizada: str = Field(default="")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+# Busca (ver LicitacaoRepository.search). Full-text: tsvector gerado pelo Postgres sobre busca_normalizada — texto
+# já sem acento (domain.text), então a config "portuguese" (stemming + stopwords)
+# basta; unaccent() não é IMMUTABLE e não pode entrar numa coluna gerada.
+# Fica fora dos campos do modelo: não vai nas respostas nem nos INSERTs.
+Licitacao.__table__.append_column(Column(
+    "busca_tsv", TSVECTOR, Computed("to_tsvector('portuguese', busca_normalizada)", persisted=True)
+))
+Index("ix_licitacao_busca_tsv", Licitacao.__table__.c.busca_tsv, postgresql_using="gin")
+# Substring e busca aproximada (pg_trgm) sobre o mesmo texto normalizado
+Index(
+    "ix_licitacao_busca_trgm", Licitacao.__table__.c.busca_normalizada,
+    postgresql_using="gin", postgresql_ops={"busca_normalizada": "gin_trgm_ops"},
+)
+
+
+# Ordem da listagem (score, publicação, id — todos DESC): paginação por cursor
+Index(
+    "ix_licitacao_listagem",
+    Licitacao.__table__.c.score.desc(), Licitacao.__table__.c.data_publicacao.desc(), Licitacao.__table__.c.id.desc(),
+)
+
+
 class LicitacaoCreate(LicitacaoBase):
     pass
 
@@ -184,3 +215,182 @@ class AgentMessage(SQLModel, table=True):
     requires_approval: bool = Field(default=False)
     approval_status: str = Field(default="pending")
     created_at: Optional[str] = None
+
+
+# ─── Estado de Sincronização (Watermarks) ────────────────────────────────────
+
+class SyncState(SQLModel, table=True):
+    """
+    Watermark da ingestão incremental por fonte/UF/modalidade.
+    Guarda até onde cada combinação já foi processada com sucesso.
+    """
+    __tablename__ = "sync_state"
+    __table_args__ = (UniqueConstraint("source", "uf", "modalidade"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source: str = Field(index=True)
+    uf: str
+    modalidade: str
+    last_published_at: Optional[datetime] = None
+    # Janela (dataInicial, yyyymmdd) e última página concluída nessa janela
+    window_start: Optional[str] = None
+    last_page: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ─── Histórico de Sincronização ──────────────────────────────────────────────
+
+class SyncRun(SQLModel, table=True):
+    """Uma execução de sync de uma fonte (pncp, comprasnet, ...)."""
+    __tablename__ = "sync_run"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source: str = Field(index=True)
+    job_id: Optional[str] = Field(default=None, index=True)
+    status: str = Field(default="running")  # running | success | error | timeout
+    started_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    finished_at: Optional[datetime] = None
+    # Atualizado a cada flush de progresso; "running" com heartbeat velho = worker morreu
+    heartbeat_at: datetime = Field(default_factory=datetime.utcnow)
+    new_items: int = 0
+    updated_items: int = 0
+    rejected_items: int = 0
+    error: Optional[str] = None
+
+
+class SyncStage(SQLModel, table=True):
+    """
+    Métricas acumuladas de uma etapa (fetch, filter, write) dentro de um SyncRun.
+    `elapsed` soma o tempo gasto na etapa; no fetch as requisições são
+    concorrentes, então pode passar do tempo de parede da execução.
+    """
+    __tablename__ = "sync_stage"
+    __table_args__ = (UniqueConstraint("run_id", "name"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    run_id: int = Field(foreign_key="sync_run.id", index=True)
+    name: str
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    elapsed: float = 0.0
+    pages: int = 0
+    bytes: int = 0
+    records_seen: int = 0
+    new_items: int = 0
+    updated_items: int = 0
+    rejected_items: int = 0
+    errors: int = 0
+    last_error: Optional[str] = None
+
+
+# ─── Backfill Histórico ──────────────────────────────────────────────────────
+
+class BackfillWindow(SQLModel, table=True):
+    """
+    Uma fatia do backfill: (UF, modalidade, janela de datas) do feed de publicação
+    do PNCP. `last_page` é o checkpoint — gravado na mesma transação das
+    licitações da página, então um job retomado continua exatamente dali.
+    """
+    __tablename__ = "backfill_window"
+    __table_args__ = (UniqueConstraint("uf", "modalidade", "window_start", "window_end"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    backfill_id: str = Field(index=True)
+    uf: str
+    modalidade: str
+    window_start: str  # yyyymmdd
+    window_end: str    # yyyymmdd
+    status: str = Field(default="pending", index=True)  # pending | running | done | failed
+    last_page: int = 0
+    total_pages: Optional[int] = None
+    new_items: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ─── Dead-letter da Ingestão ─────────────────────────────────────────────────
+
+class DeadLetter(SQLModel, table=True):
+    """
+    Uma página de feed do PNCP que falhou (na busca ou na gravação) mesmo após
+    os retries do transporte. Identificada pelos mesmos parâmetros da requisição,
+    para ser re-buscada isoladamente (ver DeadLetterService).
+    """
+    __tablename__ = "dead_letter"
+    __table_args__ = (
+        UniqueConstraint("endpoint", "uf", "modalidade", "data_inicial", "data_final", "page"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source: str = Field(default="pncp", index=True)
+    endpoint: str                      # publicacao | atualizacao | proposta
+    uf: str
+    modalidade: str
+    data_inicial: str = ""             # yyyymmdd ("" no feed de propostas)
+    data_final: str                    # yyyymmdd
+    page: int
+    # Falha na 1ª página: as seguintes nem foram pedidas; a re-busca as descobre
+    discover_pages: bool = False
+    status: str = Field(default="pending", index=True)  # pending | resolved | abandoned
+    attempts: int = 0
+    error: Optional[str] = None
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ─── Arquivo Bruto (payloads originais) ──────────────────────────────────────
+
+class RawPayload(SQLModel, table=True):
+    """
+    JSON original de um registro de upstream, comprimido (ver RawArchiveService).
+    Uma linha por (fonte, chave natural), sempre com a versão mais recente;
+    `published_on` recorta o arquivo por data no replay.
+    """
+    __tablename__ = "raw_payload"
+    __table_args__ = (UniqueConstraint("source", "natural_id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source: str                         # pncp | comprasnet | transferegov
+    natural_id: str
+    uf: str
+    published_on: date = Field(index=True)
+    codec: str                          # zstd | zlib
+    content_hash: str                   # sha1 do JSON canônico (evita regravar o mesmo payload)
+    payload: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    fetched_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ─── Regras de Filtro ────────────────────────────────────────────────────────
+
+class FilterRule(SQLModel, table=True):
+    """
+    Um termo do FilterEngine, editável sem deploy (ver FilterRuleService).
+    Remover só desativa: a versão das regras (contagem + maior updated_at) muda
+    e os processos recompilam o matcher.
+    """
+    __tablename__ = "filter_rule"
+    __table_args__ = (UniqueConstraint("category", "term"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    category: str = Field(index=True)  # black | white | high | medium
+    term: str
+    active: bool = Field(default=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ─── Relevância aprendida ────────────────────────────────────────────────────
+
+class StatusEvent(SQLModel, table=True):
+    """Mudança de status feita no kanban — rótulo para o classificador de relevância."""
+    __tablename__ = "status_event"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    licitacao_id: int = Field(foreign_key="licitacao.id", index=True)
+    from_status: Optional[str] = None
+    to_status: str
+    trained: bool = Field(default=False, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RelevanceModelState(SQLModel, table=True):
+    """Pesos do classificador (uma linha; `examples` é a versão)."""
+    __tablename__ = "relevance_model"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    examples: int = Field(default=0)
+    weights: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
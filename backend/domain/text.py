@@ -0,0 +1,26 @@
+"""
+Normalização de texto — a forma única usada para casar termos, buscar e deduplicar:
+sem acento, minúscula e com espaços colapsados ("Saúde  Pública" -> "saude publica").
+"""
+import unicodedata
+from typing import Optional
+
+# Marcas combinantes (acentos, til, cedilha) que sobram depois da decomposição NFKD
+_COMBINING = dict.fromkeys(range(0x300, 0x370))
+
+
+def normalize_text(*parts: Optional[str]) -> str:
+    """Junta as partes não vazias e normaliza. Texto só ASCII pula a decomposição."""
+    text = " ".join(part for part in parts if part)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).translate(_COMBINING)
+    return " ".join(text.lower().split())
+
+
+def normalized_columns(titulo: Optional[str], orgao_nome: Optional[str] = None, cidade: Optional[str] = None) -> dict:
+    """Valores de Licitacao.titulo_normalizado e Licitacao.busca_normalizada."""
+    titulo_normalizado = normalize_text(titulo)
+    return {
+        "titulo_normalizado": titulo_normalizado,
+        "busca_normalizada": normalize_text(titulo_normalizado, orgao_nome, cidade),
+    }
@@ -3,7 +3,7 @@ Configuração centralizada da aplicação.
 Usa pydantic-settings para validação e carregamento seguro de env vars.
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -26,6 +26,123 @@ class Settings(BaseSettings):
     ANVISA_CLIENT_ID: str = ""
     ANVISA_CLIENT_SECRET: str = ""
     
+    # ─── Cobertura geográfica ─────────────────────────────────────────────────
+    # UFs monitoradas: PNCP e ComprasNet buscam só estas e o FilterEngine.check_geographic
+    # usa o mesmo conjunto. Ex.: TARGET_UFS='["MA","PI","PA","CE","BA"]'
+    TARGET_UFS: List[str] = ["MA", "PI", "PA"]
+    # Em quantos jobs arq as fontes por UF (pncp, comprasnet) são divididas; cada
+    # shard tem um subconjunto das UFs e lock próprio, então roda em outro worker.
+    SYNC_UF_SHARDS: int = 1
+    
+    # ─── Ingestão (PNCP) ──────────────────────────────────────────────────────
+    # Máximo de requisições simultâneas ao PNCP durante o sync
+    PNCP_CONCURRENCY: int = 8
+    # Sync incremental: quanto recuar do watermark para pegar publicações atrasadas
+    PNCP_SYNC_OVERLAP_HOURS: int = 6
+    # Estratégia padrão do sync: "publicacao" (varredura por data) ou "proposta_aberta"
+    PNCP_SYNC_STRATEGY: str = "publicacao"
+    # proposta_aberta: até quantos dias à frente buscar encerramentos de proposta
+    PNCP_PROPOSTA_HORIZON_DAYS: int = 60
+    # sync_all: orçamento de tempo por fonte (s); SYNC_SOURCE_TIMEOUTS sobrescreve por fonte
+    SYNC_SOURCE_TIMEOUT: int = 900
+    SYNC_SOURCE_TIMEOUTS: Dict[str, int] = {"scraper": 300}
+    # Intervalo de gravação do progresso em sync_run/sync_stage (ver services/sync_tracker.py)
+    SYNC_PROGRESS_FLUSH_SECONDS: float = 2.0
+    # Pipeline de ingestão (services/ingestion_pipeline.py): páginas entre estágios
+    # (backpressure) e registros por INSERT/commit no estágio de persistência
+    PIPELINE_QUEUE_SIZE: int = 8
+    PIPELINE_BATCH_SIZE: int = 500
+    # Cadência do cron de cada fonte no worker arq (minutos; divisor de 60 ou múltiplo de 60).
+    # "pncp_atualizacao" é o feed de retificações (task_sync_updates, único dono do feed)
+    SYNC_INTERVAL_MINUTES: Dict[str, int] = {
+        "pncp": 15, "pncp_atualizacao": 15, "comprasnet": 60, "transferegov": 360, "scraper": 120,
+    }
+    
+    # ─── Backfill histórico (ver services/backfill_service.py) ────────────────
+    # Fila arq própria e orçamento de requisições separado do sync ao vivo:
+    # PNCP_RATE_PER_SEC + PNCP_BACKFILL_RATE_PER_SEC = o que o PNCP aguenta.
+    BACKFILL_QUEUE: str = "arq:backfill"
+    BACKFILL_WINDOW_DAYS: int = 7
+    BACKFILL_MAX_JOBS: int = 4
+    BACKFILL_MAX_TRIES: int = 8
+    BACKFILL_WINDOW_TIMEOUT: int = 1800
+    PNCP_BACKFILL_RATE_PER_SEC: float = 2.0
+    PNCP_BACKFILL_CONCURRENCY: int = 2
+    
+    # ─── Dead-letter da ingestão (ver services/dead_letter_service.py) ────────
+    # Páginas que falharam são re-buscadas pelo worker a cada N minutos, com
+    # backoff exponencial por página, até desistir após MAX_ATTEMPTS tentativas.
+    DEAD_LETTER_RETRY_MINUTES: int = 10
+    DEAD_LETTER_MAX_ATTEMPTS: int = 6
+    DEAD_LETTER_BACKOFF_BASE: float = 300.0
+    DEAD_LETTER_BACKOFF_MAX: float = 6 * 3600.0
+    DEAD_LETTER_BATCH_SIZE: int = 200
+    
+    # ─── Arquivo bruto e replay (ver services/raw_archive_service.py) ─────────
+    # Guarda o JSON original de cada registro (comprimido) para reprocessar
+    # mapeamento/filtros/score sem voltar ao upstream. Codec: "zstd" (requer o
+    # pacote 'zstandard'; sem ele cai para "zlib") ou "zlib".
+    RAW_ARCHIVE_ENABLED: bool = True
+    RAW_ARCHIVE_CODEC: str = "zstd"
+    REPLAY_BATCH_SIZE: int = 2000
+    REPLAY_WORKERS: int = 0  # 0 = os.cpu_count()
+    
+    # ─── Regras de filtro (ver services/filter_rule_service.py) ───────────────
+    # Intervalo mínimo entre checagens da versão das regras no banco (hot reload)
+    FILTER_RULES_REFRESH_SECONDS: float = 30.0
+    # Licitações por UPDATE/commit no rescore
+    RESCORE_BATCH_SIZE: int = 2000
+    
+    # ─── Relevância aprendida (ver services/relevance_classifier.py) ──────────
+    # Espaço do hashing de n-gramas (2**bits pesos possíveis; só os vistos ocupam memória)
+    RELEVANCE_HASH_BITS: int = 20
+    RELEVANCE_LEARNING_RATE: float = 0.2
+    RELEVANCE_EPOCHS: int = 5
+    RELEVANCE_L2: float = 1e-6
+    # Abaixo disso a coluna `relevance` fica nula (modelo ainda sem base)
+    RELEVANCE_MIN_EXAMPLES: int = 30
+    # Cadência do treino incremental com as decisões novas do kanban (0 = desligado)
+    RELEVANCE_TRAIN_MINUTES: int = 30
+    
+    # ─── Busca (ver LicitacaoRepository.search) ───────────────────────────────
+    # Limiar do pg_trgm (word_similarity) para aceitar um resultado aproximado
+    # quando nem a busca full-text nem a substring acham: equivale ao antigo
+    # token_set_ratio >= 80 do thefuzz para erros de digitação e variações de nome
+    SEARCH_SIMILARITY_THRESHOLD: float = 0.6
+    # Listagem por cursor: o total vem de um count em cache por filtro (segundos)
+    LISTING_COUNT_CACHE_SECONDS: float = 60.0
+    # Exportação (CSV/XLSX/Parquet): linhas por lote lido do cursor do servidor
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # ─── HTTP (clients compartilhados, ver infra/http_clients.py) ─────────────
+    HTTP2_ENABLED: bool = False  # requer o pacote 'h2'
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_MAX_KEEPALIVE_PER_HOST: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # ─── Upstreams ────────────────────────────────────────────────────────────
+    # URLs base das APIs de governo. Em benchmarks/testes de regressão, aponte
+    # para o stand-in local (scripts/standin_server.py).
+    PNCP_CONSULTA_URL: str = "https://pncp.gov.br/api/consulta/v1"
+    PNCP_API_URL: str = "https://pncp.gov.br/pncp-api/v1"
+    COMPRASNET_URL: str = "https://compras.dados.gov.br/licitacoes/v1/licitacoes.json"
+    TRANSFEREGOV_URL: str = "https://pro-siconv.estaleiro.serpro.gov.br/maisbrasil-api/v1/services/public"
+    # Busca no Google News dentro do sync_all (desligar em ambientes offline)
+    NEWS_SCRAPER_ENABLED: bool = True
+    
+    # ─── Resiliência upstream (ver infra/resilience.py) ───────────────────────
+    # Orçamento de requisições/s por upstream, compartilhado via Redis por
+    # API, worker e scheduler. Vazio/0 = sem limite.
+    PNCP_RATE_PER_SEC: float = 10.0
+    COMPRASNET_RATE_PER_SEC: float = 5.0
+    TRANSFEREGOV_RATE_PER_SEC: float = 5.0
+    ANVISA_RATE_PER_SEC: float = 2.0
+    HTTP_MAX_RETRIES: int = 4
+    HTTP_BACKOFF_BASE: float = 0.5
+    HTTP_BACKOFF_MAX: float = 30.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+    
     # ─── CORS ─────────────────────────────────────────────────────────────────
     # Para dev: ["http://localhost:3000"]
     # Para prod: ["https://seudominio.com"]
@@ -2,6 +2,7 @@
 Database — Engine, session factory, e inicialização.
 """
 from sqlmodel import SQLModel, create_engine
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -33,4 +34,6 @@ async def init_db():
     import domain.models  # noqa: F401
     
     async with engine.begin() as conn:
+        # Índice trigram da busca (ix_licitacao_busca_trgm) depende do pg_trgm
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(SQLModel.metadata.create_all)
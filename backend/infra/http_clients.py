@@ -0,0 +1,120 @@
+"""
+HTTP Clients — registro de clients httpx de vida longa, um por upstream.
+
+Cada upstream (PNCP, ComprasNet, Transfere.gov, ANVISA e downloads genéricos de
+editais) ganha um único `httpx.AsyncClient` com pool keep-alive, limites por host
+e timeouts configurados. O registro é aberto/fechado no lifespan da API (main.py)
+e no startup/shutdown do worker; routers e services recebem os clients por
+injeção de dependência em vez de pagar TCP + TLS a cada request.
+
+Todo client passa pelo `ResilientTransport` (infra/resilience.py): rate limit
+compartilhado via Redis, retries com backoff e circuit breaker por host.
+"""
+import importlib.util
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import httpx
+import redis.asyncio as aioredis
+
+from infra.config import settings
+from infra.resilience import RateLimiter, RedisTokenBucket, ResilientTransport
+
+logger = logging.getLogger("HttpClients")
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+}
+
+
+@dataclass(frozen=True)
+class Upstream:
+    timeout: float
+    connect_timeout: float = 10.0
+    follow_redirects: bool = False
+    headers: Dict[str, str] = field(default_factory=dict)
+    rate_per_sec: float = 0.0  # 0 = sem rate limit (só retries/circuit breaker)
+    rate_scope: Optional[str] = None  # orçamento separado para o mesmo host
+
+
+UPSTREAMS: Dict[str, Upstream] = {
+    # pncp.gov.br (consulta + pncp-api)
+    "pncp": Upstream(timeout=30.0, rate_per_sec=settings.PNCP_RATE_PER_SEC),
+    # Mesmo host, fila de prioridade baixa: backfill histórico com orçamento próprio
+    "pncp_backfill": Upstream(timeout=60.0, rate_per_sec=settings.PNCP_BACKFILL_RATE_PER_SEC, rate_scope="backfill"),
+    # compras.dados.gov.br
+    "comprasnet": Upstream(timeout=30.0, rate_per_sec=settings.COMPRASNET_RATE_PER_SEC),
+    # pro-siconv.estaleiro.serpro.gov.br
+    "transferegov": Upstream(timeout=30.0, rate_per_sec=settings.TRANSFEREGOV_RATE_PER_SEC),
+    "anvisa": Upstream(timeout=120.0, follow_redirects=True, rate_per_sec=settings.ANVISA_RATE_PER_SEC),
+    # Editais hospedados em domínios diversos (portais de prefeituras, etc.)
+    "downloads": Upstream(timeout=90.0, follow_redirects=True, headers=BROWSER_HEADERS),
+}
+
+
+class HttpClientRegistry:
+    def __init__(self, http2: Optional[bool] = None, redis: Optional[aioredis.Redis] = None):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._redis = redis
+        self._bucket: Optional[RedisTokenBucket] = None
+        self.http2 = settings.HTTP2_ENABLED if http2 is None else http2
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("⚠️ HTTP2_ENABLED=true, mas o pacote 'h2' não está instalado. Usando HTTP/1.1.")
+            self.http2 = False
+
+    def _token_bucket(self) -> RedisTokenBucket:
+        # O client Redis só conecta no primeiro comando; sem Redis o bucket cai para local
+        if self._bucket is None:
+            if self._redis is None:
+                self._redis = aioredis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+            self._bucket = RedisTokenBucket(self._redis)
+        return self._bucket
+
+    def _build(self, upstream: Upstream) -> httpx.AsyncClient:
+        limiter = None
+        if upstream.rate_per_sec > 0:
+            limiter = RateLimiter(self._token_bucket(), upstream.rate_per_sec, scope=upstream.rate_scope)
+        transport = ResilientTransport(
+            httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                http2=self.http2,
+            ),
+            limiter=limiter,
+            max_retries=settings.HTTP_MAX_RETRIES,
+            backoff_base=settings.HTTP_BACKOFF_BASE,
+            backoff_max=settings.HTTP_BACKOFF_MAX,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.CIRCUIT_RESET_SECONDS,
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(upstream.timeout, connect=upstream.connect_timeout),
+            follow_redirects=upstream.follow_redirects,
+            headers=upstream.headers,
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Retorna (criando na primeira chamada) o client compartilhado do upstream."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            if name not in UPSTREAMS:
+                raise KeyError(f"Upstream HTTP desconhecido: {name}")
+            client = self._clients[name] = self._build(UPSTREAMS[name])
+        return client
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._bucket = None
+
+
+http_clients = HttpClientRegistry()
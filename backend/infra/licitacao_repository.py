@@ -0,0 +1,262 @@
+"""
+Repositório de Licitações — operações em lote usadas pela ingestão e as
+consultas da listagem (busca, cursor, count).
+Substitui o padrão "um SELECT por registro antes do INSERT" por consultas set-based.
+"""
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import ColumnElement, Select, bindparam, case, exists, func, literal, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.enums import machine_owned
+from domain.models import Licitacao, StatusEvent
+from domain.text import normalize_text, normalized_columns
+from infra.config import settings
+
+# asyncpg limita a 32767 parâmetros por statement; ~30 colunas x 500 linhas fica bem abaixo.
+INSERT_CHUNK_SIZE = 500
+
+# Ordem da listagem; o cursor guarda os três valores da última linha (ix_licitacao_listagem)
+LISTING_ORDER = (Licitacao.score.desc(), Licitacao.data_publicacao.desc(), Licitacao.id.desc())
+
+# Cache dos counts da listagem: chave do statement -> (monotonic, total)
+_count_cache: Dict[str, Tuple[float, int]] = {}
+
+
+class LicitacaoRepository:
+    @staticmethod
+    async def search(session: AsyncSession, search: str) -> Tuple[ColumnElement, ColumnElement]:
+        """
+        (condição, rank) da busca por título + órgão + cidade, toda no Postgres.
+        Uma licitação entra se casar em qualquer um dos caminhos, do mais ao
+        menos preciso:
+            full-text  — busca_tsv @@ consulta (GIN; stemming, sintaxe de busca web)
+            substring  — busca_normalizada LIKE '%texto%' (GIN trigram)
+            aproximado — texto <% busca_normalizada (GIN trigram; word_similarity
+                         >= SEARCH_SIMILARITY_THRESHOLD): erros de digitação e
+                         variações do nome do órgão
+        O rank põe os dois primeiros na frente (1 + ts_rank_cd) e ordena os
+        aproximados pela similaridade. Ajusta o limiar do pg_trgm só nesta
+        transação (SET LOCAL), então a sessão é necessária.
+        """
+        text = normalize_text(search)
+        await session.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(settings.SEARCH_SIMILARITY_THRESHOLD), True))
+        )
+        tsv = Licitacao.__table__.c.busca_tsv
+        busca = col(Licitacao.busca_normalizada)
+        query = func.websearch_to_tsquery("portuguese", text)
+        exact = or_(tsv.op("@@")(query), busca.contains(text, autoescape=True))
+        fuzzy = literal(text).op("<%")(busca)
+        rank = case((exact, 1 + func.ts_rank_cd(tsv, query)), else_=func.word_similarity(text, busca))
+        return or_(exact, fuzzy), rank
+
+    @staticmethod
+    def encode_cursor(licitacao: Licitacao) -> str:
+        """Cursor opaco com a posição (score, data_publicacao, id) de uma linha da listagem."""
+        raw = json.dumps([licitacao.score, licitacao.data_publicacao.isoformat(), licitacao.id])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def after_cursor(cursor: str) -> ColumnElement:
+        """Condição "depois do cursor" na ordem LISTING_ORDER. ValueError se o cursor é inválido."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            score, published, row_id = json.loads(raw)
+            position = (int(score), datetime.fromisoformat(published), int(row_id))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Cursor inválido: {cursor}") from e
+        # Tudo DESC: comparação de linha, que o Postgres resolve pelo índice composto
+        return tuple_(Licitacao.score, Licitacao.data_publicacao, Licitacao.id) < tuple_(*position)
+
+    @staticmethod
+    async def cached_count(session: AsyncSession, stmt: Select, ttl: Optional[float] = None) -> int:
+        """
+        count(*) de `stmt`, reaproveitado por LISTING_COUNT_CACHE_SECONDS para o
+        mesmo filtro (o corte de `days` entra na chave arredondado ao minuto).
+        """
+        ttl = settings.LISTING_COUNT_CACHE_SECONDS if ttl is None else ttl
+        compiled = stmt.compile()
+        params = {
+            k: v.replace(second=0, microsecond=0) if isinstance(v, datetime) else v
+            for k, v in compiled.params.items()
+        }
+        key = f"{compiled}|{sorted(params.items())!r}"
+        now = time.monotonic()
+        hit = _count_cache.get(key)
+        if hit and now - hit[0] < ttl:
+            return hit[1]
+        total = (await session.exec(stmt)).one()
+        if len(_count_cache) >= 1024:  # buscas livres não crescem a memória sem limite
+            _count_cache.clear()
+        _count_cache[key] = (now, total)
+        return total
+
+    @staticmethod
+    async def existing_pncp_ids(session: AsyncSession, pncp_ids: Iterable[str]) -> Set[str]:
+        """Resolve, em uma única consulta (IN), quais pncp_ids já estão no banco."""
+        ids = list(set(pncp_ids))
+        if not ids:
+            return set()
+        result = await session.exec(select(Licitacao.pncp_id).where(col(Licitacao.pncp_id).in_(ids)))
+        return set(result.all())
+
+    @staticmethod
+    async def bulk_insert(session: AsyncSession, licitacoes: List[Licitacao]) -> int:
+        """
+        Insere um lote com INSERT ... ON CONFLICT (pncp_id) DO NOTHING RETURNING id.
+        Retorna quantas linhas foram realmente criadas — duplicatas (inclusive as
+        inseridas por um sync paralelo entre a checagem e o INSERT) são ignoradas.
+        Não faz commit: a transação é do chamador.
+        """
+        rows = []
+        seen: Set[str] = set()
+        for licitacao in licitacoes:
+            if licitacao.pncp_id in seen:
+                continue
+            seen.add(licitacao.pncp_id)
+            row = licitacao.model_dump(exclude={"id"})
+            # Quem não passou pelo pipeline de ingestão chega sem o texto normalizado
+            if not row["titulo_normalizado"]:
+                row.update(normalized_columns(row["titulo"], row["orgao_nome"], row["cidade"]))
+            rows.append(row)
+
+        inserted = 0
+        for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+            stmt = (
+                pg_insert(Licitacao)
+                .values(rows[i:i + INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=["pncp_id"])
+                .returning(Licitacao.id)
+            )
+            result = await session.execute(stmt)
+            inserted += len(result.all())
+        return inserted
+
+    @staticmethod
+    async def bulk_apply_updates(session: AsyncSession, updates: Dict[str, dict]) -> int:
+        """
+        Aplica atualizações campo a campo vindas do feed de retificações.
+
+        `updates` mapeia pncp_id -> {campo: novo_valor}. Os valores atuais são lidos
+        com uma única consulta IN; só as linhas com algum campo realmente diferente
+        (ignorando valores None do feed) são gravadas, num único UPDATE executemany
+        que também marca `edital_atualizado` e `updated_at`.
+        Retorna quantas licitações mudaram. Não faz commit.
+        """
+        if not updates:
+            return 0
+
+        fields = sorted({f for fields in updates.values() for f in fields})
+        columns = [Licitacao.id, Licitacao.pncp_id] + [getattr(Licitacao, f) for f in fields]
+        result = await session.exec(select(*columns).where(col(Licitacao.pncp_id).in_(list(updates))))
+
+        now = datetime.utcnow()
+        params = []
+        for row in result.all():
+            current = row._mapping
+            incoming = updates[current["pncp_id"]]
+            changed = {f: v for f, v in incoming.items() if v is not None and current[f] != v}
+            if not changed:
+                continue
+            params.append({
+                "b_id": current["id"],
+                **{f: changed.get(f, current[f]) for f in fields},
+                "edital_atualizado": True,
+                "updated_at": now,
+            })
+
+        if not params:
+            return 0
+
+        table = Licitacao.__table__
+        await session.execute(update(table).where(table.c.id == bindparam("b_id")), params)
+        return len(params)
+
+    @staticmethod
+    async def bulk_rewrite(
+        session: AsyncSession,
+        rows: Dict[str, dict],
+        keep_decisions: bool = False,
+    ) -> int:
+        """
+        Regrava campos derivados (mapeamento, filtros, score) recalculados pelo replay.
+
+        `rows` mapeia pncp_id -> {campo: valor}; ao contrário de `bulk_apply_updates`,
+        None também é gravado e `edital_atualizado` não é tocado. Com
+        `keep_decisions`, status e rejection_reason só são regravados quando ainda
+        são da classificação automática (domain.enums.machine_owned) e a licitação
+        nunca foi movida no kanban (sem StatusEvent). Um me_epp_status "exclusivo"
+        gravado nunca é rebaixado: pode ter vindo da flag da fonte ou da análise do
+        edital, que o replay não refaz. Só grava o que mudou, num único UPDATE
+        executemany. Retorna quantas licitações mudaram. Não faz commit.
+        """
+        if not rows:
+            return 0
+
+        fields = sorted({f for values in rows.values() for f in values} | {"status", "rejection_reason"})
+        columns = [Licitacao.id, Licitacao.pncp_id] + [getattr(Licitacao, f) for f in fields]
+        if keep_decisions:
+            columns.append(exists().where(StatusEvent.licitacao_id == Licitacao.id).label("decided"))
+        result = await session.exec(select(*columns).where(col(Licitacao.pncp_id).in_(list(rows))))
+
+        now = datetime.utcnow()
+        params = []
+        for row in result.all():
+            current = row._mapping
+            incoming = dict(rows[current["pncp_id"]])
+            if keep_decisions and (current["decided"] or not machine_owned(current["status"], current["rejection_reason"])):
+                incoming.pop("status", None)
+                incoming.pop("rejection_reason", None)
+            if "me_epp_status" in incoming and current["me_epp_status"] == "exclusivo":
+                incoming.pop("me_epp_status")
+            changed = {f: v for f, v in incoming.items() if current[f] != v}
+            if not changed:
+                continue
+            params.append({
+                "b_id": current["id"],
+                **{f: changed.get(f, current[f]) for f in fields},
+                "updated_at": now,
+            })
+
+        if not params:
+            return 0
+
+        table = Licitacao.__table__
+        await session.execute(update(table).where(table.c.id == bindparam("b_id")), params)
+        return len(params)
+
+    @staticmethod
+    async def backfill_normalized(session: AsyncSession, batch_size: int = 2000) -> int:
+        """
+        Preenche titulo_normalizado/busca_normalizada das linhas gravadas antes da
+        coluna existir. Percorre a tabela por id (keyset), um UPDATE executemany e
+        um commit por lote. Retorna quantas linhas foram preenchidas.
+        """
+        table = Licitacao.__table__
+        stmt = update(table).where(table.c.id == bindparam("b_id"))
+        last_id, filled = 0, 0
+        while True:
+            result = await session.exec(
+                select(Licitacao.id, Licitacao.titulo, Licitacao.orgao_nome, Licitacao.cidade)
+                .where(Licitacao.id > last_id, Licitacao.titulo_normalizado == "")
+                .order_by(Licitacao.id)
+                .limit(batch_size)
+            )
+            batch = result.all()
+            if not batch:
+                return filled
+            last_id = batch[-1][0]
+            params = [
+                {"b_id": row_id, **normalized_columns(titulo, orgao_nome, cidade)}
+                for row_id, titulo, orgao_nome, cidade in batch
+            ]
+            await session.execute(stmt, params)
+            await session.commit()
+            filled += len(params)
@@ -0,0 +1,115 @@
+"""
+Fila de jobs (arq) — conexão Redis compartilhada entre API e worker, e lock
+distribuído "single-flight" para que duas execuções da mesma fonte nunca se
+sobreponham (cron + disparo manual + várias réplicas do worker).
+"""
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+
+from infra.config import settings
+
+logger = logging.getLogger("Queue")
+
+# Só apaga a chave se ela ainda for nossa (o TTL pode ter expirado e outro worker pego o lock)
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def redis_settings() -> RedisSettings:
+    return RedisSettings(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+
+
+class JobQueue:
+    """Pool arq criado sob demanda (a API sobe mesmo com o Redis fora) e fechado no lifespan."""
+
+    def __init__(self):
+        self._pool: Optional[ArqRedis] = None
+
+    async def pool(self) -> ArqRedis:
+        if self._pool is None:
+            self._pool = await create_pool(redis_settings())
+        return self._pool
+
+    async def aclose(self):
+        if self._pool is not None:
+            await self._pool.aclose()
+            self._pool = None
+
+
+job_queue = JobQueue()
+
+
+def uf_shards(ufs: Sequence[str], shards: int) -> List[List[str]]:
+    """Divide as UFs em até `shards` grupos de tamanho equilibrado."""
+    shards = max(1, min(shards, len(ufs)))
+    return [list(ufs[i::shards]) for i in range(shards)]
+
+
+def shard_name(source: str, ufs: Optional[Sequence[str]] = None) -> str:
+    """Nome do shard (chave do lock e do retorno de `enqueue_sync`): "pncp" ou "pncp:MA-PA"."""
+    return f"{source}:{'-'.join(ufs)}" if ufs else source
+
+
+async def enqueue_sync(
+    redis: ArqRedis,
+    sources: Iterable[str],
+    days: int = 3,
+    strategy: Optional[str] = None,
+    uf_sources: Iterable[str] = (),
+) -> Dict[str, Optional[str]]:
+    """
+    Enfileira um `task_sync_source` por fonte. As fontes de `uf_sources` viram
+    SYNC_UF_SHARDS jobs, cada um com uma fatia de TARGET_UFS, para que workers
+    diferentes os processem em paralelo. Retorna {shard: job_id}.
+    """
+    uf_sources = set(uf_sources)
+    shards = uf_shards(settings.TARGET_UFS, settings.SYNC_UF_SHARDS)
+    jobs = {}
+    for source in sources:
+        if source in uf_sources and len(shards) > 1:
+            for ufs in shards:
+                job = await redis.enqueue_job("task_sync_source", source, days=days, strategy=strategy, ufs=ufs)
+                jobs[shard_name(source, ufs)] = job.job_id if job else None
+        else:
+            job = await redis.enqueue_job("task_sync_source", source, days=days, strategy=strategy)
+            jobs[source] = job.job_id if job else None
+    return jobs
+
+
+async def enqueue_backfill(redis: ArqRedis, window_ids: Iterable[int]) -> int:
+    """Enfileira as janelas do backfill na fila de prioridade baixa. Retorna quantas."""
+    count = 0
+    for window_id in window_ids:
+        # _job_id fixo: reenfileirar uma janela já na fila não duplica o job
+        await redis.enqueue_job(
+            "task_backfill_window", window_id,
+            _queue_name=settings.BACKFILL_QUEUE, _job_id=f"backfill-window-{window_id}",
+        )
+        count += 1
+    return count
+
+
+@asynccontextmanager
+async def single_flight(redis, name: str, ttl: float) -> AsyncIterator[bool]:
+    """
+    Lock distribuído (SET NX PX). Entrega True se o lock foi obtido, False se
+    outra execução já o detém — nesse caso o chamador deve apenas pular.
+    O `ttl` deve cobrir a execução inteira: é o que libera o lock se o worker morrer.
+    """
+    key = f"lock:{name}"
+    token = uuid.uuid4().hex
+    acquired = bool(await redis.set(key, token, nx=True, px=int(ttl * 1000)))
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            await redis.eval(_RELEASE_LUA, 1, key, token)
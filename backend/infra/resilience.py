@@ -0,0 +1,247 @@
+"""
+Resiliência upstream — rate limit compartilhado, retries e circuit breaker.
+
+API, worker arq, scheduler e /api/sync podem bater no PNCP ao mesmo tempo.
+Este módulo coordena esses processos:
+
+- `RedisTokenBucket`: token bucket por host guardado no Redis (script Lua
+  atômico, relógio do próprio Redis), então todos os processos dividem o
+  mesmo orçamento de requisições. Sem Redis, cai para um bucket local.
+- `CircuitBreaker`: por host; depois de N falhas seguidas abre e rejeita
+  chamadas até o upstream ter tempo de se recuperar (half-open testa uma).
+- `ResilientTransport`: transporte httpx que aplica os dois acima e refaz
+  requisições 429/5xx/erros de rede com backoff exponencial com jitter,
+  respeitando `Retry-After`.
+"""
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger("Resilience")
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Upstream marcado como fora do ar; a requisição nem é enviada."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o header Retry-After (segundos ou data HTTP) em segundos de espera."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """Backoff exponencial com "full jitter"; nunca menor que o Retry-After do servidor."""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+# ─── Token Bucket ─────────────────────────────────────────────────────────────
+
+class LocalTokenBucket:
+    """Token bucket em memória (fallback quando o Redis não está disponível)."""
+
+    def __init__(self):
+        self._state: Dict[str, tuple] = {}
+
+    async def try_acquire(self, key: str, rate: float, burst: int) -> float:
+        """Tenta consumir um token. Retorna 0 se conseguiu, senão quantos segundos esperar."""
+        now = time.monotonic()
+        tokens, ts = self._state.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - ts) * rate)
+        if tokens >= 1:
+            self._state[key] = (tokens - 1, now)
+            return 0.0
+        self._state[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+
+class RedisTokenBucket:
+    """Token bucket compartilhado entre processos via Redis."""
+
+    # KEYS[1] = chave do bucket; ARGV = rate (tokens/s), burst
+    LUA = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or burst
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = math.ceil((1 - tokens) * 1000 / rate)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+    return wait
+    """
+
+    def __init__(self, redis, prefix: str = "ratelimit"):
+        self.redis = redis
+        self.prefix = prefix
+        self._script = redis.register_script(self.LUA)
+        self._fallback = LocalTokenBucket()
+        self._redis_down_until = 0.0
+
+    async def try_acquire(self, key: str, rate: float, burst: int) -> float:
+        if time.monotonic() < self._redis_down_until:
+            return await self._fallback.try_acquire(key, rate, burst)
+        try:
+            wait_ms = await self._script(keys=[f"{self.prefix}:{key}"], args=[rate, burst])
+            return int(wait_ms) / 1000
+        except Exception as e:
+            # Sem Redis o limite vira por processo; tenta reconectar em 30s
+            logger.warning(f"⚠️ Rate limiter sem Redis ({e}); usando bucket local.")
+            self._redis_down_until = time.monotonic() + 30
+            return await self._fallback.try_acquire(key, rate, burst)
+
+
+class RateLimiter:
+    """
+    Espera até haver um token disponível para a chave (normalmente o host).
+    `scope` separa orçamentos diferentes para o mesmo host (ex.: backfill).
+    """
+
+    def __init__(self, bucket, rate: float, burst: Optional[int] = None, scope: Optional[str] = None):
+        self.bucket = bucket
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.scope = scope
+
+    async def acquire(self, key: str):
+        if self.scope:
+            key = f"{self.scope}:{key}"
+        while True:
+            wait = await self.bucket.try_acquire(key, self.rate, self.burst)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+# ─── Circuit Breaker ──────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def before_request(self):
+        """Levanta CircuitOpenError enquanto o circuito está aberto (ou com um teste em andamento)."""
+        if self.state == self.CLOSED:
+            return
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            raise CircuitOpenError(f"Circuito aberto para {self.name}")
+        # Passado o tempo de espera, deixa UMA requisição de teste passar
+        self.state = self.HALF_OPEN
+        self.opened_at = time.monotonic()
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"🔌 Circuito ABERTO para {self.name} após {self.failures} falhas.")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+# ─── Transporte httpx ─────────────────────────────────────────────────────────
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    Envolve o transporte real do httpx. Para cada requisição: checa o circuito
+    do host, pega um token do limiter e envia; 429/5xx e erros de rede são
+    refeitos até `max_retries` vezes. Esgotadas as tentativas, a última
+    resposta (ou exceção) chega ao chamador — que decide não avançar o watermark.
+    """
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.inner = inner
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker_for(self, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        breaker = self.breaker_for(host)
+        attempt = 0
+        while True:
+            breaker.before_request()
+            if self.limiter:
+                await self.limiter.acquire(host)
+
+            retry_after = None
+            try:
+                response = await self.inner.handle_async_request(request)
+            except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"↻ {request.method} {host}: {type(e).__name__}, nova tentativa...")
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    breaker.record_success()
+                    return response
+                # 429 é o upstream pedindo calma, não sinal de que está fora do ar
+                if response.status_code != 429:
+                    breaker.record_failure()
+                if attempt >= self.max_retries:
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                await response.aclose()
+                logger.warning(f"↻ {request.method} {host}: HTTP {response.status_code}, nova tentativa...")
+
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+            attempt += 1
+
+    async def aclose(self):
+        await self.inner.aclose()
@@ -2,11 +2,30 @@
 BH-Licit API — Application Factory.
 Arquivo principal slim: apenas configuração, middleware e registro de routers.
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from infra.config import settings
-from infra.database import init_db
+from infra.database import async_session_factory, init_db
+from infra.http_clients import http_clients
+from infra.queue import job_queue
+from services.filter_rule_service import FilterRuleService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ─── Startup ──────────────────────────────────────────────────────────
+    await init_db()
+    # Regras de filtro: tabela começa com as listas embutidas; depois, hot reload
+    async with async_session_factory() as session:
+        await FilterRuleService.seed(session)
+    await FilterRuleService.refresh(async_session_factory, force=True)
+    yield
+    # ─── Shutdown ─────────────────────────────────────────────────────────
+    await http_clients.aclose()
+    await job_queue.aclose()
 
 
 def create_app() -> FastAPI:
@@ -14,6 +33,7 @@ def create_app() -> FastAPI:
         title=settings.PROJECT_NAME,
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
     )
 
     # ─── CORS ─────────────────────────────────────────────────────────────
@@ -25,11 +45,6 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # ─── Startup ──────────────────────────────────────────────────────────
-    @app.on_event("startup")
-    async def on_startup():
-        await init_db()
-
     # ─── Health Check ─────────────────────────────────────────────────────
     @app.get("/", tags=["Health"])
     async def root():
@@ -40,7 +55,7 @@ def create_app() -> FastAPI:
         return {"status": "healthy"}
 
     # ─── Routers ──────────────────────────────────────────────────────────
-    from app.routers import licitacoes, analysis, pipeline, dashboard, anvisa, messages
+    from app.routers import licitacoes, analysis, pipeline, dashboard, anvisa, messages, sync, filter_rules
 
     app.include_router(licitacoes.router)
     app.include_router(analysis.router)
@@ -48,6 +63,8 @@ def create_app() -> FastAPI:
     app.include_router(dashboard.router)
     app.include_router(anvisa.router)
     app.include_router(messages.router)
+    app.include_router(sync.router)
+    app.include_router(filter_rules.router)
 
     return app
 
@@ -1,37 +1,12 @@
-import asyncio
-import logging
-from core.config import settings
-from database import get_session
-from services.pncp_client import PNCPClient
-from sqlalchemy.orm import sessionmaker
-from database import engine
-from sqlmodel.ext.asyncio.session import AsyncSession
+"""
+Legado: o agendamento agora é o cron do worker arq (`worker.WorkerSettings`),
+com um job por fonte e lock distribuído contra execuções sobrepostas.
+Mantido só para quem ainda roda `python scheduler.py`: sobe o mesmo worker
+(equivalente a `arq worker.WorkerSettings`).
+"""
+from arq import run_worker
 
-logger = logging.getLogger("uvicorn")
-
-async def run_scheduler():
-    """
-    Roda o robô a cada X minutos.
-    """
-    logger.info("Scheduler iniciado.")
-    while True:
-        try:
-            logger.info("Executando tarefa agendada: PNCP Sync")
-            # Cria sessão manual pois não estamos numa request
-            async_session = sessionmaker(
-                engine, class_=AsyncSession, expire_on_commit=False
-            )
-            async with async_session() as session:
-                client = PNCPClient()
-                count = await client.fetch_and_process(session)
-                await client.close()
-                logger.info(f"Sync finalizado. Novos itens: {count}")
-                
-        except Exception as e:
-            logger.error(f"Erro no scheduler: {e}")
-        
-        # Espera 10 minutos (600s)
-        await asyncio.sleep(600)
+from worker import WorkerSettings
 
 if __name__ == "__main__":
-    asyncio.run(run_scheduler())
+    run_worker(WorkerSettings)
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark do FilterEngine: filtro semântico + prioridade/score de N
+títulos sintéticos, comparando as varreduras `in` termo a termo (implementação
+anterior, reproduzida aqui como referência) com o TermMatcher compilado.
+Confere também que os dois dão exatamente o mesmo resultado. Os títulos entram
+já normalizados, como em Licitacao.titulo_normalizado.
+
+Uso (dentro de backend/):
+    python -m scripts.bench_filter_engine --titles 100000
+"""
+import argparse
+import random
+import time
+
+from domain.text import normalize_text
+from services.filter_engine import FilterEngine
+
+# Objetos no formato dos feeds (PNCP/ComprasNet), com município e processo variando
+TEMPLATES = [
+    "Registro de preços para eventual aquisição de medicamentos para atender às necessidades da Secretaria Municipal de Saúde de {c}",
+    "Aquisição de material médico hospitalar (luvas, seringas, gaze e cateteres) para o Hospital Regional de {c}",
+    "Contratação de empresa para fornecimento de gêneros alimentícios destinados à merenda escolar do município de {c}",
+    "Pregão eletrônico para aquisição de equipamentos de informática e impressoras para a Prefeitura de {c}",
+    "Contratação de empresa especializada em obras de engenharia para reforma da unidade básica de saúde de {c}",
+    "Aquisição de reagentes laboratoriais e testes rápidos para o laboratório central de {c} - cota reservada ME/EPP",
+    "Serviços de fisioterapia e enfermagem domiciliar para pacientes do SUS no município de {c}",
+    "Locação de veículos com motorista para transporte de pacientes de {c}",
+    "Aquisição de insumos odontológicos para os consultórios da rede municipal de {c}, exclusivo ME/EPP",
+    "Aquisição de material de expediente e papel A4 para as secretarias de {c}",
+    "Contratação de serviços contínuos de limpeza, conservação e vigilância patrimonial dos prédios públicos de {c}",
+    "Aquisição de equipamento medico-hospitalar (monitores, bombas de infusão e desfibriladores) para a UPA de {c}",
+]
+CITIES = ["São Luís", "Imperatriz", "Teresina", "Parnaíba", "Belém", "Santarém", "Caxias", "Timon", "Marabá", "Bacabal"]
+
+
+def normalized(terms):
+    return [normalize_text(term) for term in terms]
+
+
+BLACK_LIST, WHITE_LIST = normalized(FilterEngine.BLACK_LIST), normalized(FilterEngine.WHITE_LIST)
+HIGH_VALUE_TERMS, MEDIUM_VALUE_TERMS = normalized(FilterEngine.HIGH_VALUE_TERMS), normalized(FilterEngine.MEDIUM_VALUE_TERMS)
+
+
+def legacy(titulo: str):
+    """check_semantic + calculate_priority de antes do matcher compilado."""
+    titulo_lower = titulo.lower()
+    semantic = None
+    for term in BLACK_LIST:
+        if term in titulo_lower:
+            semantic = False
+            break
+    if semantic is None:
+        semantic = False
+        for term in WHITE_LIST:
+            if term in titulo_lower:
+                semantic = True
+                break
+
+    titulo_lower = titulo.lower()
+    # As listas eram remontadas a cada chamada
+    high_value_terms = list(HIGH_VALUE_TERMS)
+    medium_value_terms = list(MEDIUM_VALUE_TERMS)
+    score = 0
+    for term in high_value_terms:
+        if term in titulo_lower:
+            score += 30
+    for term in medium_value_terms:
+        if term in titulo_lower:
+            score += 10
+    score = min(score, 100)
+    priority = "alta" if score >= 30 else "media" if score >= 10 else "baixa"
+    return semantic, priority, score
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    titles = [
+        normalize_text(rng.choice(TEMPLATES).format(c=rng.choice(CITIES)) + f" - processo {rng.randint(1, 99999)}/{rng.randint(2020, 2026)}")
+        for _ in range(args.titles)
+    ]
+
+    started = time.perf_counter()
+    expected = [legacy(t) for t in titles]
+    legacy_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    got = FilterEngine.classify_many(titles, normalized=True)
+    compiled_elapsed = time.perf_counter() - started
+
+    assert [tuple(v) for v in got] == expected, "matcher compilado divergiu da referência"
+    print(f"{args.titles} títulos (matcher: {'aho-corasick' if FilterEngine.MATCHER.uses_automaton else 'varredura'})")
+    print(f"  varredura termo a termo: {legacy_elapsed:.2f}s ({args.titles / legacy_elapsed:,.0f}/s)")
+    print(f"  matcher compilado:       {compiled_elapsed:.2f}s ({args.titles / compiled_elapsed:,.0f}/s)")
+    print(f"  speedup: {legacy_elapsed / compiled_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
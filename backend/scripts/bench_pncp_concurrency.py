@@ -0,0 +1,75 @@
+"""
+Benchmark do motor de busca concorrente do PNCP (PNCPClient.iter_pages).
+
+Usa um stub local do endpoint /contratacoes/publicacao (httpx.MockTransport com
+latência artificial), então não toca na API real nem no banco.
+
+Uso (dentro de backend/):
+    python -m scripts.bench_pncp_concurrency --latency 0.15 --pages 5
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from services.pncp_client import PNCPClient
+
+
+def build_stub(latency: float, pages: int, page_size: int) -> httpx.MockTransport:
+    """Stub do PNCP: toda combinação UF/modalidade tem `pages` páginas cheias."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        params = request.url.params
+        page = int(params.get("pagina", 1))
+        uf = params.get("uf")
+        mod = params.get("codigoModalidadeContratacao")
+        data = [
+            {
+                "orgaoEntidade": {"cnpj": f"{uf}{mod}", "razaoSocial": "Órgão Stub"},
+                "anoCompra": 2025,
+                "sequencialCompra": page * page_size + i,
+                "objetoCompra": "Aquisição de medicamentos",
+            }
+            for i in range(page_size)
+        ]
+        return httpx.Response(200, json={"data": data, "totalPaginas": pages})
+
+    return httpx.MockTransport(handler)
+
+
+async def run(concurrency: int, latency: float, pages: int, page_size: int) -> tuple[float, int, int]:
+    http = httpx.AsyncClient(transport=build_stub(latency, pages, page_size))
+    client = PNCPClient(client=http, concurrency=concurrency)
+
+    n_pages = n_records = 0
+    start = time.perf_counter()
+    async for _uf, _mod, _page, items in client.iter_pages("20250101", "20250103"):
+        n_pages += 1
+        n_records += len(items)
+    elapsed = time.perf_counter() - start
+
+    await http.aclose()
+    return elapsed, n_pages, n_records
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1, help="Latência simulada por requisição (s)")
+    parser.add_argument("--pages", type=int, default=4, help="Páginas por combinação UF/modalidade")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    print(f"Stub PNCP: latência {args.latency}s, {args.pages} páginas x {args.page_size} registros por combinação")
+    print(f"{'concorrência':>12} | {'tempo (s)':>9} | {'páginas':>7} | {'registros':>9} | {'speedup':>7}")
+    baseline = None
+    for c in args.concurrency:
+        elapsed, n_pages, n_records = await run(c, args.latency, args.pages, args.page_size)
+        baseline = baseline or elapsed
+        print(f"{c:>12} | {elapsed:>9.2f} | {n_pages:>7} | {n_records:>9} | {baseline / elapsed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,19 @@
+import asyncio
+from sqlalchemy import text
+from infra.database import engine
+
+async def migrate():
+    """
+    Busca aproximada no Postgres (substitui o thefuzz em Python): extensão pg_trgm
+    e índice GIN trigram sobre busca_normalizada (título + órgão + cidade).
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_licitacao_busca_trgm ON licitacao USING gin (busca_normalizada gin_trgm_ops)"
+        ))
+        await conn.execute(text("ANALYZE licitacao"))
+        print("✅ GIN trigram index 'ix_licitacao_busca_trgm' ready")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,20 @@
+import asyncio
+from sqlalchemy import text
+from infra.database import engine
+
+async def migrate():
+    """
+    Paginação por cursor da listagem: índice composto na ordem da listagem
+    (score, data_publicacao, id — todos DESC), usado pelo ORDER BY e pela
+    comparação de linha do cursor (LicitacaoRepository.after_cursor).
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_licitacao_listagem "
+            "ON licitacao (score DESC, data_publicacao DESC, id DESC)"
+        ))
+        await conn.execute(text("ANALYZE licitacao"))
+        print("✅ Index 'ix_licitacao_listagem' ready")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
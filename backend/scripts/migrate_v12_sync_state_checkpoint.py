@@ -0,0 +1,17 @@
+import asyncio
+from sqlalchemy import text
+from infra.database import engine
+
+async def migrate():
+    """
+    sync_state.last_page passa a ser só o checkpoint de janela interrompida
+    (0 = janela concluída). Os watermarks gravados até aqui são todos de
+    combinações concluídas: zera para que a próxima execução releia o overlap
+    desde a página 1.
+    """
+    async with engine.begin() as conn:
+        result = await conn.execute(text("UPDATE sync_state SET last_page = 0 WHERE last_page <> 0"))
+        print(f"✅ sync_state: {result.rowcount} checkpoints zerados")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
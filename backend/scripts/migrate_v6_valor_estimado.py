@@ -0,0 +1,12 @@
+import asyncio
+from sqlalchemy import text
+from infra.database import engine
+
+async def migrate():
+    """Adiciona a coluna valor_estimado_total (preenchida pela ingestão e pelo feed de retificações)."""
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE licitacao ADD COLUMN IF NOT EXISTS valor_estimado_total FLOAT"))
+        print("✅ Column 'valor_estimado_total' ready")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
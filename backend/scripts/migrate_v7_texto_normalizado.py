@@ -0,0 +1,24 @@
+import argparse
+import asyncio
+from sqlalchemy import text
+from infra.database import engine, async_session_factory
+from infra.licitacao_repository import LicitacaoRepository
+
+async def migrate(batch_size: int):
+    """
+    Adiciona titulo_normalizado/busca_normalizada (texto sem acento e minúsculo,
+    usado pelo FilterEngine e pela busca) e preenche as linhas já existentes.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE licitacao ADD COLUMN IF NOT EXISTS titulo_normalizado VARCHAR NOT NULL DEFAULT ''"))
+        await conn.execute(text("ALTER TABLE licitacao ADD COLUMN IF NOT EXISTS busca_normalizada VARCHAR NOT NULL DEFAULT ''"))
+        print("✅ Columns 'titulo_normalizado' and 'busca_normalizada' ready")
+
+    async with async_session_factory() as session:
+        filled = await LicitacaoRepository.backfill_normalized(session, batch_size=batch_size)
+    print(f"✅ {filled} licitações normalizadas")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=2000)
+    asyncio.run(migrate(parser.parse_args().batch_size))
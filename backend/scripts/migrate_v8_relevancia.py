@@ -0,0 +1,18 @@
+import asyncio
+from sqlalchemy import text
+from infra.database import engine, init_db
+
+async def migrate():
+    """
+    Adiciona a coluna `relevance` (probabilidade do classificador treinado no
+    kanban). As tabelas status_event e relevance_model são criadas pelo init_db.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE licitacao ADD COLUMN IF NOT EXISTS relevance DOUBLE PRECISION"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_licitacao_relevance ON licitacao (relevance)"))
+        print("✅ Column 'relevance' ready")
+    await init_db()
+    print("✅ Tables 'status_event' and 'relevance_model' ready")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
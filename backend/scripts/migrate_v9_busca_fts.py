@@ -0,0 +1,22 @@
+import asyncio
+from sqlalchemy import text
+from infra.database import engine
+
+async def migrate():
+    """
+    Busca full-text: coluna gerada `busca_tsv` (to_tsvector('portuguese') sobre
+    busca_normalizada, já sem acento) e índice GIN. Rodar depois da v7 — a
+    coluna gerada é calculada para as linhas existentes na hora do ALTER.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "ALTER TABLE licitacao ADD COLUMN IF NOT EXISTS busca_tsv tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('portuguese', busca_normalizada)) STORED"
+        ))
+        print("✅ Column 'busca_tsv' ready")
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_licitacao_busca_tsv ON licitacao USING gin (busca_tsv)"))
+        await conn.execute(text("ANALYZE licitacao"))
+        print("✅ GIN index 'ix_licitacao_busca_tsv' ready")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
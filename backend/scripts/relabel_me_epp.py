@@ -0,0 +1,34 @@
+"""
+Reclassifica o ME/EPP de todas as licitações com o MeEppClassifier (fronteira
+de palavra). Rodar uma vez depois do deploy: a checagem antiga marcava como
+"parcial" quase todo título com "ME" dentro de outra palavra (MEDICAMENTOS,
+MATERIAL MÉDICO, IMPLEMENTOS). Ver RescoreService.relabel_me_epp.
+
+Uso (dentro de backend/):
+    python -m scripts.relabel_me_epp --dry-run    # só conta
+    python -m scripts.relabel_me_epp
+"""
+import argparse
+import asyncio
+
+
+async def run(args):
+    from infra.database import async_session_factory, engine
+    from services.rescore_service import RescoreService
+
+    async with async_session_factory() as session:
+        report = await RescoreService.relabel_me_epp(session, batch_size=args.batch_size, dry_run=args.dry_run)
+    await engine.dispose()
+    print(f"✅ {report.scanned} licitações lidas, {report.changed} com ME/EPP alterado"
+          f"{' (dry-run)' if args.dry_run else ''} em {report.elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, help="Licitações por lote (padrão: RESCORE_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="Não grava; só conta as mudanças")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
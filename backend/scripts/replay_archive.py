@@ -0,0 +1,57 @@
+"""
+Reprocessa o arquivo bruto (raw_payload) com o mapeamento, FilterEngine e score
+atuais e regrava as licitações cujo resultado mudou — sem nenhuma requisição
+aos upstreams. Ver services/replay_service.py.
+
+Uso (dentro de backend/):
+    python -m scripts.replay_archive                       # arquivo inteiro
+    python -m scripts.replay_archive --source pncp --since 2024-01-01 --workers 8
+    python -m scripts.replay_archive --dry-run             # só conta o que mudaria
+"""
+import argparse
+import asyncio
+from datetime import date
+
+
+async def run(args):
+    from infra.database import async_session_factory, engine
+    from services.filter_rule_service import FilterRuleService
+    from services.relevance_service import RelevanceService
+    from services.replay_service import ReplayService
+
+    # Regras de filtro e modelo de relevância do banco (o pool de processos recebe os mesmos)
+    await FilterRuleService.refresh(async_session_factory, force=True)
+    await RelevanceService.refresh(async_session_factory, force=True)
+    async with async_session_factory() as session:
+        report = await ReplayService.replay(
+            session,
+            sources=args.source,
+            since=args.since,
+            until=args.until,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            dry_run=args.dry_run,
+        )
+    await engine.dispose()
+
+    print()
+    print(f"{'payloads lidos':>22}: {report.scanned}  -> {report.rate:,.0f}/s")
+    print(f"{'reprocessados':>22}: {report.mapped} ({report.errors} erros)")
+    print(f"{'licitações alteradas':>22}: {report.changed}{' (dry-run)' if args.dry_run else ''}")
+    print(f"{'tempo total':>22}: {report.elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", action="append", choices=["pncp", "comprasnet", "transferegov"],
+                        help="Restringe a uma fonte (pode repetir)")
+    parser.add_argument("--since", type=date.fromisoformat, help="published_on inicial (AAAA-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="published_on final (AAAA-MM-DD)")
+    parser.add_argument("--batch-size", type=int, help="Payloads por lote (padrão: REPLAY_BATCH_SIZE)")
+    parser.add_argument("--workers", type=int, help="Processos (padrão: REPLAY_WORKERS ou nº de CPUs)")
+    parser.add_argument("--dry-run", action="store_true", help="Não grava; só conta as mudanças")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Stand-in local das APIs de governo (PNCP, ComprasNet, Transfere.gov).
+
+Serve, nos mesmos formatos das APIs reais:
+    /pncp/api/consulta/v1/contratacoes/{publicacao|proposta|atualizacao}
+    /pncp/pncp-api/v1/orgaos/{cnpj}/compras/{ano}/{seq}/itens
+    /pncp/pncp-api/v1/orgaos/{cnpj}/compras/{ano}/{seq}/arquivos
+    /comprasnet/licitacoes/v1/licitacoes.json
+    /transferegov/maisbrasil-api/v1/services/public/processo-compra
+    /_stats  (GET: contadores, DELETE: zera)
+
+Modos:
+    synthetic  dados paginados gerados deterministicamente (padrão)
+    record     repassa para a API real e grava cada resposta em --fixtures
+    replay     responde só com o que foi gravado (404 se não houver fixture)
+
+Latência, taxa de erro e quantidade de páginas são configuráveis, para medir a
+ingestão (scripts/bench_ingestion.py) e testar regressões sem tocar no governo.
+Para apontar o backend para cá:
+    PNCP_CONSULTA_URL=http://127.0.0.1:8765/pncp/api/consulta/v1
+    PNCP_API_URL=http://127.0.0.1:8765/pncp/pncp-api/v1
+    COMPRASNET_URL=http://127.0.0.1:8765/comprasnet/licitacoes/v1/licitacoes.json
+    TRANSFEREGOV_URL=http://127.0.0.1:8765/transferegov/maisbrasil-api/v1/services/public
+
+Uso (dentro de backend/):
+    python -m scripts.standin_server --latency 0.05 --error-rate 0.02 --pages 5
+    python -m scripts.standin_server --mode record --fixtures fixtures/pncp
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+# Prefixo local -> URL base real (modo record)
+UPSTREAM_BASES = {
+    "pncp": "https://pncp.gov.br",
+    "comprasnet": "https://compras.dados.gov.br",
+    "transferegov": "https://pro-siconv.estaleiro.serpro.gov.br",
+}
+
+OBJETOS = [
+    "Aquisição de medicamentos para a rede municipal de saúde",
+    "Registro de preços para aquisição de material médico-hospitalar",
+    "Aquisição de insumos hospitalares - cota reservada ME/EPP",
+    "Contratação de empresa para fornecimento de soro fisiológico",
+    "Contratação de serviços de limpeza e conservação predial",
+    "Aquisição de gêneros alimentícios para merenda escolar",
+    "Pregão eletrônico exclusivo ME/EPP para aquisição de luvas de procedimento",
+    "Locação de veículos para a secretaria de obras",
+]
+
+
+@dataclass
+class StandinConfig:
+    mode: str = "synthetic"
+    latency: float = 0.0            # segundos por requisição
+    jitter: float = 0.0             # +- aleatório sobre a latência
+    error_rate: float = 0.0         # fração das requisições que responde `error_status`
+    error_status: int = 503
+    pages: int = 3                  # páginas por combinação UF/modalidade (PNCP)
+    page_size: int = 50
+    item_pages: int = 1             # páginas de /itens por licitação
+    ufs: List[str] = field(default_factory=lambda: ["MA", "PI", "PA"])
+    seed: int = 0                   # muda os IDs gerados (runs "frios" sem truncar o banco)
+    fixtures: Optional[Path] = None
+
+
+@dataclass
+class Stats:
+    requests: int = 0
+    errors: int = 0
+    records: int = 0
+    by_route: Dict[str, int] = field(default_factory=dict)
+
+
+def fixture_key(path: str, query: str) -> str:
+    params = "&".join(sorted(query.split("&"))) if query else ""
+    return hashlib.sha1(f"{path}?{params}".encode()).hexdigest()
+
+
+def _count_records(body) -> int:
+    if isinstance(body, list):
+        return len(body)
+    if isinstance(body, dict):
+        for key in ("data", "itens"):
+            if isinstance(body.get(key), list):
+                return len(body[key])
+        embedded = body.get("_embedded", {})
+        if isinstance(embedded.get("licitacoes"), list):
+            return len(embedded["licitacoes"])
+    return 0
+
+
+# ─── Geradores sintéticos ─────────────────────────────────────────────────────
+
+def _cnpj(*parts) -> str:
+    return f"{zlib.crc32('-'.join(map(str, parts)).encode()):014d}"
+
+
+def pncp_contratacoes(cfg: StandinConfig, feed: str, params) -> dict:
+    uf = params.get("uf", "MA")
+    mod = int(params.get("codigoModalidadeContratacao", 6))
+    page = int(params.get("pagina", 1))
+    page_size = min(int(params.get("tamanhoPagina", cfg.page_size)), cfg.page_size)
+    if uf not in cfg.ufs or page > cfg.pages:
+        return {"data": [], "totalPaginas": cfg.pages if uf in cfg.ufs else 0}
+
+    end = datetime.strptime(params.get("dataFinal", datetime.now().strftime("%Y%m%d")), "%Y%m%d")
+    start_str = params.get("dataInicial")
+    start = datetime.strptime(start_str, "%Y%m%d") if start_str else end - timedelta(days=3)
+    span = max((end - start).total_seconds(), 1)
+
+    cnpj = _cnpj(cfg.seed, uf, mod)
+    data = []
+    for i in range(page_size):
+        seq = (page - 1) * page_size + i + 1
+        published = start + timedelta(seconds=span * seq / (cfg.pages * page_size + 1))
+        abertura = published + timedelta(days=10)
+        data.append({
+            "orgaoEntidade": {"cnpj": cnpj, "razaoSocial": f"Prefeitura Stand-in {uf}-{mod}"},
+            "unidadeOrgao": {"ufSigla": uf, "municipioNome": f"Município {seq % 17}"},
+            "anoCompra": end.year,
+            "sequencialCompra": seq,
+            "numeroCompra": str(seq),
+            "objetoCompra": OBJETOS[seq % len(OBJETOS)],
+            "codigoModalidadeContratacao": mod,
+            "modoDisputaId": 1 + seq % 4,
+            "srp": seq % 3 == 0,
+            "valorTotalEstimado": round(1000 + seq * 137.5, 2),
+            "dataPublicacaoPncp": published.isoformat(timespec="seconds"),
+            "dataAtualizacao": (published + timedelta(hours=1)).isoformat(timespec="seconds")
+            if feed == "atualizacao" else None,
+            "dataAberturaProposta": abertura.isoformat(timespec="seconds"),
+            "dataEncerramentoProposta": (abertura + timedelta(days=5)).isoformat(timespec="seconds"),
+        })
+    return {"data": data, "totalPaginas": cfg.pages, "totalRegistros": cfg.pages * page_size}
+
+
+def pncp_itens(cfg: StandinConfig, cnpj: str, ano: str, seq: str, params) -> dict:
+    page = int(params.get("pagina", 1))
+    page_size = int(params.get("tamanhoPagina", 50))
+    if page > cfg.item_pages:
+        return {"data": []}
+    return {"data": [
+        {
+            "numeroItem": (page - 1) * page_size + i + 1,
+            "descricao": f"Item {i + 1} da compra {ano}/{seq}",
+            "quantidade": 10 + i,
+            "valorUnitarioEstimado": round(5 + i * 1.25, 2),
+            "unidadeMedida": "UN",
+            "codigoItem": f"{seq}{i:03d}",
+        }
+        for i in range(min(page_size, 10))
+    ]}
+
+
+def pncp_arquivos(cfg: StandinConfig, cnpj: str, ano: str, seq: str) -> list:
+    return [
+        {
+            "sequencial": v,
+            "titulo": f"Edital v{v}",
+            "url": f"/pncp/pncp-api/v1/orgaos/{cnpj}/compras/{ano}/{seq}/arquivos/{v}",
+            "dataPublicacao": (datetime(int(ano), 1, 1) + timedelta(days=v)).isoformat(),
+        }
+        for v in (1, 2)
+    ]
+
+
+def comprasnet_licitacoes(cfg: StandinConfig, params) -> dict:
+    uf = params.get("uf", "MA")
+    offset = int(params.get("offset", 0))
+    total = cfg.pages * cfg.page_size if uf in cfg.ufs else 0
+    since = params.get("data_publicacao_min") or datetime.now().strftime("%Y-%m-%d")
+    licitacoes = []
+    for n in range(offset, min(offset + cfg.page_size * cfg.pages, total)):
+        uasg = 150000 + zlib.crc32(f"{cfg.seed}-{uf}".encode()) % 1000
+        licitacoes.append({
+            "uasg": uasg,
+            "uasg_nome": f"UASG Stand-in {uf}",
+            "modalidade": 5,
+            "numero_licitacao": n + 1,
+            "objeto": OBJETOS[n % len(OBJETOS)],
+            "data_publicacao": f"{since}T09:00:00",
+            "data_entrega_proposta": f"{since}T09:00:00",
+        })
+    return {"_embedded": {"licitacoes": licitacoes}, "count": total}
+
+
+def transferegov_processos(cfg: StandinConfig, params) -> dict:
+    ano = params.get("ano", datetime.now().year)
+    return {"itens": [
+        {
+            "id": f"{cfg.seed}-{ano}-{n}",
+            "objeto": OBJETOS[n % len(OBJETOS)],
+            "nomeOrgao": "Fundo Municipal de Saúde Stand-in",
+            "cnpjOrgao": _cnpj(cfg.seed, "transferegov"),
+            "dataPublicacao": datetime.now().isoformat(timespec="seconds"),
+            "uf": cfg.ufs[n % len(cfg.ufs)],
+            "municipio": f"Município {n % 17}",
+            "modalidade": "Pregão",
+            "valorProcesso": 10000.0 + n,
+        }
+        for n in range(cfg.page_size)
+    ]}
+
+
+# ─── App ──────────────────────────────────────────────────────────────────────
+
+def create_app(cfg: StandinConfig) -> FastAPI:
+    stats = Stats()
+    rng = random.Random(cfg.seed)
+    upstream = httpx.AsyncClient(timeout=60.0, follow_redirects=True) if cfg.mode == "record" else None
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        if upstream:
+            await upstream.aclose()
+
+    app = FastAPI(title="BH-Licit upstream stand-in", lifespan=lifespan)
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        if request.url.path.startswith("/_"):
+            return await call_next(request)
+
+        stats.requests += 1
+        route = request.url.path.split("/")[1]
+        stats.by_route[route] = stats.by_route.get(route, 0) + 1
+
+        if cfg.latency or cfg.jitter:
+            await asyncio.sleep(max(0.0, cfg.latency + rng.uniform(-cfg.jitter, cfg.jitter)))
+        if cfg.error_rate and rng.random() < cfg.error_rate:
+            stats.errors += 1
+            return Response(status_code=cfg.error_status, headers={"Retry-After": "0"})
+
+        if cfg.mode != "synthetic":
+            return await replay_or_record(request)
+        return await call_next(request)
+
+    async def replay_or_record(request: Request) -> Response:
+        prefix, _, rest = request.url.path.lstrip("/").partition("/")
+        if prefix not in UPSTREAM_BASES:
+            return JSONResponse({"detail": f"prefixo desconhecido: {prefix}"}, status_code=404)
+        path = cfg.fixtures / prefix / f"{fixture_key(request.url.path, request.url.query)}.json"
+
+        if cfg.mode == "replay":
+            if not path.exists():
+                return JSONResponse({"detail": "fixture não gravada", "path": request.url.path}, status_code=404)
+            fixture = json.loads(path.read_text())
+        else:
+            real = await upstream.get(f"{UPSTREAM_BASES[prefix]}/{rest}", params=request.query_params)
+            body = real.json() if real.content and "json" in real.headers.get("content-type", "") else None
+            fixture = {"status": real.status_code, "body": body}
+            if real.status_code in (200, 204, 404):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(json.dumps(fixture, ensure_ascii=False))
+
+        stats.records += _count_records(fixture["body"])
+        if fixture["body"] is None:
+            return Response(status_code=fixture["status"])
+        return JSONResponse(fixture["body"], status_code=fixture["status"])
+
+    def served(body):
+        stats.records += _count_records(body)
+        return body
+
+    @app.get("/pncp/api/consulta/v1/contratacoes/{feed}")
+    async def contratacoes(feed: str, request: Request):
+        return served(pncp_contratacoes(cfg, feed, request.query_params))
+
+    @app.get("/pncp/pncp-api/v1/orgaos/{cnpj}/compras/{ano}/{seq}/itens")
+    async def itens(cnpj: str, ano: str, seq: str, request: Request):
+        return served(pncp_itens(cfg, cnpj, ano, seq, request.query_params))
+
+    @app.get("/pncp/pncp-api/v1/orgaos/{cnpj}/compras/{ano}/{seq}/arquivos")
+    async def arquivos(cnpj: str, ano: str, seq: str):
+        return served(pncp_arquivos(cfg, cnpj, ano, seq))
+
+    @app.get("/comprasnet/licitacoes/v1/licitacoes.json")
+    async def comprasnet(request: Request):
+        return served(comprasnet_licitacoes(cfg, request.query_params))
+
+    @app.get("/transferegov/maisbrasil-api/v1/services/public/processo-compra")
+    async def transferegov(request: Request):
+        return served(transferegov_processos(cfg, request.query_params))
+
+    @app.get("/_stats")
+    async def get_stats():
+        return {"requests": stats.requests, "errors": stats.errors, "records": stats.records, "by_route": stats.by_route}
+
+    @app.delete("/_stats")
+    async def reset_stats():
+        stats.__init__()
+        return {"ok": True}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default="synthetic")
+    parser.add_argument("--fixtures", type=Path, default=Path("fixtures/standin"))
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência por requisição (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--item-pages", type=int, default=1)
+    parser.add_argument("--ufs", nargs="+", default=["MA", "PI", "PA"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    cfg = StandinConfig(
+        mode=args.mode, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, pages=args.pages, page_size=args.page_size,
+        item_pages=args.item_pages, ufs=args.ufs, seed=args.seed, fixtures=args.fixtures,
+    )
+    uvicorn.run(create_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
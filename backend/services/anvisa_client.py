@@ -37,8 +37,9 @@ class AnvisaClient:
     API_BASE = "https://api-gateway.prd.apps.anvisa.gov.br"
     TOKEN_URL = f"{API_BASE}/oauth/token"
 
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=120.0, follow_redirects=True)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=120.0, follow_redirects=True)
         self.access_token: Optional[str] = None
         
         # Credenciais OAuth (do .env)
@@ -46,7 +47,8 @@ class AnvisaClient:
         self.client_secret = os.getenv("ANVISA_CLIENT_SECRET", "")
 
     async def close(self):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
     # ─── OAuth2 Authentication ────────────────────────────────────────────────
 
@@ -0,0 +1,195 @@
+"""
+Backfill histórico do PNCP — carga de meses/anos de publicações para análise de preços.
+
+O intervalo é fatiado em janelas de `BACKFILL_WINDOW_DAYS` por UF/modalidade
+(tabela backfill_window). Cada janela vira um job arq na fila de backfill
+(`BACKFILL_QUEUE`), processado por quantos workers houver. A página concluída
+é gravada como checkpoint na mesma transação das licitações, então um job
+interrompido (crash, timeout, tempestade de 429) retoma da página seguinte.
+As requisições usam o upstream "pncp_backfill", com orçamento de rate limit
+próprio, para nunca disputar o do sync ao vivo.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import BackfillWindow
+from infra.config import settings
+from services.pncp_client import PNCPClient
+
+logger = logging.getLogger("Backfill")
+
+# Linhas por INSERT (5 colunas x 1000 fica bem abaixo do limite de parâmetros do asyncpg)
+PLAN_CHUNK_SIZE = 1000
+
+
+class BackfillPageError(Exception):
+    """Uma página não pôde ser baixada mesmo após os retries do transporte."""
+
+
+class BackfillService:
+    @staticmethod
+    def split_windows(start: date, end: date, window_days: int) -> List[Tuple[str, str]]:
+        """Fatia [start, end] em janelas consecutivas de até `window_days` dias (yyyymmdd)."""
+        windows = []
+        cursor = start
+        while cursor <= end:
+            window_end = min(cursor + timedelta(days=window_days - 1), end)
+            windows.append((cursor.strftime("%Y%m%d"), window_end.strftime("%Y%m%d")))
+            cursor = window_end + timedelta(days=1)
+        return windows
+
+    @staticmethod
+    async def plan(
+        session: AsyncSession,
+        start: date,
+        end: date,
+        window_days: Optional[int] = None,
+        states: Optional[List[str]] = None,
+        modalities: Optional[List[str]] = None,
+    ) -> Tuple[str, List[int]]:
+        """
+        Cria as janelas do backfill e retorna (backfill_id, ids das janelas a processar).
+        Idempotente: janelas já existentes e ainda não concluídas passam para o novo
+        backfill_id (e mantêm o checkpoint); as concluídas são ignoradas.
+        """
+        window_days = window_days or settings.BACKFILL_WINDOW_DAYS
+        states = states or settings.TARGET_UFS
+        modalities = modalities or PNCPClient.MODALITIES
+        backfill_id = f"bf-{start:%Y%m%d}-{end:%Y%m%d}-{uuid.uuid4().hex[:6]}"
+
+        rows = [
+            {"backfill_id": backfill_id, "uf": uf, "modalidade": mod, "window_start": ws, "window_end": we}
+            for ws, we in BackfillService.split_windows(start, end, window_days)
+            for uf in states
+            for mod in modalities
+        ]
+        ids: List[int] = []
+        for i in range(0, len(rows), PLAN_CHUNK_SIZE):
+            stmt = pg_insert(BackfillWindow).values(rows[i:i + PLAN_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["uf", "modalidade", "window_start", "window_end"],
+                set_={"backfill_id": stmt.excluded.backfill_id, "updated_at": datetime.utcnow()},
+                where=BackfillWindow.status != "done",
+            ).returning(BackfillWindow.id)
+            result = await session.execute(stmt)
+            ids.extend(row[0] for row in result.all())
+        await session.commit()
+        return backfill_id, ids
+
+    @staticmethod
+    async def run_window(session: AsyncSession, client: PNCPClient, window_id: int) -> Optional[BackfillWindow]:
+        """
+        Processa uma janela a partir do checkpoint. Baixa até `client.concurrency`
+        páginas por vez e grava em ordem, um commit (licitações + checkpoint) por página.
+        Levanta BackfillPageError se uma página falhar (download ou gravação) — a
+        janela fica "failed" e o checkpoint na página anterior.
+        """
+        window = await session.get(BackfillWindow, window_id)
+        if window is None or window.status == "done":
+            return window
+
+        window.status = "running"
+        window.attempts += 1
+        window.error = None
+        window.updated_at = datetime.utcnow()
+        session.add(window)
+        await session.commit()
+
+        label = f"{window.uf}-{window.modalidade} {window.window_start}"
+        semaphore = asyncio.Semaphore(client.concurrency)
+        page = window.last_page + 1
+        try:
+            while window.total_pages is None or page <= window.total_pages:
+                # Sem totalPaginas ainda, busca só a próxima página para descobrir
+                last = page if window.total_pages is None else min(page + client.concurrency - 1, window.total_pages)
+                pages = range(page, last + 1)
+                results = await asyncio.gather(*(
+                    client.fetch_publicacao_page(
+                        window.uf, window.modalidade, window.window_start, window.window_end, p, semaphore
+                    )
+                    for p in pages
+                ))
+
+                for p, data in zip(pages, results):
+                    if data is None:
+                        window.status = "failed"
+                        window.error = f"Falha ao baixar a página {p}"
+                        window.updated_at = datetime.utcnow()
+                        session.add(window)
+                        await session.commit()
+                        raise BackfillPageError(f"{label}: página {p}")
+
+                    if window.total_pages is None:
+                        window.total_pages = data.get("totalPaginas") or 0
+                    items = data.get("data") or []
+                    if items:
+                        window.new_items += await client.persist_page(session, window.uf, items)
+                    window.last_page = p
+                    window.updated_at = datetime.utcnow()
+                    session.add(window)
+                    await session.commit()
+                page = last + 1
+        except BackfillPageError:
+            raise
+        except (Exception, asyncio.CancelledError) as e:
+            # Erro ao gravar, payload inesperado ou timeout do job: a janela não pode
+            # ficar "running". O rollback expira `window`, então o status vai por UPDATE.
+            await session.rollback()
+            await session.execute(
+                update(BackfillWindow)
+                .where(BackfillWindow.id == window_id)
+                .values(status="failed", error=f"{type(e).__name__}: {e}"[:1000], updated_at=datetime.utcnow())
+            )
+            await session.commit()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            # Mesmo caminho de retry da falha de download: retoma do checkpoint
+            raise BackfillPageError(f"{label}: {e}") from e
+
+        window.status = "done"
+        window.updated_at = datetime.utcnow()
+        session.add(window)
+        await session.commit()
+        logger.info(
+            f"Backfill {window.uf}-{window.modalidade} {window.window_start}..{window.window_end}: "
+            f"{window.last_page} páginas, {window.new_items} novas."
+        )
+        return window
+
+    @staticmethod
+    async def progress(session: AsyncSession, backfill_id: str) -> Dict[str, object]:
+        """Resumo de um backfill: janelas por status, páginas e licitações novas."""
+        result = await session.exec(
+            select(
+                BackfillWindow.status,
+                func.count(),
+                func.coalesce(func.sum(BackfillWindow.last_page), 0),
+                func.coalesce(func.sum(BackfillWindow.total_pages), 0),
+                func.coalesce(func.sum(BackfillWindow.new_items), 0),
+            )
+            .where(BackfillWindow.backfill_id == backfill_id)
+            .group_by(BackfillWindow.status)
+        )
+        windows: Dict[str, int] = {}
+        pages_done = pages_known = new_items = 0
+        for status, count, done, known, new in result.all():
+            windows[status] = count
+            pages_done += done
+            pages_known += known
+            new_items += new
+        return {
+            "backfill_id": backfill_id,
+            "windows": windows,
+            "total_windows": sum(windows.values()),
+            "pages_done": pages_done,
+            "pages_known": pages_known,
+            "new_items": new_items,
+        }
@@ -1,11 +1,13 @@
+import asyncio
 import httpx
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from domain.models import Licitacao, MODALIDADE_MAP
-from services.filter_engine import FilterEngine
+from domain.enums import MODALIDADE_MAP
+from infra.config import settings
+from services.ingestion_pipeline import IngestionPipeline, Page, SourceAdapter, map_item
+from services.sync_tracker import timed, track
 
 logger = logging.getLogger("uvicorn")
 
@@ -13,123 +15,135 @@ class ComprasNetClient:
     """
     Client for ComprasNet (Compras.gov.br) via Dados Abertos API.
     """
-    BASE_URL = "https://compras.dados.gov.br/licitacoes/v1/licitacoes.json"
+    BASE_URL = settings.COMPRASNET_URL
     
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, states: Optional[List[str]] = None):
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=30.0)
+        self.states = [uf.upper() for uf in (states or settings.TARGET_UFS)]
 
-    async def fetch_and_process(self, session: AsyncSession, days: int = 7):
-        states = ["MA", "PI", "PA"]
-        count_new = 0
+    @staticmethod
+    def build_internal_id(item: dict) -> str:
+        """
+        ComprasNet has no PNCP ID, so we key on uasg + modalidade + numero.
+        ComprasNet often migrates to PNCP, so we check for overlap.
+        """
+        return f"comprasnet-{item.get('uasg')}-{item.get('modalidade')}-{item.get('numero_licitacao')}"
+
+    @staticmethod
+    def normalize_item(item: dict, uf: str) -> dict:
+        """
+        Campos da Licitacao a partir de um registro do ComprasNet, sem classificação
+        (status, score e ME/EPP ficam com o IngestionPipeline).
+        """
+        uasg = item.get("uasg")
+        modalidade_cod = item.get("modalidade")
+        numero = item.get("numero_licitacao")
+            
+        titulo = item.get("objeto", "Sem objeto")
+        
+        # Map modality
+        modalidade_texto = MODALIDADE_MAP.get(modalidade_cod, f"Mod {modalidade_cod}")
         
+        # Dates
+        pub_str = item.get("data_publicacao")
+        abertura_str = item.get("data_entrega_proposta") # For ComprasNet, this is often the deadline
+        
+        data_publicacao = datetime.fromisoformat(pub_str.replace("Z", "+00:00")) if pub_str else datetime.utcnow()
+        data_abertura = datetime.fromisoformat(abertura_str.replace("Z", "+00:00")) if abertura_str else None
+
+        return dict(
+            pncp_id=ComprasNetClient.build_internal_id(item),
+            numero=f"{numero}/{uasg}",
+            titulo=titulo,
+            orgao_nome=item.get("uasg_nome", f"UASG {uasg}"),
+            estado_sigla=uf,
+            data_publicacao=data_publicacao,
+            data_abertura_proposta=data_abertura,
+            modalidade=modalidade_texto,
+            modalidade_codigo=modalidade_cod,
+            link_edital=f"https://www.comprasnet.gov.br/consultaLicitacoes/download/download.asp?uasg={uasg}&modprp={modalidade_cod}&numprp={numero}",
+            me_epp_status=None,
+        )
+
+    @staticmethod
+    def map_item(item: dict, uf: str) -> Optional[dict]:
+        """
+        normalize + classify de um registro, sem I/O (usado pelo replay do arquivo
+        bruto). None se a UF não é monitorada.
+        """
+        return map_item(ComprasNetAdapter(None), item, Page(items=[], uf=uf))
+
+    async def _fetch_uf(self, uf: str, start_str: str) -> Optional[List[Dict[str, Any]]]:
+        """Busca a primeira página (até ~500 itens) de uma UF. None em caso de falha."""
+        # API uses offset-based pagination. For simplicity, we fetch first page (500 items usually)
+        # Filter by publication date and state
+        params = {
+            "data_publicacao_min": start_str,
+            "uf": uf
+        }
+
+        logger.info(f"Fetching ComprasNet for {uf} since {start_str}...")
+        try:
+            with timed("fetch"):
+                response = await self.client.get(self.BASE_URL, params=params)
+        except httpx.HTTPError as e:
+            logger.error(f"ComprasNet request failed for {uf}: {e}")
+            track("fetch", error=f"{type(e).__name__} em {uf}: {e}")
+            return None
+
+        if response.status_code != 200:
+            logger.error(f"ComprasNet API Error {response.status_code} for {uf}")
+            track("fetch", error=f"HTTP {response.status_code} em {uf}")
+            return None
+
+        data = response.json()
+        # ComprasNet structure: _embedded -> licitacoes
+        embedded = data.get("_embedded", {})
+        items = embedded.get("licitacoes", [])
+        track("fetch", pages=1, bytes=len(response.content), records_seen=len(items))
+        return items
+
+    async def fetch_and_process(self, session: AsyncSession, days: int = 7):
         # Data Window
         start_date = datetime.now() - timedelta(days=days)
         start_str = start_date.strftime("%Y-%m-%d")
-        
-        for uf in states:
-            try:
-                # API uses offset-based pagination. For simplicity, we fetch first page (500 items usually)
-                # Filter by publication date and state
-                params = {
-                    "data_publicacao_min": start_str,
-                    "uf": uf
-                }
-                
-                logger.info(f"Fetching ComprasNet for {uf} since {start_str}...")
-                response = await self.client.get(self.BASE_URL, params=params)
-                
-                if response.status_code != 200:
-                    logger.error(f"ComprasNet API Error {response.status_code} for {uf}")
-                    continue
-                    
-                data = response.json()
-                # ComprasNet structure: _embedded -> licitacoes
-                embedded = data.get("_embedded", {})
-                items = embedded.get("licitacoes", [])
-                
-                for item in items:
-                    # PNCP ID format: {cnpj_orgao}{numero_licitacao} (or similar unique key)
-                    # For ComprasNet, we can use uasg + modalidade + numero
-                    uasg = item.get("uasg")
-                    modalidade_cod = item.get("modalidade")
-                    numero = item.get("numero_licitacao")
-                    
-                    # Create a unique internal ID to avoid duplicates
-                    # ComprasNet often migrates to PNCP, so we check for overlap
-                    internal_id = f"comprasnet-{uasg}-{modalidade_cod}-{numero}"
-                    
-                    existing = await session.exec(select(Licitacao).where(Licitacao.pncp_id == internal_id))
-                    if existing.first():
-                        continue
-                        
-                    titulo = item.get("objeto", "Sem objeto")
-                    
-                    # 1. Geographic Check (Already filtered by API, but keep for safety)
-                    if not FilterEngine.check_geographic(uf):
-                        continue
-                        
-                    # 2. Semantic Filter
-                    if not FilterEngine.check_semantic(titulo):
-                        status = "rejeitado"
-                        reason = "Blacklist/Not Whitelisted"
-                    else:
-                        status = "recebido"
-                        reason = None
-                        
-                    # 3. Gatekeeper (ME/EPP)
-                    allowed, gate_reason = FilterEngine.check_gatekeeper(titulo)
-                    if not allowed:
-                        status = "rejeitado"
-                        reason = gate_reason
-                        
-                    # 4. Priority
-                    priority, score = FilterEngine.calculate_priority(titulo)
-                    
-                    # Map modality
-                    modalidade_texto = MODALIDADE_MAP.get(modalidade_cod, f"Mod {modalidade_cod}")
-                    
-                    # Dates
-                    pub_str = item.get("data_publicacao")
-                    abertura_str = item.get("data_entrega_proposta") # For ComprasNet, this is often the deadline
-                    
-                    data_publicacao = datetime.fromisoformat(pub_str.replace("Z", "+00:00")) if pub_str else datetime.utcnow()
-                    data_abertura = datetime.fromisoformat(abertura_str.replace("Z", "+00:00")) if abertura_str else None
-
-                    # ME/EPP Status
-                    titulo_upper = titulo.upper()
-                    me_epp_status = "nao"
-                    if "EXCLUSIVO" in titulo_upper and ("ME" in titulo_upper or "EPP" in titulo_upper):
-                        me_epp_status = "exclusivo"
-                    elif ("COTA" in titulo_upper or "PARCIAL" in titulo_upper or "ITENS" in titulo_upper) and ("ME" in titulo_upper or "EPP" in titulo_upper):
-                        me_epp_status = "parcial"
-
-                    new_lic = Licitacao(
-                        pncp_id=internal_id,
-                        numero=f"{numero}/{uasg}",
-                        titulo=titulo,
-                        orgao_nome=item.get("uasg_nome", f"UASG {uasg}"),
-                        estado_sigla=uf,
-                        data_publicacao=data_publicacao,
-                        data_abertura_proposta=data_abertura,
-                        modalidade=modalidade_texto,
-                        modalidade_codigo=modalidade_cod,
-                        link_edital=f"https://www.comprasnet.gov.br/consultaLicitacoes/download/download.asp?uasg={uasg}&modprp={modalidade_cod}&numprp={numero}",
-                        status=status,
-                        rejection_reason=reason,
-                        priority=priority,
-                        score=score,
-                        me_epp_status=me_epp_status
-                    )
-                    
-                    session.add(new_lic)
-                    count_new += 1
-                
-                await session.commit()
-                
-            except Exception as e:
-                logger.error(f"ComprasNet sync error for {uf}: {e}")
-                
-        return count_new
+
+        new, _ = await IngestionPipeline.run(session, ComprasNetAdapter(self, start_str))
+        return new
 
     async def close(self):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
+
+
+class ComprasNetAdapter(SourceAdapter):
+    """ComprasNet como fonte do IngestionPipeline: uma página por UF."""
+    name = "comprasnet"
+    archive_source = "comprasnet"
+
+    def __init__(self, client: Optional[ComprasNetClient], start_str: str = ""):
+        self.client = client
+        self.start_str = start_str
+
+    async def pages(self) -> AsyncIterator[Page]:
+        # Uma requisição por UF, todas em voo ao mesmo tempo (o rate limit do upstream
+        # é aplicado no transporte); as páginas seguem para o pipeline na ordem das UFs.
+        tasks = [asyncio.create_task(self.client._fetch_uf(uf, self.start_str)) for uf in self.client.states]
+        try:
+            for uf, task in zip(self.client.states, tasks):
+                items = await task
+                if items is not None:
+                    yield Page(items=items, uf=uf)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def normalize(self, item: dict, page: Page) -> Optional[dict]:
+        return ComprasNetClient.normalize_item(item, page.uf)
+
+    def natural_id(self, item: dict) -> str:
+        return ComprasNetClient.build_internal_id(item)
+
+    def published(self, item: dict) -> Optional[str]:
+        return item.get("data_publicacao")
@@ -0,0 +1,227 @@
+"""
+Dead-letter da ingestão — páginas do PNCP que falharam mesmo após os retries do
+transporte (HTTP != 200, timeout, ou erro ao gravar a página).
+
+O `_crawl` do PNCPClient registra cada unidade que falhou — (endpoint, UF,
+modalidade, janela, página) — na tabela dead_letter. O job `task_retry_dead_letters`
+re-busca só essas unidades, com backoff exponencial por unidade, até
+DEAD_LETTER_MAX_ATTEMPTS; assim os dados ficam completos sem rodar o sync inteiro.
+Se a falha foi na primeira página de uma combinação, as seguintes nem chegaram a
+ser pedidas: a re-busca lê o `totalPaginas` e registra o restante.
+Uma varredura completa posterior da mesma combinação resolve as pendências cobertas
+pela sua janela (ver `supersede`).
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import DeadLetter
+from infra.config import settings
+from infra.resilience import backoff_delay
+
+if TYPE_CHECKING:
+    from services.pncp_client import ComboResult, PNCPClient
+
+logger = logging.getLogger("DeadLetter")
+
+UNIQUE_COLUMNS = ["endpoint", "uf", "modalidade", "data_inicial", "data_final", "page"]
+
+
+class RetryUnit(NamedTuple):
+    """Cópia em valores de um DeadLetter: o rollback de uma página expira os objetos da sessão."""
+    id: int
+    attempts: int
+    endpoint: str
+    uf: str
+    modalidade: str
+    page: int
+    data_inicial: str
+    data_final: str
+    discover_pages: bool
+
+
+class DeadLetterService:
+    @staticmethod
+    async def record(
+        session: AsyncSession,
+        endpoint: str,
+        uf: str,
+        modalidade: str,
+        data_inicial: str,
+        data_final: str,
+        pages: Dict[int, str],
+        discover_page: Optional[int] = None,
+    ) -> int:
+        """
+        Registra (ou reativa) as páginas que falharam, {página: erro}. Não faz commit.
+        `discover_page` marca a página cuja re-busca deve descobrir as seguintes.
+        """
+        if not pages:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            {
+                "source": "pncp", "endpoint": endpoint, "uf": uf, "modalidade": modalidade,
+                "data_inicial": data_inicial, "data_final": data_final, "page": page,
+                "discover_pages": page == discover_page, "error": (error or "")[:1000],
+                "status": "pending", "next_attempt_at": now, "created_at": now, "updated_at": now,
+            }
+            for page, error in sorted(pages.items())
+        ]
+        stmt = pg_insert(DeadLetter).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=UNIQUE_COLUMNS,
+            set_={
+                "status": "pending",
+                "error": stmt.excluded.error,
+                "discover_pages": DeadLetter.discover_pages | stmt.excluded.discover_pages,
+                "updated_at": now,
+            },
+        )
+        await session.execute(stmt)
+        return len(rows)
+
+    @staticmethod
+    async def record_combo(session: AsyncSession, endpoint: str, combo: "ComboResult", failures: Dict[int, str]) -> int:
+        """Registra as falhas de uma combinação do `_crawl`. Não faz commit."""
+        # Sem nenhuma página baixada, a falha foi na primeira e o totalPaginas é desconhecido
+        discover_page = min(combo.failed_pages) if combo.failed_pages and not combo.pages else None
+        return await DeadLetterService.record(
+            session, endpoint, combo.uf, combo.modalidade, combo.window_start, combo.window_end,
+            failures, discover_page=discover_page,
+        )
+
+    @staticmethod
+    async def supersede(session: AsyncSession, endpoint: str, combo: "ComboResult") -> int:
+        """
+        Resolve as pendências da combinação cobertas pela janela de uma varredura
+        que acabou de terminar sem falhas. Não faz commit.
+        """
+        result = await session.execute(
+            update(DeadLetter)
+            .where(
+                DeadLetter.endpoint == endpoint,
+                DeadLetter.uf == combo.uf,
+                DeadLetter.modalidade == combo.modalidade,
+                DeadLetter.status == "pending",
+                DeadLetter.data_inicial >= combo.window_start,
+                DeadLetter.data_final <= combo.window_end,
+            )
+            .values(status="resolved", error="Coberto por uma varredura completa", updated_at=datetime.utcnow())
+        )
+        return result.rowcount or 0
+
+    @staticmethod
+    def next_attempt(attempts: int, now: Optional[datetime] = None) -> datetime:
+        delay = backoff_delay(
+            attempts, settings.DEAD_LETTER_BACKOFF_BASE, settings.DEAD_LETTER_BACKOFF_MAX,
+        )
+        # Full jitter pode sortear ~0; garante ao menos metade da base entre tentativas
+        delay = max(delay, settings.DEAD_LETTER_BACKOFF_BASE / 2)
+        return (now or datetime.utcnow()) + timedelta(seconds=delay)
+
+    @staticmethod
+    async def retry_due(session: AsyncSession, client: "PNCPClient", limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        Re-busca as unidades pendentes cujo backoff já venceu. As páginas são
+        baixadas em paralelo (até `client.concurrency`) e gravadas em ordem, um
+        commit por unidade. Retorna contadores do lote.
+        """
+        limit = limit or settings.DEAD_LETTER_BATCH_SIZE
+        now = datetime.utcnow()
+        result = await session.exec(
+            select(DeadLetter)
+            .where(DeadLetter.status == "pending", DeadLetter.next_attempt_at <= now)
+            .order_by(DeadLetter.next_attempt_at, DeadLetter.id)
+            .limit(limit)
+        )
+        units = [
+            RetryUnit(u.id, u.attempts, u.endpoint, u.uf, u.modalidade, u.page,
+                      u.data_inicial, u.data_final, u.discover_pages)
+            for u in result.all()
+        ]
+        stats = {"retried": len(units), "resolved": 0, "failed": 0, "abandoned": 0, "discovered": 0, "items": 0}
+        if not units:
+            return stats
+
+        semaphore = asyncio.Semaphore(client.concurrency)
+        errors: List[Dict[int, str]] = [{} for _ in units]
+        pages = await asyncio.gather(*(
+            client.fetch_feed_page(
+                u.endpoint, u.uf, u.modalidade, u.data_inicial, u.data_final, u.page, semaphore, errs
+            )
+            for u, errs in zip(units, errors)
+        ))
+
+        for unit, data, errs in zip(units, pages, errors):
+            unit_id, attempts = unit.id, unit.attempts + 1
+            endpoint, uf, modalidade, page = unit.endpoint, unit.uf, unit.modalidade, unit.page
+            window = (unit.data_inicial, unit.data_final)
+            error = None
+            if data is None:
+                error = errs.get(page, "Falha na busca")
+            else:
+                try:
+                    items = data.get("data") or []
+                    if items:
+                        stats["items"] += await client.page_handler(endpoint)(session, uf, items)
+                    if unit.discover_pages:
+                        total = data.get("totalPaginas") or page
+                        rest = {p: "Descoberta pela re-busca da página anterior" for p in range(page + 1, total + 1)}
+                        stats["discovered"] += await DeadLetterService.record(
+                            session, endpoint, uf, modalidade, *window, rest,
+                        )
+                    await DeadLetterService._mark(
+                        session, unit_id, status="resolved", attempts=attempts, error=None, discover_pages=False,
+                    )
+                    await session.commit()
+                    stats["resolved"] += 1
+                    continue
+                except Exception as e:
+                    await session.rollback()
+                    error = f"Erro ao gravar: {e}"
+
+            if attempts >= settings.DEAD_LETTER_MAX_ATTEMPTS:
+                logger.error(f"Desistindo de {endpoint} {uf}-{modalidade} {window[0]}..{window[1]} pag {page}: {error}")
+                await DeadLetterService._mark(session, unit_id, status="abandoned", attempts=attempts, error=error)
+                stats["abandoned"] += 1
+            else:
+                await DeadLetterService._mark(
+                    session, unit_id, attempts=attempts, error=error,
+                    next_attempt_at=DeadLetterService.next_attempt(attempts),
+                )
+                stats["failed"] += 1
+            await session.commit()
+
+        logger.info(
+            f"Dead-letter: {stats['retried']} re-buscadas, {stats['resolved']} resolvidas, "
+            f"{stats['failed']} adiadas, {stats['abandoned']} abandonadas."
+        )
+        return stats
+
+    @staticmethod
+    async def _mark(session: AsyncSession, unit_id: int, **values):
+        values["updated_at"] = datetime.utcnow()
+        if values.get("error"):
+            values["error"] = values["error"][:1000]
+        await session.execute(update(DeadLetter).where(DeadLetter.id == unit_id).values(**values))
+
+    @staticmethod
+    async def list_units(
+        session: AsyncSession, status: Optional[str] = "pending", limit: int = 100
+    ) -> List[DeadLetter]:
+        stmt = select(DeadLetter).order_by(col(DeadLetter.updated_at).desc()).limit(limit)
+        if status:
+            stmt = stmt.where(DeadLetter.status == status)
+        return list((await session.exec(stmt)).all())
+
+    @staticmethod
+    async def counts(session: AsyncSession) -> Dict[str, int]:
+        result = await session.exec(select(DeadLetter.status, func.count()).group_by(DeadLetter.status))
+        return {status: count for status, count in result.all()}
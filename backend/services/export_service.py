@@ -0,0 +1,170 @@
+"""
+Exportação da listagem — CSV, XLSX e Parquet em streaming.
+
+As linhas vêm de um cursor do servidor (session.stream + yield_per) em lotes
+de EXPORT_BATCH_SIZE, só com as colunas exportadas (tuplas, não objetos ORM),
+então a memória não cresce com o tamanho da exportação. O trabalho de CPU de
+cada lote (formatar, montar planilha/colunas) roda numa thread
+(asyncio.to_thread), para não travar o event loop da API durante a exportação:
+    csv     — cada lote vira um pedaço da resposta (primeiro byte imediato)
+    xlsx    — openpyxl em modo write-only (as linhas vão para disco) e o
+              arquivo pronto é enviado em pedaços
+    parquet — um row group por lote com pyarrow (pacote opcional)
+"""
+import asyncio
+import csv
+import tempfile
+from datetime import datetime
+from io import StringIO
+from typing import IO, AsyncIterator, Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy import Select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import Licitacao
+from infra.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # exportação parquet indisponível
+    pa = pq = None
+
+# (cabeçalho, coluna) na ordem do arquivo
+COLUMNS = [
+    ("ID", Licitacao.pncp_id),
+    ("Titulo", Licitacao.titulo),
+    ("Orgao", Licitacao.orgao_nome),
+    ("CNPJ", Licitacao.orgao_cnpj),
+    ("UF", Licitacao.estado_sigla),
+    ("Cidade", Licitacao.cidade),
+    ("Publicacao", Licitacao.data_publicacao),
+    ("Abertura", Licitacao.data_abertura_proposta),
+    ("Modalidade", Licitacao.modalidade),
+    ("SRP", Licitacao.srp),
+    ("ME/EPP", Licitacao.me_epp_status),
+    ("Status", Licitacao.status),
+    ("Prioridade", Licitacao.priority),
+    ("Score", Licitacao.score),
+    ("Link", Licitacao.link_edital),
+]
+HEADER = [name for name, _ in COLUMNS]
+EXPORT_COLUMNS = [column for _, column in COLUMNS]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+FILE_CHUNK_SIZE = 64 * 1024
+
+Batches = AsyncIterator[Sequence[tuple]]
+
+
+def csv_row(row: Sequence) -> list:
+    """Linha no formato do CSV de sempre: datas dd/mm/aaaa e SRP Sim/Não."""
+    values = list(row)
+    for i in (6, 7):
+        values[i] = values[i].strftime("%d/%m/%Y") if values[i] else ""
+    values[9] = "Sim" if values[9] else "Não"
+    return values
+
+
+class ExportService:
+    @staticmethod
+    async def batches(
+        session_factory: Callable,
+        build_query: Callable[[AsyncSession], Awaitable[Select]],
+        batch_size: Optional[int] = None,
+    ) -> Batches:
+        """
+        Lotes de linhas (tuplas de EXPORT_COLUMNS) por cursor do servidor. Abre a
+        própria sessão: o gerador roda enquanto a resposta é enviada, depois do
+        request. `build_query` recebe a sessão (a busca ajusta o pg_trgm nela).
+        """
+        batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        async with session_factory() as session:
+            query = await build_query(session)
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            async for partition in result.partitions():
+                yield partition
+
+    @staticmethod
+    async def csv_chunks(batches: Batches) -> AsyncIterator[str]:
+        """CSV (;, com BOM para o Excel) um pedaço por lote."""
+        output = StringIO()
+        writer = csv.writer(output, delimiter=';')
+        output.write('\ufeff')
+        writer.writerow(HEADER)
+        yield output.getvalue()
+        async for batch in batches:
+            yield await asyncio.to_thread(ExportService._csv_text, batch)
+
+    @staticmethod
+    def _csv_text(batch: Sequence[tuple]) -> str:
+        output = StringIO()
+        csv.writer(output, delimiter=';').writerows(csv_row(row) for row in batch)
+        return output.getvalue()
+
+    @staticmethod
+    async def xlsx_chunks(batches: Batches) -> AsyncIterator[bytes]:
+        """Planilha em modo write-only, com datas e números nativos."""
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("Licitacoes")
+        sheet.append(HEADER)
+
+        def append(batch):
+            for row in batch:
+                sheet.append(row)
+
+        async for batch in batches:
+            await asyncio.to_thread(append, batch)
+        with tempfile.TemporaryFile() as buffer:
+            await asyncio.to_thread(workbook.save, buffer)
+            async for chunk in ExportService._read_chunks(buffer):
+                yield chunk
+
+    @staticmethod
+    async def parquet_chunks(batches: Batches) -> AsyncIterator[bytes]:
+        """Um row group por lote; requer o pacote 'pyarrow'."""
+        schema = pa.schema([
+            (name, pa.timestamp("us") if name in ("Publicacao", "Abertura")
+             else pa.bool_() if name == "SRP"
+             else pa.int64() if name == "Score"
+             else pa.string())
+            for name in HEADER
+        ])
+        def write(writer, batch):
+            columns = list(zip(*batch)) if batch else [()] * len(HEADER)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+
+        with tempfile.TemporaryFile() as buffer:
+            with pq.ParquetWriter(buffer, schema, compression="zstd") as writer:
+                async for batch in batches:
+                    await asyncio.to_thread(write, writer, batch)
+            async for chunk in ExportService._read_chunks(buffer):
+                yield chunk
+
+    @staticmethod
+    async def _read_chunks(buffer: IO[bytes]) -> AsyncIterator[bytes]:
+        buffer.seek(0)
+        while chunk := await asyncio.to_thread(buffer.read, FILE_CHUNK_SIZE):
+            yield chunk
+
+    @staticmethod
+    def filename(fmt: str) -> str:
+        return f"licitacoes_export_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt}"
+
+    @staticmethod
+    def chunks(fmt: str, batches: Batches) -> AsyncIterator:
+        return {
+            "csv": ExportService.csv_chunks,
+            "xlsx": ExportService.xlsx_chunks,
+            "parquet": ExportService.parquet_chunks,
+        }[fmt](batches)
+
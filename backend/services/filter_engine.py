@@ -1,4 +1,70 @@
-from domain.models import LicitacaoCreate
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from domain.text import normalize_text
+from services.me_epp_classifier import MeEppClassifier
+from infra.config import settings
+
+try:
+    import ahocorasick
+except ImportError:  # opcional: sem ele o TermMatcher varre termo a termo
+    ahocorasick = None
+
+
+class TermMatcher:
+    """
+    Casa vários conjuntos de termos (substring) numa única passada por um texto já
+    normalizado (domain.text.normalize_text: sem acento, minúsculo) e diz quantos
+    termos distintos de cada categoria apareceram. Os termos passam pela mesma
+    normalização, então "locação" e "locacao" são o mesmo termo.
+
+    Todos os termos viram um único autômato Aho-Corasick (pacote 'pyahocorasick',
+    em C). Sem ele, cai numa varredura `in` por termo distinto — ainda uma vez por
+    título, não uma por lista. Cada termo é um bit: o resultado é uma máscara, e
+    cada categoria é contada com um AND.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        categories = {name: [normalize_text(term) for term in terms] for name, terms in categories.items()}
+        terms = list(dict.fromkeys(term for group in categories.values() for term in group))
+        bits = {term: 1 << i for i, term in enumerate(terms)}
+        self.masks: Dict[str, int] = {
+            name: sum(bits[term] for term in set(group)) for name, group in categories.items()
+        }
+
+        self._automaton = None
+        self.uses_automaton = ahocorasick is not None and bool(terms)
+        if self.uses_automaton:
+            self._automaton = ahocorasick.Automaton()
+            for term, bit in bits.items():
+                self._automaton.add_word(term, bit)
+            self._automaton.make_automaton()
+        else:
+            self._terms = list(bits.items())
+
+    def mask(self, normalized: str) -> int:
+        """Máscara de bits dos termos presentes no texto normalizado."""
+        found = 0
+        if self._automaton is not None:
+            for _, bit in self._automaton.iter(normalized):
+                found |= bit
+        else:
+            for term, bit in self._terms:
+                if term in normalized:
+                    found |= bit
+        return found
+
+    def match(self, text: str) -> Dict[str, int]:
+        """Categoria -> quantos termos distintos dela aparecem no texto (normaliza antes)."""
+        found = self.mask(normalize_text(text))
+        return {name: (found & mask).bit_count() for name, mask in self.masks.items()}
+
+
+class Classification(NamedTuple):
+    """Veredito do FilterEngine para um título (ver FilterEngine.classify)."""
+    semantic: bool
+    priority: str
+    score: int
+
 
 class FilterEngine:
     WHITE_LIST = [
@@ -18,25 +84,66 @@ class FilterEngine:
         "telefonia", "segurança", "combustível", "lubrificante"
     ]
     
+    # Termos de ALTA prioridade (Produtos Core)
+    HIGH_VALUE_TERMS = [
+        "medicament", "farmac", "hospital", "enfermagem", "cirurg", 
+        "ortoped", "fisioterap", "reagente", "equipamento medico"
+    ]
+    
+    # Termos de MÉDIA prioridade (Consumíveis)
+    MEDIUM_VALUE_TERMS = [
+        "luva", "seringa", "cateter", "agulha", "algodao", "gaze", 
+        "penso", "curativo", "material medico"
+    ]
+    
+    # Categoria de regra -> lista acima (as regras do banco usam as mesmas categorias)
+    RULE_LISTS = {
+        "black": "BLACK_LIST",
+        "white": "WHITE_LIST",
+        "high": "HIGH_VALUE_TERMS",
+        "medium": "MEDIUM_VALUE_TERMS",
+    }
+
+    # Todas as listas compiladas uma vez num único matcher (uma passada por título)
+    MATCHER = TermMatcher({
+        "black": BLACK_LIST,
+        "white": WHITE_LIST,
+        "high": HIGH_VALUE_TERMS,
+        "medium": MEDIUM_VALUE_TERMS,
+    })
+    # Versão das regras carregadas do banco (FilterRuleService); None = listas embutidas
+    RULES_VERSION: Optional[str] = None
+
+    # Pré-calculado uma vez; todas as fontes consultam o mesmo conjunto
+    TARGET_UFS = frozenset(uf.upper() for uf in settings.TARGET_UFS)
+
+    @staticmethod
+    def rules() -> Dict[str, List[str]]:
+        """Termos em uso, por categoria."""
+        return {name: list(getattr(FilterEngine, attr)) for name, attr in FilterEngine.RULE_LISTS.items()}
+
+    @staticmethod
+    def use_rules(rules: Dict[str, List[str]], version: Optional[str] = None):
+        """
+        Troca as listas e o matcher (hot reload). O matcher novo é compilado antes
+        e entra numa única atribuição: quem já pegou o antigo termina com ele.
+        """
+        rules = {name: list(rules.get(name, [])) for name in FilterEngine.RULE_LISTS}
+        matcher = TermMatcher(rules)
+        for name, attr in FilterEngine.RULE_LISTS.items():
+            setattr(FilterEngine, attr, rules[name])
+        FilterEngine.MATCHER = matcher
+        FilterEngine.RULES_VERSION = version
+
     @staticmethod
     def check_geographic(uf: str) -> bool:
-        return uf.upper() in ["MA", "PI", "PA"]
+        return bool(uf) and uf.upper() in FilterEngine.TARGET_UFS
 
     @staticmethod
     def check_semantic(titulo: str) -> bool:
-        titulo_lower = titulo.lower()
-        
-        # 1. Verifica Black List (Bloqueio Imediato)
-        for term in FilterEngine.BLACK_LIST:
-            if term in titulo_lower:
-                return False
-                
-        # 2. Verifica White List (Liberação)
-        for term in FilterEngine.WHITE_LIST:
-            if term in titulo_lower:
-                return True
-                
-        return False # Se não caiu em nenhum, rejeita por segurança (ou aprova manualmente depois)
+        # Black List bloqueia; White List libera. Se não caiu em nenhum, rejeita
+        # por segurança (ou aprova manualmente depois). Ver `classify`.
+        return FilterEngine.classify(titulo).semantic
 
     @staticmethod
     def check_gatekeeper(texto_edital: str) -> tuple[bool, str]:
@@ -46,40 +153,44 @@ class FilterEngine:
         """
         return True, ""
 
+    @staticmethod
+    def detect_me_epp(titulo: str) -> str:
+        """Participação ME/EPP pelo texto do objeto: "exclusivo", "parcial" ou "nao"."""
+        return MeEppClassifier.classify(titulo)
+
     @staticmethod
     def calculate_priority(titulo: str) -> tuple[str, int]:
         """Calcula prioridade e score baseado em palavras-chave"""
-        score = 0
-        titulo_lower = titulo.lower()
-        
-        # Termos de ALTA prioridade (Produtos Core)
-        high_value_terms = [
-            "medicament", "farmac", "hospital", "enfermagem", "cirurg", 
-            "ortoped", "fisioterap", "reagente", "equipamento medico"
-        ]
-        
-        # Termos de MÉDIA prioridade (Consumíveis)
-        medium_value_terms = [
-            "luva", "seringa", "cateter", "agulha", "algodao", "gaze", 
-            "penso", "curativo", "material medico"
-        ]
-        
-        # Cálculo de Score
-        for term in high_value_terms:
-            if term in titulo_lower:
-                score += 30
-                
-        for term in medium_value_terms:
-            if term in titulo_lower:
-                score += 10
-                
-        # Normalização (Max 100)
-        score = min(score, 100)
-        
+        verdict = FilterEngine.classify(titulo)
+        return verdict.priority, verdict.score
+
+    @staticmethod
+    def classify(titulo: str) -> Classification:
+        """Filtro semântico e prioridade/score de um título numa única passada."""
+        return FilterEngine._classify(FilterEngine.MATCHER.mask(normalize_text(titulo)), FilterEngine.MATCHER.masks)
+
+    @staticmethod
+    def _classify(found: int, masks: Dict[str, int]) -> Classification:
+        # Filtro semântico: nenhum termo da Black List e ao menos um da White List
+        semantic = not found & masks["black"] and found & masks["white"] != 0
+
+        # Score: 30 por termo de alta, 10 por termo de média. Normalização (Max 100)
+        score = min((found & masks["high"]).bit_count() * 30 + (found & masks["medium"]).bit_count() * 10, 100)
+
         # Definição de Faixa
         if score >= 30:
-            return "alta", score
+            return Classification(semantic, "alta", score)
         elif score >= 10:
-            return "media", score
-        else:
-            return "baixa", score
+            return Classification(semantic, "media", score)
+        return Classification(semantic, "baixa", score)
+
+    @staticmethod
+    def classify_many(titulos: Iterable[str], normalized: bool = False) -> List[Classification]:
+        """
+        `classify` de um lote de títulos (uma página da ingestão). Com `normalized=True`
+        os títulos já vêm de Licitacao.titulo_normalizado e não são normalizados de novo.
+        """
+        matcher = FilterEngine.MATCHER
+        if not normalized:
+            titulos = map(normalize_text, titulos)
+        return [FilterEngine._classify(matcher.mask(titulo), matcher.masks) for titulo in titulos]
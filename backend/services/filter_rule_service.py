@@ -0,0 +1,138 @@
+"""
+Regras de filtro no banco — os termos do FilterEngine (black/white list e
+termos de prioridade) editáveis sem deploy.
+
+A tabela filter_rule começa com as listas embutidas (`seed`). Cada processo
+(API, worker, pool do replay) confere a versão das regras — contagem + maior
+updated_at, uma consulta barata — no máximo a cada FILTER_RULES_REFRESH_SECONDS
+e, se mudou, recompila o matcher (FilterEngine.use_rules). O que já foi gravado
+é reclassificado pelo job `task_rescore` (ver RescoreService).
+Se o banco falhar, o processo segue com as regras que já tem.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import FilterRule
+from domain.text import normalize_text
+from infra.config import settings
+from services.filter_engine import FilterEngine
+
+logger = logging.getLogger("FilterRules")
+
+CATEGORIES = tuple(FilterEngine.RULE_LISTS)
+
+
+class FilterRuleService:
+    # Última checagem de versão neste processo (time.monotonic)
+    _checked_at: Optional[float] = None
+
+    @staticmethod
+    async def version(session: AsyncSession) -> Optional[str]:
+        """Versão das regras (inclui as desativadas, para que remover também mude). None = tabela vazia."""
+        result = await session.exec(select(func.count(FilterRule.id), func.max(FilterRule.updated_at)))
+        count, updated_at = result.one()
+        if not count:
+            return None
+        return f"{count}:{updated_at.isoformat()}"
+
+    @staticmethod
+    async def seed(session: AsyncSession) -> int:
+        """Grava as listas embutidas do FilterEngine (idempotente). Retorna quantas regras entraram."""
+        now = datetime.utcnow()
+        rows = [
+            {"category": category, "term": term, "active": True, "created_at": now, "updated_at": now}
+            for category, terms in FilterEngine.rules().items()
+            for term in dict.fromkeys(normalize_text(term) for term in terms)
+        ]
+        stmt = (
+            pg_insert(FilterRule.__table__).values(rows)
+            .on_conflict_do_nothing(index_elements=["category", "term"])
+            .returning(FilterRule.__table__.c.id)
+        )
+        result = await session.execute(stmt)
+        inserted = len(result.fetchall())
+        await session.commit()
+        return inserted
+
+    @staticmethod
+    async def refresh(session_factory: Callable, force: bool = False) -> bool:
+        """
+        Recarrega as regras se a versão no banco mudou. Usa uma sessão própria
+        (não mexe na transação de quem chama) e respeita FILTER_RULES_REFRESH_SECONDS,
+        a menos que `force`. Retorna True se o matcher foi trocado.
+        """
+        now = time.monotonic()
+        checked_at = FilterRuleService._checked_at
+        if not force and checked_at is not None and now - checked_at < settings.FILTER_RULES_REFRESH_SECONDS:
+            return False
+        FilterRuleService._checked_at = now
+
+        try:
+            async with session_factory() as session:
+                version = await FilterRuleService.version(session)
+                if version is None or version == FilterEngine.RULES_VERSION:
+                    return False
+                rules = {category: [] for category in CATEGORIES}
+                result = await session.exec(
+                    select(FilterRule.category, FilterRule.term)
+                    .where(FilterRule.active == True)  # noqa: E712
+                    .order_by(FilterRule.id)
+                )
+                for category, term in result.all():
+                    if category in rules:
+                        rules[category].append(term)
+        except Exception as e:
+            logger.warning(f"Falha ao carregar regras de filtro; mantendo as atuais: {e}")
+            return False
+
+        FilterEngine.use_rules(rules, version)
+        logger.info(f"Regras de filtro recarregadas (versão {version}): " + ", ".join(
+            f"{category}={len(terms)}" for category, terms in rules.items()
+        ))
+        return True
+
+    @staticmethod
+    async def list_rules(session: AsyncSession, category: Optional[str] = None) -> List[FilterRule]:
+        stmt = select(FilterRule).order_by(FilterRule.category, FilterRule.term)
+        if category:
+            stmt = stmt.where(FilterRule.category == category)
+        return list((await session.exec(stmt)).all())
+
+    @staticmethod
+    async def add(session: AsyncSession, category: str, term: str) -> FilterRule:
+        """Cria a regra (ou reativa uma removida). O termo é gravado normalizado."""
+        if category not in CATEGORIES:
+            raise ValueError(f"Categoria inválida: {category} (use {', '.join(CATEGORIES)})")
+        term = normalize_text(term)
+        if not term:
+            raise ValueError("Termo vazio")
+        now = datetime.utcnow()
+        stmt = (
+            pg_insert(FilterRule.__table__)
+            .values(category=category, term=term, active=True, created_at=now, updated_at=now)
+            .on_conflict_do_update(index_elements=["category", "term"], set_={"active": True, "updated_at": now})
+        )
+        await session.execute(stmt)
+        await session.commit()
+        result = await session.exec(select(FilterRule).where(FilterRule.category == category, FilterRule.term == term))
+        return result.one()
+
+    @staticmethod
+    async def remove(session: AsyncSession, rule_id: int) -> Optional[FilterRule]:
+        """Desativa a regra (a versão muda e os processos recarregam). None se não existe."""
+        rule = await session.get(FilterRule, rule_id)
+        if rule is None:
+            return None
+        rule.active = False
+        rule.updated_at = datetime.utcnow()
+        session.add(rule)
+        await session.commit()
+        await session.refresh(rule)
+        return rule
@@ -0,0 +1,248 @@
+"""
+Pipeline de ingestão — o mesmo caminho para todas as fontes:
+
+    fetch  ──fila──▶  normalize + classify  ──fila──▶  persist (lotes)
+
+Cada fonte é só um `SourceAdapter`: diz como buscar as páginas (com a
+concorrência que o upstream aguenta) e como normalizar um registro bruto em
+campos da Licitacao. Classificação (FilterEngine: geográfico, semântico,
+gatekeeper, ME/EPP, prioridade; relevância do RelevanceClassifier), arquivo
+bruto, gravação em lote e métricas (etapas "filter" e "write" do SyncTracker)
+ficam aqui, iguais para todas.
+
+As filas são limitadas (PIPELINE_QUEUE_SIZE páginas): se o banco ficar para
+trás, o fetch espera em vez de acumular páginas em memória. O estágio de
+persistência junta as páginas que já estiverem na fila até PIPELINE_BATCH_SIZE
+registros por INSERT/commit; com o banco folgado, grava página a página.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.enums import SEMANTIC_REJECTION_REASON
+from domain.models import Licitacao
+from domain.text import normalized_columns
+from infra.config import settings
+from infra.licitacao_repository import LicitacaoRepository
+from services.filter_engine import Classification, FilterEngine
+from services.me_epp_classifier import MeEppClassifier
+from services.raw_archive_service import RawArchiveService
+from services.relevance_classifier import RelevanceClassifier
+from services.sync_tracker import timed, track
+
+logger = logging.getLogger("IngestionPipeline")
+
+
+@dataclass
+class Page:
+    """Unidade que atravessa o pipeline: registros brutos de uma requisição."""
+    items: list
+    uf: Optional[str] = None
+    key: Any = None                      # identifica a página para o adapter
+    final: bool = False                  # marcador de fim de grupo (ver SourceAdapter.on_committed)
+    rows: List[dict] = field(default_factory=list)
+    rejected: int = 0
+
+
+class SourceAdapter:
+    """
+    Interface de uma fonte. Obrigatórios: `pages` e `normalize`; o resto tem um
+    padrão que serve para fontes "só inserção".
+    """
+    name: str = ""
+    # Chave do arquivo bruto (RawArchiveService); None = não arquiva
+    archive_source: Optional[str] = None
+    # Passos do FilterEngine aplicados aos campos normalizados
+    classify: bool = True
+    geographic_filter: bool = True
+    semantic_filter: bool = True
+
+    def pages(self) -> AsyncIterator[Page]:
+        """Estágio de fetch: entrega as páginas em ordem determinística."""
+        raise NotImplementedError
+
+    def normalize(self, item: dict, page: Page) -> Optional[dict]:
+        """
+        Registro bruto -> campos da Licitacao (sem classificação). None descarta.
+        Pode incluir `texto_edital` (não é coluna): entra só na detecção de ME/EPP.
+        """
+        raise NotImplementedError
+
+    def natural_id(self, item: dict) -> str:
+        """Chave natural do registro bruto (exigida com `archive_source`)."""
+        raise NotImplementedError
+
+    def published(self, item: dict) -> Optional[str]:
+        """Data de publicação (ISO) do registro bruto, para recortar o arquivo."""
+        return None
+
+    async def persist(self, session: AsyncSession, rows: List[dict]) -> Tuple[int, int]:
+        """Grava um lote (sem commit) e retorna (novos, atualizados)."""
+        # Dedup set-based: uma única consulta IN por lote, sem montar o modelo do que já existe
+        known_ids = await LicitacaoRepository.existing_pncp_ids(session, (row["pncp_id"] for row in rows))
+        batch = [Licitacao(**row) for row in rows if row["pncp_id"] not in known_ids]
+        inserted = await LicitacaoRepository.bulk_insert(session, batch)
+        return inserted, 0
+
+    async def on_committed(self, session: AsyncSession, pages: List[Page]):
+        """Depois do commit de um lote (ex.: avançar watermarks). O pipeline faz o commit."""
+
+    async def on_failed(self, session: AsyncSession, pages: List[Page], error: str):
+        """Lote que não pôde ser gravado (já com rollback; ex.: dead-letter)."""
+
+
+def classify_rows(rows: List[dict], adapter: SourceAdapter) -> List[dict]:
+    """
+    Aplica o FilterEngine aos campos normalizados de uma página: filtro geográfico
+    (descarta), semântico e gatekeeper (status/rejection_reason), ME/EPP,
+    prioridade/score e relevância aprendida — os títulos da página passam juntos
+    pelo matcher compilado e pelo classificador.
+    """
+    if adapter.geographic_filter:
+        rows = [row for row in rows if FilterEngine.check_geographic(row.get("estado_sigla") or "")]
+
+    titulos = [row["titulo_normalizado"] for row in rows]
+    verdicts = FilterEngine.classify_many(titulos, normalized=True)
+    relevances = RelevanceClassifier.predict_many(titulos)
+    # ME/EPP pelo objeto e, quando a fonte traz, pelo texto do edital
+    me_epp = MeEppClassifier.classify_many(titulos, normalized=True)
+    me_epp_edital = MeEppClassifier.classify_many(row.pop("texto_edital", None) for row in rows)
+    for fields, verdict, relevance, by_title, by_edital in zip(rows, verdicts, relevances, me_epp, me_epp_edital):
+        fields.update(verdict_fields(fields["titulo"], verdict, adapter.semantic_filter), relevance=relevance)
+        # A fonte pode já ter decidido (ex.: flag exclusivoMeEpp do PNCP)
+        fields["me_epp_status"] = MeEppClassifier.merge(fields.get("me_epp_status"), by_title, by_edital)
+    return rows
+
+
+def verdict_fields(titulo: str, verdict: Classification, semantic_filter: bool = True) -> dict:
+    """status/rejection_reason/priority/score de um título já classificado (ingestão e rescore)."""
+    status, reason = "recebido", None
+    if semantic_filter and not verdict.semantic:
+        status, reason = "rejeitado", SEMANTIC_REJECTION_REASON
+
+    allowed, gate_reason = FilterEngine.check_gatekeeper(titulo)
+    if not allowed:
+        status, reason = "rejeitado", gate_reason
+    return dict(status=status, rejection_reason=reason, priority=verdict.priority, score=verdict.score)
+
+
+def normalize_rows(adapter: SourceAdapter, page: Page) -> List[dict]:
+    """
+    normalize + classify de uma página (puro; usado também pelo replay). Registros
+    com título ganham o texto normalizado (ver domain.text) aqui, uma vez só.
+    """
+    rows = [fields for fields in (adapter.normalize(item, page) for item in page.items) if fields is not None]
+    for fields in rows:
+        if "titulo" in fields:
+            fields.update(normalized_columns(fields["titulo"], fields.get("orgao_nome"), fields.get("cidade")))
+        if not adapter.classify:
+            fields.pop("texto_edital", None)
+    return classify_rows(rows, adapter) if adapter.classify else rows
+
+
+def map_item(adapter: SourceAdapter, item: dict, page: Page) -> Optional[dict]:
+    """normalize + classify de um único registro."""
+    rows = normalize_rows(adapter, Page(items=[item], uf=page.uf, key=page.key))
+    return rows[0] if rows else None
+
+
+class IngestionPipeline:
+    @staticmethod
+    def prepare(adapter: SourceAdapter, page: Page) -> Page:
+        """Estágio normalize + classify de uma página (CPU, sem I/O)."""
+        started = time.perf_counter()
+        page.rows = normalize_rows(adapter, page)
+        page.rejected = sum(1 for row in page.rows if row.get("status") == "rejeitado")
+        track("filter", elapsed=time.perf_counter() - started, records_seen=len(page.items), rejected_items=page.rejected)
+        return page
+
+    @staticmethod
+    async def write(session: AsyncSession, adapter: SourceAdapter, pages: List[Page]) -> Tuple[int, int]:
+        """Arquivo bruto + gravação em lote das páginas preparadas. Não faz commit."""
+        with timed("write"):
+            if adapter.archive_source:
+                await RawArchiveService.store(session, adapter.archive_source, [
+                    (adapter.natural_id(item), page.uf or "BR", adapter.published(item), item)
+                    for page in pages for item in page.items
+                ])
+            rows = [row for page in pages for row in page.rows]
+            new, updated = await adapter.persist(session, rows) if rows else (0, 0)
+        track("write", new_items=new, updated_items=updated)
+        return new, updated
+
+    @staticmethod
+    async def run(
+        session: AsyncSession,
+        adapter: SourceAdapter,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ) -> Tuple[int, int]:
+        """Roda fetch -> normalize/classify -> persist até a fonte esgotar. Retorna (novos, atualizados)."""
+        batch_size = batch_size or settings.PIPELINE_BATCH_SIZE
+        queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        prepared: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        totals = [0, 0]
+
+        async def fetch_stage():
+            async for page in adapter.pages():
+                await fetched.put(page)
+            await fetched.put(None)
+
+        async def prepare_stage():
+            while (page := await fetched.get()) is not None:
+                await prepared.put(IngestionPipeline.prepare(adapter, page))
+            await prepared.put(None)
+
+        async def persist_stage():
+            done = False
+            while not done:
+                page = await prepared.get()
+                if page is None:
+                    break
+                batch = [page]
+                # Junta o que já estiver pronto, até o tamanho do lote
+                while sum(len(p.rows) for p in batch) < batch_size and not prepared.empty():
+                    nxt = prepared.get_nowait()
+                    if nxt is None:
+                        done = True
+                        break
+                    batch.append(nxt)
+                await IngestionPipeline._flush(session, adapter, batch, totals)
+
+        stages = [
+            asyncio.create_task(fetch_stage()),
+            asyncio.create_task(prepare_stage()),
+            asyncio.create_task(persist_stage()),
+        ]
+        try:
+            # Qualquer estágio que falhar derruba os outros (e a exceção sobe)
+            await asyncio.gather(*stages)
+        finally:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+        return totals[0], totals[1]
+
+    @staticmethod
+    async def _flush(session: AsyncSession, adapter: SourceAdapter, batch: List[Page], totals: list):
+        try:
+            new, updated = await IngestionPipeline.write(session, adapter, batch)
+            with timed("write"):
+                await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"{adapter.name}: falha ao gravar lote de {len(batch)} página(s): {e}")
+            track("write", error=f"{adapter.name}: {e}")
+            await adapter.on_failed(session, batch, str(e))
+            await session.commit()
+            return
+
+        totals[0] += new
+        totals[1] += updated
+        await adapter.on_committed(session, batch)
+        await session.commit()
@@ -1,135 +1,186 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from datetime import datetime
 
 from services import scraper
 from services.pncp_client import PNCPClient
-from services.transfere_client import TransfereClient
+from services.transfere_client import TransfereAdapter, TransfereClient
 from services.comprasnet_client import ComprasNetClient
-from services.filter_engine import FilterEngine
-from domain.models import Licitacao
+from services.ingestion_pipeline import IngestionPipeline
+from services.sync_tracker import SyncTracker
+from infra.config import settings
+from infra.database import async_session_factory
+from infra.http_clients import http_clients
 
 logger = logging.getLogger("IngestionService")
 
+
+@dataclass
+class SourceResult:
+    """Resultado de uma fonte dentro de um sync_all."""
+    source: str
+    status: str = "success"          # success | error | timeout
+    new_items: int = 0
+    updated_items: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    run_id: Optional[int] = None     # sync_run com o detalhamento por etapa
+
+
+@dataclass
+class SyncReport:
+    results: List[SourceResult] = field(default_factory=list)
+
+    @property
+    def new_items(self) -> int:
+        return sum(r.new_items for r in self.results)
+
+    @property
+    def updated_items(self) -> int:
+        return sum(r.updated_items for r in self.results)
+
+    @property
+    def failed_sources(self) -> List[str]:
+        return [r.source for r in self.results if r.status != "success"]
+
+    def to_dict(self) -> dict:
+        return {
+            "new_items": self.new_items,
+            "updated_items": self.updated_items,
+            "failed_sources": self.failed_sources,
+            "sources": {
+                r.source: {
+                    "status": r.status,
+                    "new_items": r.new_items,
+                    "updated_items": r.updated_items,
+                    "elapsed": round(r.elapsed, 2),
+                    "error": r.error,
+                    "run_id": r.run_id,
+                }
+                for r in self.results
+            },
+        }
+
+
 class IngestionService:
+    # Fontes do sync_all; cada uma tem um runner `_sync_<nome>`
+    SOURCES = ("pncp", "transferegov", "scraper", "comprasnet")
+    # Fontes consultadas UF a UF: podem ser divididas em shards de TARGET_UFS
+    UF_SOURCES = ("pncp", "comprasnet")
+
     @staticmethod
-    async def sync_all(session: AsyncSession, days: int = 3):
+    async def sync_all(
+        days: int = 3,
+        strategy: Optional[str] = None,
+        sources: Optional[List[str]] = None,
+    ) -> SyncReport:
         """
         Coleta dados de múltiplas fontes, filtra e salva no banco.
-        Retorna o total de NOVOS itens adicionados.
+
+        Supervisor: cada fonte roda na sua própria task, com sessão e orçamento
+        de tempo próprios (SYNC_SOURCE_TIMEOUT / SYNC_SOURCE_TIMEOUTS), então a
+        latência total é a da fonte mais lenta e a falha de uma não afeta as outras.
+        `strategy` escolhe como o PNCP é varrido (ver SyncStrategy); `sources`
+        restringe a execução a algumas fontes (padrão: todas).
         """
-        print(f"🌍 [Ingestion] Iniciando sincronização global (últimos {days} dias)...")
-        
-        count_new = 0
-        
-        # 1. PNCP (API Oficial) - Já tem sua própria lógica de processamento e persistência
-        try:
-            client_pncp = PNCPClient()
-            count_pncp = await client_pncp.fetch_and_process(session, days=days)
-            count_new += count_pncp
-            await client_pncp.close()
-            print(f"✅ [PNCP] {count_pncp} novos itens.")
-        except Exception as e:
-            logger.error(f"Falha no PNCP: {e}")
-
-        # 2. Transfere.gov.br
-        try:
-            client_transf = TransfereClient()
-            dados_transf = await client_transf.fetch_processos(days=days)
-            count_transf = 0
-            
-            for item in dados_transf:
-                # Verificar duplicidade
-                existing = await session.exec(select(Licitacao).where(Licitacao.pncp_id == item['pncp_id']))
-                if existing.first():
-                    continue
-                
-                # Aplicar Filtros e Score
-                titulo = item['titulo']
-                if not FilterEngine.check_semantic(titulo):
-                    status = "rejeitado"
-                    reason = "Blacklist/Not Whitelisted"
-                else:
-                    status = "recebido"
-                    reason = None
-                
-                allowed, gate_reason = FilterEngine.check_gatekeeper(titulo)
-                if not allowed:
-                    status = "rejeitado"
-                    reason = gate_reason
-                
-                priority, score = FilterEngine.calculate_priority(titulo)
-                
-                # Criar Objeto
-                new_lic = Licitacao(
-                    pncp_id=item['pncp_id'],
-                    titulo=titulo,
-                    orgao_nome=item['orgao_nome'],
-                    orgao_cnpj=item.get('orgao_cnpj'),
-                    estado_sigla=item.get('estado_sigla', 'BR'),
-                    cidade=item.get('cidade'),
-                    data_publicacao=datetime.fromisoformat(item['data_publicacao'].replace('Z', '+00:00')) if isinstance(item['data_publicacao'], str) else datetime.utcnow(),
-                    link_edital=item.get('link_edital'),
-                    modalidade=item.get('modalidade'),
-                    status=status,
-                    rejection_reason=reason,
-                    priority=priority,
-                    score=score
-                )
-                session.add(new_lic)
-                count_transf += 1
-                count_new += 1
-            
-            await session.commit()
-            print(f"✅ [Transfere.gov] {count_transf} novos itens.")
-        except Exception as e:
-            logger.error(f"Falha no Transfere gov: {e}")
-
-        # 3. Scraper (Google News)
-        try:
-            dados_scraper = await scraper.buscar_licitacoes_gov() or []
-            count_scr = 0
-            for item in dados_scraper:
-                # Gerar um ID único simples para itens do scraper se não houver
-                scr_id = f"scraper-{hash(item['titulo'] + item['orgao_nome'])}"
-                existing = await session.exec(select(Licitacao).where(Licitacao.pncp_id == scr_id))
-                if existing.first():
-                    continue
-                
-                priority, score = FilterEngine.calculate_priority(item['titulo'])
-                
-                new_lic = Licitacao(
-                    pncp_id=scr_id,
-                    titulo=item['titulo'],
-                    orgao_nome=item['orgao_nome'],
-                    estado_sigla=item.get('estado_sigla', 'BR'),
-                    data_publicacao=datetime.utcnow(),
-                    link_edital=item.get('link_edital'),
-                    status="recebido",
-                    priority=priority,
-                    score=score
-                )
-                session.add(new_lic)
-                count_scr += 1
-                count_new += 1
-                
-            await session.commit()
-            print(f"✅ [Scraper] {count_scr} novos itens.")
-        except Exception as e:
-            logger.error(f"Falha no Scraper: {e}")
-
-        # 4. ComprasNet (Dados Abertos)
-        try:
-            client_cnet = ComprasNetClient()
-            count_cnet = await client_cnet.fetch_and_process(session, days=days)
-            count_new += count_cnet
-            await client_cnet.close()
-            print(f"✅ [ComprasNet] {count_cnet} novos itens.")
-        except Exception as e:
-            logger.error(f"Falha no ComprasNet: {e}")
-
-        print(f"📊 [Sync] Total: {count_new} novos itens.")
-        return count_new
+        names = sources or list(IngestionService.SOURCES)
+        unknown = [n for n in names if n not in IngestionService.SOURCES]
+        if unknown:
+            raise ValueError(f"Fontes desconhecidas: {', '.join(unknown)}")
+
+        print(f"🌍 [Ingestion] Iniciando sincronização global (últimos {days} dias): {', '.join(names)}")
+        results = await asyncio.gather(*(
+            IngestionService.run_source(name, days=days, strategy=strategy) for name in names
+        ))
+        report = SyncReport(results=list(results))
+        print(f"📊 [Sync] Total: {report.new_items} novos itens, {report.updated_items} atualizados.")
+        return report
+
+    @staticmethod
+    async def run_source(
+        name: str,
+        days: int = 3,
+        strategy: Optional[str] = None,
+        timeout: Optional[float] = None,
+        job_id: Optional[str] = None,
+        ufs: Optional[List[str]] = None,
+    ) -> SourceResult:
+        """
+        Roda uma fonte isolada (sessão própria + timeout). Nunca levanta: o erro vai
+        no resultado. A execução fica registrada em sync_run/sync_stage (ver SyncTracker).
+        `ufs` restringe as fontes por UF (UF_SOURCES) a um shard de TARGET_UFS.
+        """
+        runner = getattr(IngestionService, f"_sync_{name}")
+        if timeout is None:
+            timeout = settings.SYNC_SOURCE_TIMEOUTS.get(name, settings.SYNC_SOURCE_TIMEOUT)
+
+        result = SourceResult(source=name)
+        started = time.perf_counter()
+        async with SyncTracker.start(name, job_id=job_id) as tracker:
+            try:
+                async with async_session_factory() as session:
+                    result.new_items, result.updated_items = await asyncio.wait_for(
+                        runner(session, days, strategy, ufs), timeout=timeout
+                    )
+                print(f"✅ [{name}] {result.new_items} novos itens, {result.updated_items} atualizados.")
+            except asyncio.TimeoutError:
+                result.status = "timeout"
+                result.error = f"Tempo limite de {timeout:.0f}s excedido"
+                logger.error(f"Falha no {name}: {result.error}")
+            except Exception as e:
+                result.status = "error"
+                result.error = str(e)
+                logger.error(f"Falha no {name}: {e}")
+            tracker.finish(result.status, result.error)
+        result.elapsed = time.perf_counter() - started
+        result.run_id = tracker.run.id
+        return result
+
+    # ─── Fontes ───────────────────────────────────────────────────────────────
+    # Cada runner recebe (session, days, strategy, ufs) e retorna (novos, atualizados).
+    # `ufs` só tem efeito nas fontes de UF_SOURCES (None = todas as TARGET_UFS).
+
+    @staticmethod
+    async def _sync_pncp(
+        session: AsyncSession, days: int, strategy: Optional[str], ufs: Optional[List[str]] = None
+    ) -> Tuple[int, int]:
+        # PNCP (API Oficial) - Já tem sua própria lógica de processamento e persistência
+        client_pncp = PNCPClient(client=http_clients.get("pncp"), states=ufs)
+        count_pncp = await client_pncp.fetch_and_process(session, days=days, strategy=strategy)
+        # Retificações (feed de atualização) ficam só com o task_sync_updates: dois
+        # donos disputariam os mesmos watermarks de "pncp_atualizacao"
+        await client_pncp.close()
+        return count_pncp, 0
+
+    @staticmethod
+    async def _sync_transferegov(
+        session: AsyncSession, days: int, strategy: Optional[str], ufs: Optional[List[str]] = None
+    ) -> Tuple[int, int]:
+        client_transf = TransfereClient(client=http_clients.get("transferegov"))
+        count_transf, _ = await IngestionPipeline.run(session, TransfereAdapter(client_transf, days=days))
+        await client_transf.close()
+        return count_transf, 0
+
+    @staticmethod
+    async def _sync_scraper(
+        session: AsyncSession, days: int, strategy: Optional[str], ufs: Optional[List[str]] = None
+    ) -> Tuple[int, int]:
+        # Scraper (Google News)
+        if not settings.NEWS_SCRAPER_ENABLED:
+            return 0, 0
+        count_scr, _ = await IngestionPipeline.run(session, scraper.ScraperAdapter())
+        return count_scr, 0
+
+    @staticmethod
+    async def _sync_comprasnet(
+        session: AsyncSession, days: int, strategy: Optional[str], ufs: Optional[List[str]] = None
+    ) -> Tuple[int, int]:
+        # ComprasNet (Dados Abertos)
+        client_cnet = ComprasNetClient(client=http_clients.get("comprasnet"), states=ufs)
+        count_cnet = await client_cnet.fetch_and_process(session, days=days)
+        await client_cnet.close()
+        return count_cnet, 0
+
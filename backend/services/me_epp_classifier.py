@@ -0,0 +1,69 @@
+"""
+Classificador de participação ME/EPP (LC 123/2006) — "exclusivo", "parcial" ou "nao".
+
+Trabalha sobre texto normalizado (domain.text: sem acento, minúsculo) com
+expressões compiladas uma vez e fronteira de palavra: "ME" só conta como
+palavra, então "medicamentos", "material médico" e "implementos" não marcam
+nada. Vale para o objeto (título) e para o texto do edital, quando a fonte o
+traz ou quando a análise baixa o PDF.
+
+    parcial   — cota reservada, itens/lotes exclusivos, art. 48, III
+    exclusivo — "exclusivo"/"exclusiva" perto de ME/EPP (ou LC 123), art. 48, I
+"""
+import re
+from typing import Iterable, List, Optional
+
+from domain.text import normalize_text
+
+# Porte: ME, EPP, MEI, microempresa, empresa de pequeno porte — e a própria LC 123
+_SIZE = (
+    r"(?:\b(?:me|epps?|mei|microempresas?|microempreendedor(?:es)?"
+    r"|empresas?\s+de\s+pequeno\s+porte|pequenas\s+empresas)\b"
+    r"|\b(?:lc|lei\s+complementar)\s*(?:n\W{0,2}\s*)?123\b)"
+)
+_EXCLUSIVE = r"\bexclusiv(?:[ao]s?|idade)\b"
+# Até N palavras entre os dois termos, em qualquer ordem
+_NEAR = r"(?:\W+\w+){0,8}?\W+"
+
+_ART_48 = r"\bart(?:igo)?\W{0,2}\s*48\W{0,3}\s*(?:inciso\s+)?"
+
+PARTIAL = re.compile("|".join([
+    r"\bcotas?\s+(?:reservadas?|principal|de\s+(?:ate\s+)?25\b)",
+    rf"\bcotas?\b{_NEAR}{_SIZE}",
+    rf"\b(?:itens|lotes|grupos)\s+(?:\w+\s+){{0,3}}?{_EXCLUSIVE}",
+    rf"{_EXCLUSIVE}{_NEAR}(?:\w+\W+){{0,3}}?ampla\s+(?:concorrencia|participacao)",
+    rf"{_ART_48}iii\b",
+]))
+EXCLUSIVE = re.compile("|".join([
+    rf"{_EXCLUSIVE}{_NEAR}{_SIZE}",
+    rf"{_SIZE}{_NEAR}{_EXCLUSIVE}",
+    rf"{_ART_48}i\b",
+]))
+
+
+class MeEppClassifier:
+    @staticmethod
+    def classify(texto: Optional[str], normalized: bool = False) -> str:
+        """Participação ME/EPP de um texto (objeto ou edital)."""
+        if not texto:
+            return "nao"
+        if not normalized:
+            texto = normalize_text(texto)
+        if PARTIAL.search(texto):
+            return "parcial"
+        if EXCLUSIVE.search(texto):
+            return "exclusivo"
+        return "nao"
+
+    @staticmethod
+    def classify_many(textos: Iterable[Optional[str]], normalized: bool = False) -> List[str]:
+        """`classify` de uma página inteira (etapa em lote da ingestão)."""
+        return [MeEppClassifier.classify(texto, normalized=normalized) for texto in textos]
+
+    @staticmethod
+    def merge(*labels: Optional[str]) -> str:
+        """Combina rótulos de fontes diferentes (flag da API, objeto, edital): o mais específico ganha."""
+        for label in ("exclusivo", "parcial"):
+            if label in labels:
+                return label
+        return "nao"
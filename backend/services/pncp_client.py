@@ -1,19 +1,48 @@
+import asyncio
 import httpx
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
 from core.config import settings
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from domain.models import Licitacao, LicitacaoCreate, LicitacaoItem, EditalVersion, MODALIDADE_MAP
-from services.filter_engine import FilterEngine
+from domain.models import Licitacao, LicitacaoCreate, LicitacaoItem, EditalVersion
+from domain.enums import MODALIDADE_MAP, MODO_DISPUTA_MAP, SyncStrategy
+from infra.licitacao_repository import LicitacaoRepository
+from services.dead_letter_service import DeadLetterService
+from services.ingestion_pipeline import IngestionPipeline, Page, SourceAdapter, map_item
+from services.sync_state_service import SyncStateService
+from services.sync_tracker import timed, track
 
 logger = logging.getLogger("uvicorn")
 
 class PNCPClient:
-    def __init__(self):
-        self.base_url = "https://pncp.gov.br/api/consulta/v1" # Base oficial (verificado)
-        self.client = httpx.AsyncClient(timeout=30.0)
+    # 2: Leilão, 6: Pregão, 7: Diálogo, 8: Dispensa, 9: Inexigibilidade, 12: IRP, 13: Concorrência
+    MODALITIES = ["2", "6", "7", "8", "9", "12", "13"]
+    # Modalidades com fase de propostas (sem Dispensa e Inexigibilidade)
+    OPEN_MODALITIES = ["2", "6", "7", "12", "13"]
+    # Chaves dos watermarks em sync_state
+    SYNC_SOURCE = "pncp_publicacao"
+    UPDATES_SYNC_SOURCE = "pncp_atualizacao"
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        concurrency: Optional[int] = None,
+        states: Optional[List[str]] = None,
+    ):
+        self.base_url = settings.PNCP_CONSULTA_URL # Base oficial (verificado)
+        self.concurrency = concurrency or settings.PNCP_CONCURRENCY
+        # UFs varridas por este client (padrão: TARGET_UFS; um shard do sync passa um subconjunto)
+        self.states = [uf.upper() for uf in (states or settings.TARGET_UFS)]
+        self.page_size = 50
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
 
     async def fetch_items(self, session: AsyncSession, licitacao_id: int) -> List[LicitacaoItem]:
         """
@@ -44,7 +73,7 @@ class PNCPClient:
 
         # Try PNCP-API first (Internal API - more reliable for items)
         # Format: https://pncp.gov.br/pncp-api/v1/orgaos/{cnpj}/compras/{ano}/{seq}/itens
-        internal_api_url = "https://pncp.gov.br/pncp-api/v1"
+        internal_api_url = settings.PNCP_API_URL
         
         # Try variants: raw integer and string (for padding support)
         # Using dict.fromkeys to keep order and remove duplicates
@@ -176,7 +205,8 @@ class PNCPClient:
         return []
 
     async def close(self):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
     async def fetch_edital_versions(self, pncp_id: str) -> list:
         """
@@ -191,7 +221,7 @@ class PNCPClient:
         except Exception:
             return []
 
-        url = f"https://pncp.gov.br/pncp-api/v1/orgaos/{cnpj}/compras/{ano}/{seq}/arquivos"
+        url = f"{settings.PNCP_API_URL}/orgaos/{cnpj}/compras/{ano}/{seq}/arquivos"
         try:
             response = await self.client.get(url)
             if response.status_code != 200:
@@ -226,167 +256,530 @@ class PNCPClient:
         latest_versao = versions[0].get('versao', 0)
         return latest_versao > (versao_atual or 0)
 
-    async def fetch_and_process(self, session: AsyncSession, days: int = 3):
+    @staticmethod
+    def build_pncp_id(item: dict) -> str:
+        """Chave natural PNCP: CNPJ-ANO-SEQUENCIAL."""
+        cnpj = item.get('orgaoEntidade', {}).get('cnpj')
+        return f"{cnpj}-{item.get('anoCompra')}-{item.get('sequencialCompra')}"
+
+    @staticmethod
+    def parse_tracked_fields(item: dict) -> dict:
         """
-        Busca licitações dos últimos X dias para MA, PI, PA.
-        Expande para mais modalidades e implementa PAGINAÇÃO completa.
+        Extrai os campos que o órgão pode retificar depois da publicação
+        (prazos, valor, modalidade e modo de disputa). Usado tanto na carga
+        inicial quanto no feed de atualizações.
         """
-        states = ["MA", "PI", "PA"]
-        # 2: Leilão, 6: Pregão, 7: Diálogo, 8: Dispensa, 9: Inexigibilidade, 12: IRP, 13: Concorrência
-        modalities = ["2", "6", "7", "8", "9", "12", "13"] 
-        
+        cod_modal = item.get('codigoModalidadeContratacao')
+        modo_id = item.get('modoDisputaId') or item.get('codigoModoDisputa')
+
+        data_abertura_str = item.get('dataAberturaProposta')
+        data_encerramento_str = item.get('dataEncerramentoProposta')
+        data_abertura = datetime.fromisoformat(data_abertura_str) if data_abertura_str else None
+        data_encerramento = datetime.fromisoformat(data_encerramento_str) if data_encerramento_str else None
+
+        valor = item.get('valorTotalEstimado')
+
+        return {
+            "data_abertura_proposta": data_abertura,
+            "data_encerramento_proposta": data_encerramento,
+            "data_limite_impugnacao": (data_abertura - timedelta(days=3)) if data_abertura else None,
+            "data_limite_esclarecimento": (data_abertura - timedelta(days=3)) if data_abertura else None,
+            "modalidade": MODALIDADE_MAP.get(cod_modal, f"Modalidade {cod_modal}" if cod_modal else None),
+            "modalidade_codigo": cod_modal,
+            "modo_disputa": MODO_DISPUTA_MAP.get(modo_id),
+            "valor_estimado_total": float(valor) if valor is not None else None,
+        }
+
+    async def _fetch_page(
+        self, semaphore: asyncio.Semaphore, url: str, params: dict, page: int,
+        errors: Optional[Dict[int, str]] = None,
+    ) -> Optional[dict]:
+        """
+        Busca uma única página do PNCP respeitando o limite de concorrência.
+        Retorna None em caso de erro (já logado; a mensagem vai em `errors[page]`).
+        """
+        uf = params.get("uf")
+        mod = params.get("codigoModalidadeContratacao")
+        try:
+            async with semaphore:
+                logger.info(f"Fetching PNCP for {uf} (Mod {mod}) - Pag {page}...")
+                with timed("fetch"):
+                    response = await self.client.get(url, params={**params, "pagina": str(page)})
+
+            if response.status_code == 204:
+                track("fetch", pages=1)
+                return {"data": [], "totalPaginas": 0}  # PNCP responde 204 quando não há registros
+            if response.status_code != 200:
+                # Retries/backoff já foram feitos pelo transporte (infra/resilience.py);
+                # a página fica como falha e o watermark da combinação não avança.
+                logger.error(f"Error fetching {uf}-{mod} (pag {page}): {response.status_code}")
+                track("fetch", error=f"HTTP {response.status_code} em {uf}-{mod} pag {page}")
+                if errors is not None:
+                    errors[page] = f"HTTP {response.status_code}"
+                return None
+
+            data = response.json()
+            track("fetch", pages=1, bytes=len(response.content), records_seen=len(data.get("data") or []))
+            return data
+        except Exception as e:
+            logger.error(f"Exception fetching {uf} mod {mod} (pag {page}): {e}")
+            track("fetch", error=f"{type(e).__name__} em {uf}-{mod} pag {page}: {e}")
+            if errors is not None:
+                errors[page] = f"{type(e).__name__}: {e}"
+            return None
+
+    async def fetch_feed_page(
+        self, endpoint: str, uf: str, modalidade: str, start_str: str, end_str: str, page: int,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        errors: Optional[Dict[int, str]] = None,
+    ) -> Optional[dict]:
+        """
+        Uma página de `contratacoes/<endpoint>` para (UF, modalidade, janela).
+        None em caso de erro. `start_str` vazio omite a dataInicial (feed de propostas).
+        """
+        params = {
+            "dataFinal": end_str,
+            "uf": uf,
+            "codigoModalidadeContratacao": modalidade,
+            "tamanhoPagina": str(self.page_size),
+        }
+        if start_str:
+            params["dataInicial"] = start_str
+        semaphore = semaphore or asyncio.Semaphore(self.concurrency)
+        return await self._fetch_page(semaphore, f"{self.base_url}/contratacoes/{endpoint}", params, page, errors)
+
+    async def fetch_publicacao_page(
+        self, uf: str, modalidade: str, start_str: str, end_str: str, page: int,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Optional[dict]:
+        """Uma página de `contratacoes/publicacao` para (UF, modalidade, janela). None em caso de erro."""
+        return await self.fetch_feed_page("publicacao", uf, modalidade, start_str, end_str, page, semaphore)
+
+    async def _fetch_combo(
+        self, semaphore: asyncio.Semaphore, url: str, params: dict, start_page: int = 1
+    ) -> "ComboResult":
+        """
+        Busca todas as páginas de uma combinação (UF, modalidade).
+        A primeira página informa `totalPaginas`; as seguintes são buscadas em paralelo.
+        """
+        combo = ComboResult(
+            params["uf"], params["codigoModalidadeContratacao"], params.get("dataInicial", ""),
+            window_end=params["dataFinal"],
+        )
+
+        first = await self._fetch_page(semaphore, url, params, start_page, combo.errors)
+        if first is None:
+            combo.failed_pages.append(start_page)
+            return combo
+        if not first.get("data"):
+            return combo
+        combo.pages.append((start_page, first["data"]))
+
+        total_paginas = first.get("totalPaginas", start_page) or start_page
+        next_pages = range(start_page + 1, total_paginas + 1)
+        rest = await asyncio.gather(*(
+            self._fetch_page(semaphore, url, params, page, combo.errors) for page in next_pages
+        ))
+        for page, data in zip(next_pages, rest):
+            if data is None:
+                combo.failed_pages.append(page)
+            else:
+                combo.pages.append((page, data.get("data", [])))
+        return combo
+
+    async def iter_combos(
+        self,
+        start_str: str,
+        end_str: str,
+        states: Optional[List[str]] = None,
+        modalities: Optional[List[str]] = None,
+        plan: Optional[Dict[Tuple[str, str], Tuple[str, int]]] = None,
+        endpoint: str = "publicacao",
+    ) -> AsyncIterator["ComboResult"]:
+        """
+        Motor de busca concorrente do PNCP.
+
+        Busca as combinações (UF, modalidade) em paralelo, com no máximo
+        `self.concurrency` requisições em voo no client compartilhado, e entrega os
+        resultados na ordem determinística (UF, modalidade) — assim quem consome
+        persiste de forma ordenada enquanto o restante ainda está sendo baixado.
+        Só 2 x `concurrency` combinações ficam adiantadas em relação ao consumidor:
+        se ele atrasa (backpressure do pipeline), o download espera.
+
+        `plan` permite sobrescrever, por combinação, a dataInicial e a página
+        inicial (usado pela sincronização incremental). `endpoint` escolhe o feed
+        de `/contratacoes/` ("publicacao", "atualizacao" ou "proposta").
+        """
+        states = states or self.states
+        modalities = modalities or self.MODALITIES
+        plan = plan or {}
+        url = f"{self.base_url}/contratacoes/{endpoint}"
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        def combo_requests():
+            for uf in states:
+                for mod in modalities:
+                    combo_start, start_page = plan.get((uf, mod), (start_str, 1))
+                    params = {
+                        "dataFinal": end_str,
+                        "uf": uf,
+                        "codigoModalidadeContratacao": mod,
+                        "tamanhoPagina": str(self.page_size),
+                    }
+                    # O feed de propostas abertas só aceita dataFinal (fim do recebimento)
+                    if endpoint != "proposta":
+                        params["dataInicial"] = combo_start
+                    yield params, start_page
+
+        requests = combo_requests()
+        tasks: deque = deque()
+
+        def start_next():
+            request = next(requests, None)
+            if request is not None:
+                tasks.append(asyncio.create_task(self._fetch_combo(semaphore, url, *request)))
+
+        for _ in range(2 * self.concurrency):
+            start_next()
+        try:
+            while tasks:
+                combo = await tasks.popleft()
+                start_next()
+                yield combo
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iter_pages(
+        self,
+        start_str: str,
+        end_str: str,
+        states: Optional[List[str]] = None,
+        modalities: Optional[List[str]] = None,
+    ) -> AsyncIterator[Tuple[str, str, int, list]]:
+        """Versão achatada de `iter_combos`: entrega (UF, modalidade, página, registros)."""
+        async for combo in self.iter_combos(start_str, end_str, states, modalities):
+            for page, items in combo.pages:
+                yield combo.uf, combo.modalidade, page, items
+
+    @staticmethod
+    def normalize_item(item: dict, uf: str) -> dict:
+        """
+        Campos da Licitacao a partir de um registro de `contratacoes/*`, sem
+        classificação (status, score e ME/EPP pelo texto ficam com o pipeline).
+        """
+        # Mapeamento de campos (API v1/contratacoes/publicacao)
+        cnpj = item.get('orgaoEntidade', {}).get('cnpj')
+        ano = item.get('anoCompra')
+        sequencial = item.get('sequencialCompra')
+
+        # Data de publicação
+        data_pub_str = item.get('dataPublicacaoPncp')
+        data_publicacao = datetime.fromisoformat(data_pub_str) if data_pub_str else datetime.utcnow()
+
+        return dict(
+            pncp_id=PNCPClient.build_pncp_id(item),
+            numero=str(item.get('numeroCompra', sequencial)),
+            ano=ano,
+            titulo=item.get("objetoCompra", "Sem objeto"),
+            orgao_nome=item.get('orgaoEntidade', {}).get('razaoSocial', 'Desconhecido'),
+            orgao_cnpj=cnpj,
+            estado_sigla=uf,
+            cidade=item.get('unidadeOrgao', {}).get('municipioNome'),
+            data_publicacao=data_publicacao,
+            link_edital=f"https://pncp.gov.br/app/editais/{cnpj}/{ano}/{sequencial}",
+            srp=bool(item.get('srp', False)),
+            # Flag oficial de exclusividade; sem ela o pipeline decide pelo texto do objeto
+            me_epp_status="exclusivo" if item.get('exclusivoMeEpp') else None,
+            # Modalidade, modo de disputa, prazos e valor (campos retificáveis)
+            **PNCPClient.parse_tracked_fields(item)
+        )
+
+    @staticmethod
+    def map_item(item: dict, uf: str) -> Optional[dict]:
+        """
+        normalize + classify de um registro de `contratacoes/publicacao`, sem I/O
+        (usado pelo replay do arquivo bruto, ver services/replay_service.py).
+        None se o registro não passa no filtro geográfico.
+        """
+        return map_item(PNCPFeedAdapter(None), item, Page(items=[], uf=uf))
+
+    async def persist_page(self, session: AsyncSession, uf: str, items: list) -> int:
+        """
+        Uma página avulsa de `contratacoes/publicacao` (backfill, dead-letter) pelos
+        mesmos estágios do pipeline: arquivo bruto, normalize/classify e gravação. Não faz commit.
+        """
+        adapter = PNCPFeedAdapter(self, "publicacao")
+        page = IngestionPipeline.prepare(adapter, Page(items=items, uf=uf))
+        new, _ = await IngestionPipeline.write(session, adapter, [page])
+        return new
+
+    def page_handler(self, endpoint: str) -> Callable[[AsyncSession, str, list], Awaitable[int]]:
+        """Quem grava uma página de cada feed de `/contratacoes/` (usado também pelo dead-letter)."""
+        return self.apply_updates_page if endpoint == "atualizacao" else self.persist_page
+
+    async def apply_updates_page(self, session: AsyncSession, uf: str, items: list) -> int:
+        """Aplica em lote uma página avulsa de `contratacoes/atualizacao`. Não faz commit."""
+        adapter = PNCPFeedAdapter(self, "atualizacao")
+        page = IngestionPipeline.prepare(adapter, Page(items=items, uf=uf))
+        _, updated = await IngestionPipeline.write(session, adapter, [page])
+        return updated
+
+    @staticmethod
+    def _max_timestamp(items: list, fields: Tuple[str, ...]) -> Optional[datetime]:
+        """Maior timestamp da página, usando o primeiro campo presente em cada registro."""
+        dates = []
+        for item in items:
+            value = next((item[f] for f in fields if item.get(f)), None)
+            if value:
+                dates.append(datetime.fromisoformat(value))
+        return max(dates) if dates else None
+
+    async def _crawl(
+        self,
+        session: AsyncSession,
+        *,
+        endpoint: str,
+        source: str,
+        days: int,
+        incremental: bool,
+        watermark_fields: Tuple[str, ...],
+        modalities: Optional[List[str]] = None,
+        end_date: Optional[datetime] = None,
+    ) -> int:
+        """
+        Percorre um feed de `/contratacoes/` para todas as UF/modalidades.
+
+        Com `incremental=True`, cada combinação pede ao PNCP apenas o delta desde
+        o seu watermark (ver SyncStateService); sem watermark — ou com
+        `incremental=False` — usa a janela completa dos últimos `days` dias.
+        As páginas são baixadas em paralelo (ver `iter_combos`) e atravessam o
+        IngestionPipeline (normalize/classify e gravação em lote). O watermark de
+        uma combinação só avança quando todas as suas páginas foram gravadas; as
+        que falharam vão para o dead-letter (ver PNCPFeedAdapter).
+        Retorna quantas licitações o feed alterou: inseridas (publicacao,
+        proposta) ou retificadas (atualizacao) — não a soma das duas.
+        """
+        modalities = modalities or self.MODALITIES
+
         # Data Window (Dynamic)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        start_date = datetime.now() - timedelta(days=days)
+        end_date = end_date or datetime.now()
         
         start_str = start_date.strftime("%Y%m%d")
         end_str = end_date.strftime("%Y%m%d")
-        
-        count_new = 0
-        
-        for uf in states:
-            for mod in modalities:
-                page = 1
-                while True:
-                    try:
-                        # Endpoint correto: /contratacoes/publicacao
-                        url = f"{self.base_url}/contratacoes/publicacao"
-                        params = {
-                            "dataInicial": start_str,
-                            "dataFinal": end_str,
-                            "uf": uf,
-                            "codigoModalidadeContratacao": mod,
-                            "pagina": str(page),
-                            "tamanhoPagina": "50"
-                        }
-                        
-                        logger.info(f"Fetching PNCP for {uf} (Mod {mod}) - Pag {page}...")
-                        response = await self.client.get(url, params=params)
-                        
-                        if response.status_code != 200:
-                            logger.error(f"Error fetching {uf}-{mod}: {response.status_code}")
-                            break
-                            
-                        data = response.json()
-                        items = data.get("data", [])
-                        total_paginas = data.get("totalPaginas", 1)
-                        
-                        if not items:
-                            break
-                        
-                        for item in items:
-                            # Mapeamento de campos (API v1/contratacoes/publicacao)
-                            cnpj = item.get('orgaoEntidade', {}).get('cnpj')
-                            ano = item.get('anoCompra')
-                            sequencial = item.get('sequencialCompra')
-                            
-                            pncp_id = f"{cnpj}-{ano}-{sequencial}"
-                            
-                            existing = await session.exec(select(Licitacao).where(Licitacao.pncp_id == pncp_id))
-                            if existing.first():
-                                continue
-
-                            # Extrai dados básicos
-                            titulo = item.get("objetoCompra", "Sem objeto")
-
-                            # Modalidade e Modo de Disputa
-                            cod_modal = item.get('codigoModalidadeContratacao')
-                            modalidade_texto = MODALIDADE_MAP.get(cod_modal, f"Modalidade {cod_modal}" if cod_modal else None)
-                            modo_id = item.get('modoDisputaId') or item.get('codigoModoDisputa')
-                            
-                            modo_disputa = None
-                            if modo_id == 1: modo_disputa = "aberto"
-                            elif modo_id == 2: modo_disputa = "fechado"
-                            elif modo_id == 3: modo_disputa = "aberto/fechado"
-                            elif modo_id == 4: modo_disputa = "fechado/aberto"
-
-                            # SRP
-                            srp = bool(item.get('srp', False))
-
-                            # ME/EPP Exclusivity
-                            me_epp_status = "nao"
-                            is_total = bool(item.get('exclusivoMeEpp', False))
-                            titulo_upper = titulo.upper()
-                            
-                            if is_total or ("EXCLUSIVO" in titulo_upper and ("ME" in titulo_upper or "EPP" in titulo_upper)):
-                                me_epp_status = "exclusivo"
-                            elif ("COTA" in titulo_upper or "PARCIAL" in titulo_upper or "ITENS" in titulo_upper) and ("ME" in titulo_upper or "EPP" in titulo_upper):
-                                me_epp_status = "parcial"
-
-                            # Datas
-                            data_pub_str = item.get('dataPublicacaoPncp')
-                            data_abertura_str = item.get('dataAberturaProposta')
-                            data_encerramento_str = item.get('dataEncerramentoProposta')
-                            
-                            data_publicacao = datetime.fromisoformat(data_pub_str) if data_pub_str else datetime.utcnow()
-                            data_abertura = datetime.fromisoformat(data_abertura_str) if data_abertura_str else None
-                            data_encerramento = datetime.fromisoformat(data_encerramento_str) if data_encerramento_str else None
-                            
-                            data_limite_impug = (data_abertura - timedelta(days=3)) if data_abertura else None
-                            data_limite_escl = (data_abertura - timedelta(days=3)) if data_abertura else None
-
-                            # 1. Filtro Geográfico
-                            if not FilterEngine.check_geographic(uf):
-                                continue
-
-                            # 2. Filtro Semântico (Whitelist/Blacklist)
-                            if not FilterEngine.check_semantic(titulo):
-                                status = "rejeitado"
-                                reason = "Blacklist/Not Whitelisted"
-                            else:
-                                status = "recebido"
-                                reason = None
-
-                            # 3. Gatekeeper (ME/EPP) - Logic now respects if we WANT or NOT ME/EPP
-                            # For now, let's keep the filter engine logic but store the flag
-                            allowed, gate_reason = FilterEngine.check_gatekeeper(titulo)
-                            if not allowed:
-                                status = "rejeitado"
-                                reason = gate_reason
-
-                            # 4. Smart Prioritization
-                            priority, score = FilterEngine.calculate_priority(titulo)
-
-                            new_licitacao = Licitacao(
-                                pncp_id=pncp_id,
-                                numero=str(item.get('numeroCompra', sequencial)),
-                                ano=ano,
-                                titulo=titulo,
-                                orgao_nome=item.get('orgaoEntidade', {}).get('razaoSocial', 'Desconhecido'),
-                                orgao_cnpj=cnpj,
-                                estado_sigla=uf,
-                                cidade=item.get('unidadeOrgao', {}).get('municipioNome'),
-                                data_publicacao=data_publicacao,
-                                data_abertura_proposta=data_abertura,
-                                data_encerramento_proposta=data_encerramento,
-                                data_limite_impugnacao=data_limite_impug,
-                                data_limite_esclarecimento=data_limite_escl,
-                                link_edital=f"https://pncp.gov.br/app/editais/{cnpj}/{ano}/{sequencial}",
-                                modalidade=modalidade_texto,
-                                modalidade_codigo=cod_modal,
-                                modo_disputa=modo_disputa,
-                                srp=srp,
-                                me_epp_status=me_epp_status,
-                                status=status,
-                                rejection_reason=reason,
-                                priority=priority,
-                                score=score,
-                                valor_estimado_total=float(item.get('valorTotalEstimado', 0.0))
-                            )
-                            
-                            session.add(new_licitacao)
-                            count_new += 1
-                        
-                        await session.commit()
-                        
-                        if page >= total_paginas:
-                            break
-                        page += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Exception fetching {uf} mod {mod}: {e}")
-                        break
-                
-        return count_new
 
+        plan = None
+        if incremental:
+            states = await SyncStateService.load(session, source)
+            plan = {
+                (uf, mod): SyncStateService.plan_window(states.get((uf, mod)), start_date)
+                for uf in self.states for mod in modalities
+            }
+
+        adapter = PNCPFeedAdapter(
+            self, endpoint,
+            source=source, start_str=start_str, end_str=end_str, modalities=modalities,
+            plan=plan, incremental=incremental, watermark_fields=watermark_fields,
+        )
+        new, updated = await IngestionPipeline.run(session, adapter)
+        return updated if endpoint == "atualizacao" else new
+
+    async def fetch_and_process(
+        self,
+        session: AsyncSession,
+        days: int = 3,
+        incremental: bool = True,
+        strategy: Optional[str] = None,
+    ):
+        """
+        Busca licitações novas nas UFs do client (`self.states`) e retorna quantas
+        foram inseridas (só as novas; os chamadores registram o valor como "novas").
+
+        `strategy` (padrão: PNCP_SYNC_STRATEGY) escolhe a estratégia:
+        - "publicacao": varre o feed de publicação por data (ver `_crawl` para
+          janela e watermarks);
+        - "proposta_aberta": consulta só as contratações com recebimento de
+          propostas ainda aberto (ver `fetch_open_proposals`).
+        """
+        strategy = SyncStrategy(strategy or settings.PNCP_SYNC_STRATEGY)
+        if strategy == SyncStrategy.PROPOSTA_ABERTA:
+            return await self.fetch_open_proposals(session)
+
+        return await self._crawl(
+            session,
+            endpoint="publicacao",
+            source=self.SYNC_SOURCE,
+            days=days,
+            incremental=incremental,
+            watermark_fields=("dataPublicacaoPncp",),
+        )
+
+    async def fetch_open_proposals(self, session: AsyncSession, horizon_days: Optional[int] = None):
+        """
+        Ingestão restrita a licitações acionáveis: usa a consulta "contratações com
+        recebimento de propostas aberto" do PNCP, com `dataFinal` = hoje + horizonte.
+        Fecha a porta para dispensas/inexigibilidades e para o que já encerrou.
+        O resultado é um retrato do que está aberto agora, então não usa watermark.
+        """
+        horizon_days = horizon_days or settings.PNCP_PROPOSTA_HORIZON_DAYS
+        return await self._crawl(
+            session,
+            endpoint="proposta",
+            source=self.SYNC_SOURCE,
+            days=0,
+            incremental=False,
+            watermark_fields=("dataPublicacaoPncp",),
+            modalities=self.OPEN_MODALITIES,
+            end_date=datetime.now() + timedelta(days=horizon_days),
+        )
+
+    async def fetch_updates(self, session: AsyncSession, days: int = 3, incremental: bool = True):
+        """
+        Lê o feed `contratacoes/atualizacao` e aplica retificações (prazos, valor,
+        modalidade) nas licitações já gravadas, marcando `edital_atualizado`.
+        Retorna quantas licitações foram alteradas.
+        """
+        return await self._crawl(
+            session,
+            endpoint="atualizacao",
+            source=self.UPDATES_SYNC_SOURCE,
+            days=days,
+            incremental=incremental,
+            watermark_fields=("dataAtualizacaoGlobal", "dataAtualizacao"),
+        )
+
+
+@dataclass
+class ComboResult:
+    """Resultado da busca de uma combinação (UF, modalidade) do PNCP."""
+    uf: str
+    modalidade: str
+    window_start: str
+    window_end: str = ""
+    pages: List[Tuple[int, list]] = field(default_factory=list)
+    failed_pages: List[int] = field(default_factory=list)
+    # Página -> mensagem de erro da busca (alimenta o dead-letter)
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def complete(self) -> bool:
+        return not self.failed_pages
+
+
+class PNCPFeedAdapter(SourceAdapter):
+    """
+    Um feed de `/contratacoes/` (publicacao, proposta ou atualizacao) como fonte
+    do IngestionPipeline. Além de buscar e normalizar, controla o fim de cada
+    combinação (UF, modalidade): avança o watermark se todas as páginas foram
+    gravadas, senão manda as que falharam para o dead-letter.
+    Com `client=None` serve só para normalize/classify (replay).
+    """
+    archive_source = "pncp"
+
+    def __init__(
+        self,
+        client: Optional[PNCPClient],
+        endpoint: str = "publicacao",
+        *,
+        source: str = PNCPClient.SYNC_SOURCE,
+        start_str: str = "",
+        end_str: str = "",
+        modalities: Optional[List[str]] = None,
+        plan: Optional[Dict[Tuple[str, str], Tuple[str, int]]] = None,
+        incremental: bool = False,
+        watermark_fields: Tuple[str, ...] = ("dataPublicacaoPncp",),
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.name = f"pncp/{endpoint}"
+        self.source = source
+        self.start_str = start_str
+        self.end_str = end_str
+        self.modalities = modalities
+        self.plan = plan
+        self.incremental = incremental
+        self.watermark_fields = watermark_fields
+        # O feed de atualização só retifica licitações já gravadas: nada a classificar
+        self.classify = endpoint != "atualizacao"
+        # Combinação -> (páginas com falha {página: erro}, maior timestamp gravado)
+        self._failures: Dict[Tuple[str, str], Dict[int, str]] = {}
+        self._last_seen: Dict[Tuple[str, str], datetime] = {}
+
+    async def pages(self) -> AsyncIterator[Page]:
+        async for combo in self.client.iter_combos(
+            self.start_str, self.end_str, modalities=self.modalities, plan=self.plan, endpoint=self.endpoint
+        ):
+            self._failures[(combo.uf, combo.modalidade)] = {
+                page: combo.errors.get(page, "Falha na busca") for page in combo.failed_pages
+            }
+            for page, items in combo.pages:
+                yield Page(items=items, uf=combo.uf, key=(combo, page))
+            # Marcador: depois dele a combinação está inteira gravada (ou falhou)
+            yield Page(items=[], uf=combo.uf, key=(combo, None), final=True)
+
+    def normalize(self, item: dict, page: Page) -> Optional[dict]:
+        if self.endpoint == "atualizacao":
+            return {"pncp_id": PNCPClient.build_pncp_id(item), **PNCPClient.parse_tracked_fields(item)}
+        return PNCPClient.normalize_item(item, page.uf)
+
+    def natural_id(self, item: dict) -> str:
+        return PNCPClient.build_pncp_id(item)
+
+    def published(self, item: dict) -> Optional[str]:
+        return item.get("dataPublicacaoPncp")
+
+    async def persist(self, session: AsyncSession, rows: List[dict]) -> Tuple[int, int]:
+        if self.endpoint != "atualizacao":
+            return await super().persist(session, rows)
+        updates = {row.pop("pncp_id"): row for row in rows}
+        return 0, await LicitacaoRepository.bulk_apply_updates(session, updates)
+
+    async def on_committed(self, session: AsyncSession, pages: List[Page]):
+        checkpoints: Dict[Tuple[str, str], Tuple["ComboResult", int]] = {}
+        for page in pages:
+            combo, number = page.key
+            key = (combo.uf, combo.modalidade)
+            page_seen = PNCPClient._max_timestamp(page.items, self.watermark_fields)
+            if page_seen and (key not in self._last_seen or page_seen > self._last_seen[key]):
+                self._last_seen[key] = page_seen
+            if page.final:
+                checkpoints.pop(key, None)
+                await self._finish_combo(session, combo)
+            elif number is not None:
+                checkpoints[key] = (combo, number)
+
+        if not self.incremental:
+            return
+        # Checkpoint da janela em andamento: uma execução interrompida retoma daqui.
+        # Com alguma página anterior falhada (ainda fora do dead-letter), não avança.
+        for key, (combo, number) in checkpoints.items():
+            if not self._failures.get(key):
+                await SyncStateService.advance(
+                    session, self.source, combo.uf, combo.modalidade, combo.window_start, None, last_page=number,
+                )
+
+    async def on_failed(self, session: AsyncSession, pages: List[Page], error: str):
+        for page in pages:
+            combo, number = page.key
+            if number is not None:
+                self._failures[(combo.uf, combo.modalidade)][number] = f"Erro ao gravar: {error}"
+                track("write", error=f"{self.endpoint} {combo.uf}-{combo.modalidade} pag {number}: {error}")
+        for page in pages:
+            if page.final:
+                await self._finish_combo(session, page.key[0])
 
+    async def _finish_combo(self, session: AsyncSession, combo: "ComboResult"):
+        key = (combo.uf, combo.modalidade)
+        failures = self._failures.pop(key, {})
+        last_seen = self._last_seen.pop(key, None)
+        if failures:
+            # Só as páginas que falharam vão para o dead-letter (re-busca direcionada)
+            await DeadLetterService.record_combo(session, self.endpoint, combo, failures)
+            return
+        await DeadLetterService.supersede(session, self.endpoint, combo)
+        if self.incremental:
+            # Combinação inteira gravada: sem checkpoint, a próxima janela começa da página 1
+            await SyncStateService.advance(
+                session, self.source, combo.uf, combo.modalidade, combo.window_start, last_seen,
+            )
@@ -0,0 +1,112 @@
+"""
+Arquivo bruto — o JSON original de cada registro dos upstreams, comprimido.
+
+A ingestão grava o payload de todo registro visto (PNCP: feeds de publicação e
+de atualização; ComprasNet) antes de mapear/filtrar, em `raw_payload`, uma linha
+por (fonte, chave natural) com a versão mais recente. Quando o mapeamento, o
+FilterEngine ou o score mudam, services/replay_service.py reprocessa o arquivo
+inteiro localmente, sem nenhuma requisição ao upstream.
+
+Cada payload é comprimido isoladamente (zstd se o pacote 'zstandard' estiver
+instalado, senão zlib), então o replay pode descomprimir em paralelo.
+"""
+import hashlib
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import RawPayload
+from infra.config import settings
+
+try:
+    import zstandard
+except ImportError:  # opcional: sem ele o arquivo usa zlib
+    zstandard = None
+
+logger = logging.getLogger("RawArchive")
+
+# 8 colunas x 500 linhas fica bem abaixo do limite de parâmetros do asyncpg
+ARCHIVE_CHUNK_SIZE = 500
+
+
+def active_codec() -> str:
+    if settings.RAW_ARCHIVE_CODEC == "zstd" and zstandard is not None:
+        return "zstd"
+    return "zlib"
+
+
+def encode(item: dict, codec: Optional[str] = None) -> Tuple[str, str, bytes]:
+    """JSON canônico -> (codec, sha1, bytes comprimidos)."""
+    codec = codec or active_codec()
+    raw = json.dumps(item, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode()
+    digest = hashlib.sha1(raw).hexdigest()
+    if codec == "zstd":
+        return codec, digest, zstandard.ZstdCompressor(level=3).compress(raw)
+    return "zlib", digest, zlib.compress(raw, 6)
+
+
+def decode(codec: str, payload: bytes) -> dict:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Payload em zstd, mas o pacote 'zstandard' não está instalado")
+        return json.loads(zstandard.ZstdDecompressor().decompress(payload))
+    return json.loads(zlib.decompress(payload))
+
+
+def _published_on(value: Optional[str]) -> date:
+    if value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+        except ValueError:
+            pass
+    return date.today()
+
+
+class RawArchiveService:
+    @staticmethod
+    async def store(
+        session: AsyncSession,
+        source: str,
+        entries: Iterable[Tuple[str, str, Optional[str], dict]],
+    ) -> int:
+        """
+        Grava (chave natural, UF, data de publicação ISO, registro) de uma página.
+        Upsert: só regrava quando o conteúdo mudou. Não faz commit.
+        """
+        if not settings.RAW_ARCHIVE_ENABLED:
+            return 0
+
+        codec = active_codec()
+        now = datetime.utcnow()
+        rows = {}
+        for natural_id, uf, published, item in entries:
+            codec_used, digest, payload = encode(item, codec)
+            # Última ocorrência vence: o ON CONFLICT não aceita a mesma chave duas vezes no lote
+            rows[natural_id] = {
+                "source": source, "natural_id": natural_id, "uf": uf,
+                "published_on": _published_on(published), "codec": codec_used,
+                "content_hash": digest, "payload": payload, "fetched_at": now,
+            }
+
+        values: List[dict] = list(rows.values())
+        for i in range(0, len(values), ARCHIVE_CHUNK_SIZE):
+            stmt = pg_insert(RawPayload).values(values[i:i + ARCHIVE_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["source", "natural_id"],
+                set_={
+                    "uf": stmt.excluded.uf,
+                    "published_on": stmt.excluded.published_on,
+                    "codec": stmt.excluded.codec,
+                    "content_hash": stmt.excluded.content_hash,
+                    "payload": stmt.excluded.payload,
+                    "fetched_at": stmt.excluded.fetched_at,
+                },
+                where=RawPayload.content_hash != stmt.excluded.content_hash,
+            )
+            await session.execute(stmt)
+        return len(values)
@@ -0,0 +1,111 @@
+"""
+Classificador de relevância — regressão logística sobre n-gramas do título
+(hashing trick), treinada com as decisões do kanban (ver RelevanceService).
+
+Sem dependências nem serviço externo: o título normalizado vira uma lista de
+índices (unigramas + bigramas, crc32 módulo 2**RELEVANCE_HASH_BITS) e a
+predição é a soma dos pesos desses índices, então uma página inteira custa
+poucos milissegundos. Os pesos são esparsos (só os n-gramas já vistos) e o
+treino é incremental: cada lote novo de rótulos ajusta o modelo existente.
+"""
+import json
+import math
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from infra.config import settings
+
+
+def features(normalized: str, bits: Optional[int] = None) -> List[int]:
+    """Índices dos unigramas e bigramas de um título já normalizado (domain.text)."""
+    mask = (1 << (bits or settings.RELEVANCE_HASH_BITS)) - 1
+    words = [w for w in normalized.split() if len(w) > 1]
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    # crc32, não hash(): o índice precisa ser igual em todos os processos
+    return list({zlib.crc32(gram.encode()) & mask for gram in grams})
+
+
+def sigmoid(z: float) -> float:
+    if z < -35.0:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+class RelevanceModel:
+    def __init__(self, weights: Optional[Dict[int, float]] = None, bias: float = 0.0, examples: int = 0):
+        self.weights: Dict[int, float] = weights or {}
+        self.bias = bias
+        self.examples = examples  # rótulos vistos até aqui (também é a versão do modelo)
+
+    def predict(self, feats: Sequence[int]) -> float:
+        weights = self.weights
+        return sigmoid(self.bias + sum(weights.get(f, 0.0) for f in feats))
+
+    def predict_many(self, titulos: Iterable[str]) -> List[float]:
+        """Probabilidade de relevância de cada título (já normalizado)."""
+        return [round(self.predict(features(titulo)), 4) for titulo in titulos]
+
+    def partial_fit(
+        self,
+        examples: Sequence[Tuple[str, int]],
+        epochs: Optional[int] = None,
+        learning_rate: Optional[float] = None,
+        l2: Optional[float] = None,
+    ) -> int:
+        """
+        SGD da log-loss sobre (título normalizado, rótulo 0/1), partindo dos pesos
+        atuais. O passo decai com o total de rótulos já vistos. Retorna quantos exemplos entraram.
+        """
+        epochs = epochs or settings.RELEVANCE_EPOCHS
+        learning_rate = learning_rate or settings.RELEVANCE_LEARNING_RATE
+        l2 = settings.RELEVANCE_L2 if l2 is None else l2
+        encoded = [(features(titulo), label) for titulo, label in examples]
+        weights = self.weights
+        for epoch in range(epochs):
+            step = learning_rate / math.sqrt(1.0 + self.examples / 1000.0)
+            # Ordem determinística, mas alternada entre épocas
+            for feats, label in (encoded if epoch % 2 == 0 else reversed(encoded)):
+                gradient = self.predict(feats) - label
+                self.bias -= step * gradient
+                for f in feats:
+                    w = weights.get(f, 0.0)
+                    weights[f] = w - step * (gradient + l2 * w)
+        self.examples += len(encoded)
+        return len(encoded)
+
+    def dumps(self) -> bytes:
+        return zlib.compress(json.dumps({
+            "bits": settings.RELEVANCE_HASH_BITS,
+            "bias": self.bias,
+            "examples": self.examples,
+            "weights": {str(f): round(w, 6) for f, w in self.weights.items() if w},
+        }).encode())
+
+    @staticmethod
+    def loads(blob: bytes) -> "RelevanceModel":
+        data = json.loads(zlib.decompress(blob))
+        if data.get("bits") != settings.RELEVANCE_HASH_BITS:
+            # Índices de outro espaço de hashing não servem: recomeça do zero
+            return RelevanceModel()
+        return RelevanceModel(
+            weights={int(f): w for f, w in data["weights"].items()},
+            bias=data["bias"],
+            examples=data["examples"],
+        )
+
+
+class RelevanceClassifier:
+    # Modelo em uso neste processo (RelevanceService.refresh); None = sem relevância
+    MODEL: Optional[RelevanceModel] = None
+
+    @staticmethod
+    def use_model(model: Optional[RelevanceModel]):
+        RelevanceClassifier.MODEL = model
+
+    @staticmethod
+    def predict_many(titulos: Iterable[str]) -> List[Optional[float]]:
+        """Relevância dos títulos normalizados; None enquanto o modelo tem poucos rótulos."""
+        model = RelevanceClassifier.MODEL
+        if model is None or model.examples < settings.RELEVANCE_MIN_EXAMPLES:
+            return [None for _ in titulos]
+        return model.predict_many(titulos)
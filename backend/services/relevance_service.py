@@ -0,0 +1,149 @@
+"""
+Relevância aprendida — lado do banco do RelevanceClassifier.
+
+Cada PATCH de status no kanban grava um StatusEvent; aprovado/em_proposta são
+exemplos positivos e rejeitado, negativo. O job `task_train_relevance` junta os
+eventos ainda não usados ao título normalizado da licitação (no primeiro treino,
+também as decisões gravadas antes de existir o StatusEvent), ajusta o modelo
+salvo (treino incremental) e grava os pesos na tabela relevance_model. Como as
+regras de filtro, cada processo recarrega o modelo quando a versão (`examples`)
+muda; a ingestão grava a probabilidade em Licitacao.relevance.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.enums import MACHINE_REJECTION_REASONS
+from domain.models import Licitacao, RelevanceModelState, StatusEvent
+from domain.text import normalize_text
+from infra.config import settings
+from services.relevance_classifier import RelevanceClassifier, RelevanceModel
+
+logger = logging.getLogger("Relevance")
+
+# Status do kanban -> rótulo (os demais, ex.: "analise", não dizem nada)
+LABELS = {"aprovado": 1, "em_proposta": 1, "rejeitado": 0}
+MODEL_ROW_ID = 1
+
+
+class RelevanceService:
+    # Última checagem de versão neste processo (time.monotonic)
+    _checked_at: Optional[float] = None
+
+    @staticmethod
+    def record_status_change(session: AsyncSession, licitacao: Licitacao, from_status: Optional[str]):
+        """Registra a decisão do kanban como rótulo. Não faz commit."""
+        if licitacao.status == from_status:
+            return
+        session.add(StatusEvent(licitacao_id=licitacao.id, from_status=from_status, to_status=licitacao.status))
+
+    @staticmethod
+    async def load(session: AsyncSession) -> Optional[RelevanceModel]:
+        state = await session.get(RelevanceModelState, MODEL_ROW_ID)
+        return RelevanceModel.loads(state.weights) if state else None
+
+    @staticmethod
+    async def train(session: AsyncSession) -> int:
+        """
+        Ajusta o modelo salvo com os eventos ainda não usados e marca-os como
+        treinados. Com mais de um evento da mesma licitação no lote, vale o último.
+        Sem modelo salvo (primeiro treino), semeia com o histórico do kanban
+        anterior aos StatusEvent (ver `history_examples`).
+        Retorna quantos exemplos entraram (0 = nada novo).
+        """
+        result = await session.exec(
+            select(StatusEvent.id, StatusEvent.licitacao_id, StatusEvent.to_status,
+                   Licitacao.titulo, Licitacao.titulo_normalizado)
+            .join(Licitacao, Licitacao.id == StatusEvent.licitacao_id)
+            .where(StatusEvent.trained == False)  # noqa: E712
+            .order_by(StatusEvent.id)
+        )
+        events = result.all()
+
+        latest: Dict[int, tuple] = {}
+        for _, licitacao_id, to_status, titulo, titulo_normalizado in events:
+            latest[licitacao_id] = (titulo_normalizado or normalize_text(titulo), to_status)
+        examples = [(titulo, LABELS[status]) for titulo, status in latest.values() if status in LABELS]
+
+        model = await RelevanceService.load(session)
+        if model is None:
+            model = RelevanceModel()
+            examples = await RelevanceService.history_examples(session) + examples
+        if not events and not examples:
+            return 0
+        model.partial_fit(examples)
+        if examples:
+            now = datetime.utcnow()
+            await session.execute(
+                pg_insert(RelevanceModelState.__table__)
+                .values(id=MODEL_ROW_ID, examples=model.examples, weights=model.dumps(), updated_at=now)
+                .on_conflict_do_update(
+                    index_elements=["id"],
+                    set_={"examples": model.examples, "weights": model.dumps(), "updated_at": now},
+                )
+            )
+        if events:
+            await session.execute(
+                update(StatusEvent).where(col(StatusEvent.id).in_([e[0] for e in events])).values(trained=True)
+            )
+        await session.commit()
+        logger.info(f"Relevância: +{len(examples)} exemplos ({model.examples} no total, {len(model.weights)} pesos)")
+        return len(examples)
+
+    @staticmethod
+    async def history_examples(session: AsyncSession) -> List[Tuple[str, int]]:
+        """
+        Rótulos das decisões tomadas antes de existir o StatusEvent: aprovado e
+        em_proposta são positivos; rejeitado só conta quando o motivo não é da
+        ingestão (rejeição do operador). Licitações com StatusEvent ficam de fora
+        — os eventos já as rotulam.
+        """
+        status = col(Licitacao.status)
+        reason = col(Licitacao.rejection_reason)
+        result = await session.exec(
+            select(Licitacao.titulo, Licitacao.titulo_normalizado, Licitacao.status)
+            .where(
+                or_(
+                    status.in_([s for s, label in LABELS.items() if label == 1]),
+                    and_(status == "rejeitado", or_(reason.is_(None), reason.not_in(MACHINE_REJECTION_REASONS))),
+                ),
+                ~exists().where(StatusEvent.licitacao_id == Licitacao.id),
+            )
+            .order_by(Licitacao.id)
+        )
+        return [(normalizado or normalize_text(titulo), LABELS[s]) for titulo, normalizado, s in result.all()]
+
+    @staticmethod
+    async def refresh(session_factory: Callable, force: bool = False) -> bool:
+        """
+        Recarrega o modelo se a versão no banco mudou (mesma cadência das regras de
+        filtro, FILTER_RULES_REFRESH_SECONDS). Falha no banco mantém o modelo atual.
+        """
+        now = time.monotonic()
+        checked_at = RelevanceService._checked_at
+        if not force and checked_at is not None and now - checked_at < settings.FILTER_RULES_REFRESH_SECONDS:
+            return False
+        RelevanceService._checked_at = now
+
+        current = RelevanceClassifier.MODEL
+        try:
+            async with session_factory() as session:
+                result = await session.exec(
+                    select(RelevanceModelState.examples).where(RelevanceModelState.id == MODEL_ROW_ID)
+                )
+                examples = result.first()
+                if examples is None or (current is not None and current.examples == examples):
+                    return False
+                model = await RelevanceService.load(session)
+        except Exception as e:
+            logger.warning(f"Falha ao carregar o modelo de relevância; mantendo o atual: {e}")
+            return False
+
+        RelevanceClassifier.use_model(model)
+        return True
@@ -0,0 +1,177 @@
+"""
+Replay do arquivo bruto — reaplica mapeamento, FilterEngine e score sobre os
+payloads guardados em `raw_payload` (ver RawArchiveService), sem rede.
+
+Pipeline: o processo principal lê lotes do arquivo em ordem de id (keyset), um
+pool de processos descomprime e reprocessa cada lote (CPU), e os resultados são
+gravados em ordem, um UPDATE executemany + commit por lote, só nas linhas que
+mudaram. Até 2 lotes por processo ficam em voo enquanto o anterior é gravado.
+Decisões do operador (status movido no kanban, rejeição manual) e um ME/EPP
+"exclusivo" já gravado são preservados (ver LicitacaoRepository.bulk_rewrite).
+
+Uso típico depois de mudar regras de filtro/score: scripts/replay_archive.py.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import RawPayload
+from infra.config import settings
+from infra.licitacao_repository import LicitacaoRepository
+from services.comprasnet_client import ComprasNetClient
+from services.filter_engine import FilterEngine
+from services.pncp_client import PNCPClient
+from services.raw_archive_service import decode
+from services.relevance_classifier import RelevanceClassifier, RelevanceModel
+from services.transfere_client import TransfereClient
+
+logger = logging.getLogger("Replay")
+
+MAPPERS = {
+    "pncp": PNCPClient.map_item,
+    "comprasnet": ComprasNetClient.map_item,
+    "transferegov": TransfereClient.map_item,
+}
+
+# Campos recalculados pelo replay (identidade, datas de criação e versão do edital ficam)
+REPLAY_FIELDS = (
+    "titulo", "titulo_normalizado", "busca_normalizada", "modalidade", "modalidade_codigo", "modo_disputa", "srp",
+    "data_abertura_proposta", "data_encerramento_proposta",
+    "data_limite_impugnacao", "data_limite_esclarecimento", "valor_estimado_total",
+    "me_epp_status", "status", "rejection_reason", "priority", "score", "relevance",
+)
+
+
+def init_worker(rules: Dict[str, List[str]], rules_version: Optional[str], model: Optional[RelevanceModel]):
+    """Initializer do pool: os processos começam com as listas embutidas e sem modelo."""
+    FilterEngine.use_rules(rules, rules_version)
+    RelevanceClassifier.use_model(model)
+
+
+def rescore_rows(rows: List[Tuple[str, str, str, bytes]]) -> Tuple[Dict[str, dict], int]:
+    """
+    (fonte, UF, codec, payload) -> ({pncp_id: campos de REPLAY_FIELDS}, erros).
+    Roda nos processos do pool: só CPU, sem sessão nem rede.
+    """
+    out: Dict[str, dict] = {}
+    errors = 0
+    for source, uf, codec, payload in rows:
+        try:
+            fields = MAPPERS[source](decode(codec, payload), uf)
+        except Exception:
+            errors += 1
+            continue
+        if fields is not None:
+            out[fields["pncp_id"]] = {f: fields.get(f) for f in REPLAY_FIELDS}
+    return out, errors
+
+
+@dataclass
+class ReplayReport:
+    scanned: int = 0
+    mapped: int = 0
+    changed: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+class ReplayService:
+    @staticmethod
+    async def replay(
+        session: AsyncSession,
+        sources: Optional[List[str]] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        dry_run: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> ReplayReport:
+        """
+        Reprocessa o arquivo (filtrado por fonte e `published_on`) e regrava as
+        licitações cujo resultado mudou. `dry_run` só conta (desfaz cada lote).
+        """
+        batch_size = batch_size or settings.REPLAY_BATCH_SIZE
+        workers = workers or settings.REPLAY_WORKERS or os.cpu_count() or 1
+        own_executor = executor is None
+        executor = executor or ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(FilterEngine.rules(), FilterEngine.RULES_VERSION, RelevanceClassifier.MODEL),
+        )
+        loop = asyncio.get_running_loop()
+
+        report = ReplayReport()
+        started = time.perf_counter()
+        pending: deque = deque()
+        last_id = 0
+        try:
+            while True:
+                rows = await ReplayService._read_batch(session, last_id, batch_size, sources, since, until)
+                if rows:
+                    last_id = rows[-1][0]
+                    report.scanned += len(rows)
+                    pending.append(loop.run_in_executor(executor, rescore_rows, [r[1:] for r in rows]))
+                while pending and (not rows or len(pending) >= workers * 2):
+                    await ReplayService._write(session, await pending.popleft(), report, dry_run)
+                if not rows:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+
+        report.elapsed = time.perf_counter() - started
+        logger.info(
+            f"Replay: {report.scanned} payloads em {report.elapsed:.1f}s ({report.rate:,.0f}/s), "
+            f"{report.changed} licitações alteradas, {report.errors} erros."
+        )
+        return report
+
+    @staticmethod
+    async def _read_batch(
+        session: AsyncSession,
+        after_id: int,
+        limit: int,
+        sources: Optional[List[str]],
+        since: Optional[date],
+        until: Optional[date],
+    ) -> list:
+        stmt = (
+            select(RawPayload.id, RawPayload.source, RawPayload.uf, RawPayload.codec, RawPayload.payload)
+            .where(RawPayload.id > after_id)
+            .order_by(RawPayload.id)
+            .limit(limit)
+        )
+        if sources:
+            stmt = stmt.where(col(RawPayload.source).in_(sources))
+        if since:
+            stmt = stmt.where(RawPayload.published_on >= since)
+        if until:
+            stmt = stmt.where(RawPayload.published_on <= until)
+        return list((await session.exec(stmt)).all())
+
+    @staticmethod
+    async def _write(session: AsyncSession, result: Tuple[Dict[str, dict], int], report: ReplayReport, dry_run: bool):
+        rows, errors = result
+        report.mapped += len(rows)
+        report.errors += errors
+        report.changed += await LicitacaoRepository.bulk_rewrite(session, rows, keep_decisions=True)
+        if dry_run:
+            await session.rollback()
+        else:
+            await session.commit()
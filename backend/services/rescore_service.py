@@ -0,0 +1,159 @@
+"""
+Rescore — reaplica o FilterEngine (regras em uso) e o classificador de
+relevância (modelo em uso) às licitações já gravadas, direto do banco: sem
+arquivo bruto nem requisições aos upstreams.
+
+Depois de editar as regras (ver FilterRuleService) ou de treinar o modelo (ver
+RelevanceService), o job `task_rescore` percorre a tabela por id (keyset),
+classifica os títulos em lote e regrava status/motivo/prioridade/score/relevância
+só das linhas que mudaram — um UPDATE executemany e um commit por lote.
+Decisões do operador não são tocadas: status fora de MACHINE_STATUSES,
+"rejeitado" com motivo que não é da ingestão (ver machine_owned) e qualquer
+licitação com StatusEvent (movida no kanban). O filtro geográfico não entra:
+quem está na tabela já passou por ele.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import bindparam, exists, update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.enums import MACHINE_STATUSES, machine_owned
+from domain.models import Licitacao, StatusEvent
+from domain.text import normalize_text
+from infra.config import settings
+from services.filter_engine import FilterEngine
+from services.ingestion_pipeline import verdict_fields
+from services.me_epp_classifier import MeEppClassifier
+from services.relevance_classifier import RelevanceClassifier
+
+logger = logging.getLogger("Rescore")
+
+# Campos que o rescore recalcula (os mesmos que a classificação da ingestão grava)
+RESCORE_FIELDS = ("status", "rejection_reason", "priority", "score", "relevance")
+# Fontes cujo adapter não aplica o filtro semântico (ver ScraperAdapter)
+SEMANTIC_EXEMPT_PREFIXES = ("scraper-",)
+
+
+@dataclass
+class RescoreReport:
+    scanned: int = 0
+    changed: int = 0
+    elapsed: float = 0.0
+    rules_version: Optional[str] = None
+
+
+class RescoreService:
+    @staticmethod
+    async def rescore(
+        session: AsyncSession,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> RescoreReport:
+        """Reclassifica a tabela com as regras atuais. `dry_run` só conta o que mudaria."""
+        batch_size = batch_size or settings.RESCORE_BATCH_SIZE
+        table = Licitacao.__table__
+        decided = exists().where(StatusEvent.licitacao_id == Licitacao.id)
+        stmt = (
+            update(table)
+            # Revalida no UPDATE: o operador pode ter movido a licitação depois da leitura
+            .where(table.c.id == bindparam("b_id"), table.c.status.in_(MACHINE_STATUSES), ~decided)
+            .values({name: bindparam(f"b_{name}") for name in RESCORE_FIELDS})
+        )
+        report = RescoreReport(rules_version=FilterEngine.RULES_VERSION)
+        started = time.perf_counter()
+        last_id = 0
+        while True:
+            result = await session.exec(
+                select(
+                    Licitacao.id, Licitacao.pncp_id, Licitacao.titulo, Licitacao.titulo_normalizado,
+                    Licitacao.status, Licitacao.rejection_reason, Licitacao.priority, Licitacao.score,
+                    Licitacao.relevance, decided.label("decided"),
+                )
+                .where(Licitacao.id > last_id, col(Licitacao.status).in_(MACHINE_STATUSES))
+                .order_by(Licitacao.id)
+                .limit(batch_size)
+            )
+            batch = result.all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            report.scanned += len(batch)
+
+            # Linhas anteriores à coluna normalizada (ver migrate_v7) normalizam aqui
+            titulos = [row[3] or normalize_text(row[2]) for row in batch]
+            verdicts = FilterEngine.classify_many(titulos, normalized=True)
+            relevances = RelevanceClassifier.predict_many(titulos)
+            params = []
+            for row, verdict, relevance in zip(batch, verdicts, relevances):
+                if row[9] or not machine_owned(row[4], row[5]):
+                    continue
+                fields = verdict_fields(row[2], verdict, not row[1].startswith(SEMANTIC_EXEMPT_PREFIXES))
+                fields["relevance"] = relevance
+                if tuple(fields[name] for name in RESCORE_FIELDS) != tuple(row[4:9]):
+                    params.append({"b_id": row[0], **{f"b_{name}": fields[name] for name in RESCORE_FIELDS}})
+            report.changed += len(params)
+            if params and not dry_run:
+                await session.execute(stmt, params)
+                await session.commit()
+
+        report.elapsed = time.perf_counter() - started
+        logger.info(
+            f"Rescore (regras {report.rules_version or 'embutidas'}): {report.scanned} lidas, "
+            f"{report.changed} alteradas{' (dry-run)' if dry_run else ''} em {report.elapsed:.1f}s"
+        )
+        return report
+
+    @staticmethod
+    async def relabel_me_epp(
+        session: AsyncSession,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> RescoreReport:
+        """
+        Reaplica o MeEppClassifier aos títulos de toda a tabela (qualquer status).
+        Corrige o "parcial" da antiga checagem por substring ("ME" em "MEDICAMENTOS")
+        e promove "nao"; "exclusivo" nunca é rebaixado — pode ter vindo da flag da
+        fonte (exclusivoMeEpp do PNCP) ou da análise do edital.
+        """
+        batch_size = batch_size or settings.RESCORE_BATCH_SIZE
+        table = Licitacao.__table__
+        stmt = update(table).where(table.c.id == bindparam("b_id")).values(me_epp_status=bindparam("b_me_epp_status"))
+        report = RescoreReport()
+        started = time.perf_counter()
+        last_id = 0
+        while True:
+            result = await session.exec(
+                select(Licitacao.id, Licitacao.titulo, Licitacao.titulo_normalizado, Licitacao.me_epp_status)
+                .where(Licitacao.id > last_id)
+                .order_by(Licitacao.id)
+                .limit(batch_size)
+            )
+            batch = result.all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            report.scanned += len(batch)
+
+            labels = MeEppClassifier.classify_many(
+                (row[2] or normalize_text(row[1]) for row in batch), normalized=True
+            )
+            params = [
+                {"b_id": row[0], "b_me_epp_status": label}
+                for row, label in zip(batch, labels)
+                if row[3] != "exclusivo" and label != row[3]
+            ]
+            report.changed += len(params)
+            if params and not dry_run:
+                await session.execute(stmt, params)
+                await session.commit()
+
+        report.elapsed = time.perf_counter() - started
+        logger.info(
+            f"ME/EPP: {report.scanned} lidas, {report.changed} reclassificadas"
+            f"{' (dry-run)' if dry_run else ''} em {report.elapsed:.1f}s"
+        )
+        return report
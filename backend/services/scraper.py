@@ -1,3 +1,7 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import AsyncIterator, Optional
 import feedparser
 import urllib.parse
 import trafilatura
@@ -5,6 +9,10 @@ import requests
 from pypdf import PdfReader
 from io import BytesIO
 
+from domain.text import normalize_text
+from services.ingestion_pipeline import Page, SourceAdapter
+from services.sync_tracker import timed, track
+
 # Headers para simular um navegador real e evitar bloqueios
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -85,6 +93,11 @@ def validar_e_ler_link(url_google):
         return None
 
 async def buscar_licitacoes_gov():
+    # feedparser/requests/trafilatura são bloqueantes: roda numa thread para não
+    # travar o event loop (as outras fontes do sync_all rodam em paralelo)
+    return await asyncio.to_thread(_buscar_licitacoes_gov)
+
+def _buscar_licitacoes_gov():
     print(f"🚀 Iniciando Varredura RIGOROSA (Apenas .gov.br)...")
     
     # Busca mais ampla para garantir resultados
@@ -121,4 +134,41 @@ async def buscar_licitacoes_gov():
             break
             
     print(f"📦 Pacote fechado com {len(licitacoes_validas)} editais OFICIAIS.")
-    return licitacoes_validas
\ No newline at end of file
+    return licitacoes_validas
+
+
+class ScraperAdapter(SourceAdapter):
+    """
+    Google News como fonte do IngestionPipeline. A varredura já filtra por
+    termos e links .gov.br, então só prioridade/score e ME/EPP são aplicados.
+    """
+    name = "scraper"
+    geographic_filter = False
+    semantic_filter = False
+
+    async def pages(self) -> AsyncIterator[Page]:
+        with timed("fetch"):
+            items = await buscar_licitacoes_gov() or []
+        track("fetch", pages=1, records_seen=len(items))
+        if items:
+            yield Page(items=items)
+
+    @staticmethod
+    def build_id(item: dict) -> str:
+        # ID estável entre processos (hash() muda a cada processo). Sobre o texto
+        # normalizado: a mesma notícia com acento/caixa/espaços diferentes não duplica
+        key = normalize_text(item['titulo'], item.get('orgao_nome'))
+        return f"scraper-{hashlib.sha1(key.encode()).hexdigest()[:16]}"
+
+    def normalize(self, item: dict, page: Page) -> Optional[dict]:
+        return dict(
+            pncp_id=self.build_id(item),
+            titulo=item['titulo'],
+            orgao_nome=item.get('orgao_nome') or "Não informado (Google News)",
+            estado_sigla=item.get('estado_sigla', 'BR'),
+            data_publicacao=datetime.utcnow(),
+            link_edital=item.get('link_edital') or item.get('link'),
+            me_epp_status=None,
+            # Trecho do PDF/página já lido na varredura
+            texto_edital=item.get('resumo'),
+        )
@@ -0,0 +1,97 @@
+"""
+Sync State — watermarks da ingestão incremental.
+
+Cada combinação (fonte, UF, modalidade) guarda o último `dataPublicacaoPncp`
+processado com sucesso e, se a janela corrente ficou pela metade, a última
+página concluída nela (checkpoint). As execuções seguintes pedem ao PNCP apenas
+o delta, recuando `PNCP_SYNC_OVERLAP_HOURS` para cobrir publicações atrasadas.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import SyncState
+from infra.config import settings
+
+
+class SyncStateService:
+    @staticmethod
+    async def load(session: AsyncSession, source: str) -> Dict[Tuple[str, str], SyncState]:
+        """Carrega todos os watermarks de uma fonte, indexados por (uf, modalidade)."""
+        result = await session.exec(select(SyncState).where(SyncState.source == source))
+        return {(s.uf, s.modalidade): s for s in result.all()}
+
+    @staticmethod
+    def plan_window(state: Optional[SyncState], default_start: datetime) -> Tuple[str, int]:
+        """
+        Decide de onde a próxima execução começa: (dataInicial, página inicial).
+
+        Sem watermark, usa a janela padrão (`days`). Com watermark, recua o
+        overlap configurado e começa da página 1: uma publicação atrasada pode
+        cair em qualquer página da janela. Só uma janela interrompida (checkpoint
+        gravado por página, ver PNCPFeedAdapter.on_committed) com a mesma
+        dataInicial retoma na última página concluída (buscada de novo, pois pode
+        ter recebido registros novos).
+        """
+        if state and state.last_published_at:
+            start = state.last_published_at - timedelta(hours=settings.PNCP_SYNC_OVERLAP_HOURS)
+        else:
+            start = default_start
+        start_str = start.strftime("%Y%m%d")
+        if state and state.window_start == start_str and state.last_page > 1:
+            return start_str, state.last_page
+        return start_str, 1
+
+    @staticmethod
+    async def advance(
+        session: AsyncSession,
+        source: str,
+        uf: str,
+        modalidade: str,
+        window_start: str,
+        last_published_at: Optional[datetime],
+        last_page: int = 0,
+    ) -> SyncState:
+        """
+        Avança o watermark de uma combinação. Não faz commit.
+        `last_page` > 0 é o checkpoint da janela em andamento (gravado a cada lote,
+        sem `last_published_at`: o watermark só anda com a janela inteira); 0
+        (padrão) marca a janela como concluída — a próxima execução a relê desde a página 1.
+        """
+        result = await session.exec(
+            select(SyncState).where(
+                SyncState.source == source, SyncState.uf == uf, SyncState.modalidade == modalidade
+            )
+        )
+        state = result.first() or SyncState(source=source, uf=uf, modalidade=modalidade)
+
+        if last_published_at and (not state.last_published_at or last_published_at > state.last_published_at):
+            state.last_published_at = last_published_at
+        state.window_start = window_start
+        state.last_page = last_page
+        state.updated_at = datetime.utcnow()
+        session.add(state)
+        return state
+
+    @staticmethod
+    async def reset(
+        session: AsyncSession,
+        source: str,
+        uf: Optional[str] = None,
+        modalidade: Optional[str] = None,
+    ) -> int:
+        """
+        Apaga watermarks (todos da fonte ou só de uma UF/modalidade) para forçar
+        um backfill da janela completa na próxima execução. Retorna quantos foram removidos.
+        """
+        stmt = delete(SyncState).where(SyncState.source == source)
+        if uf:
+            stmt = stmt.where(SyncState.uf == uf.upper())
+        if modalidade:
+            stmt = stmt.where(SyncState.modalidade == modalidade)
+        result = await session.execute(stmt)
+        await session.commit()
+        return result.rowcount
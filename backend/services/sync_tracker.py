@@ -0,0 +1,187 @@
+"""
+Sync Tracker — histórico e progresso das execuções de sync (sync_run / sync_stage).
+
+`IngestionService.run_source` abre um tracker por fonte; os clients registram
+métricas por etapa com `track()` / `timed()` sem receber o tracker por parâmetro
+(ele viaja num ContextVar, herdado pelas tasks criadas durante a execução):
+
+    with timed("fetch"):
+        response = await client.get(...)
+    track("fetch", pages=1, bytes=len(response.content), records_seen=len(items))
+
+Etapas usadas pelas fontes: "fetch" (HTTP), "filter" (mapeamento + FilterEngine)
+e "write" (INSERT/UPDATE + commit). O progresso é gravado numa sessão própria a
+cada SYNC_PROGRESS_FLUSH_SECONDS, então dá para acompanhar um job em andamento
+pela API. A gravação é "best effort": falhar ao registrar não derruba o sync.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlmodel import select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domain.models import SyncRun, SyncStage
+from infra.config import settings
+from infra.database import async_session_factory
+
+logger = logging.getLogger("SyncTracker")
+
+_current: ContextVar[Optional["SyncTracker"]] = ContextVar("sync_tracker", default=None)
+
+
+def track(stage: str, error: Optional[str] = None, **counters):
+    """Soma contadores na etapa do tracker corrente (no-op fora de um sync rastreado)."""
+    tracker = _current.get()
+    if tracker is not None:
+        tracker.add(stage, error=error, **counters)
+
+
+@contextmanager
+def timed(stage: str):
+    """Acumula o tempo gasto no bloco na etapa `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracker = _current.get()
+        if tracker is not None:
+            tracker.add(stage, elapsed=time.perf_counter() - started)
+
+
+class SyncTracker:
+    def __init__(self, source: str, job_id: Optional[str] = None):
+        self.run = SyncRun(source=source, job_id=job_id)
+        self.stages: Dict[str, SyncStage] = {}
+        self._dirty = True
+        self._lock = asyncio.Lock()
+
+    def add(self, stage: str, elapsed: float = 0.0, error: Optional[str] = None, **counters):
+        row = self.stages.get(stage)
+        if row is None:
+            row = self.stages[stage] = SyncStage(run_id=0, name=stage)
+        row.elapsed += elapsed
+        for name, value in counters.items():
+            setattr(row, name, getattr(row, name) + value)
+        if error:
+            row.errors += 1
+            row.last_error = error[:1000]
+        self._dirty = True
+
+    @classmethod
+    @asynccontextmanager
+    async def start(cls, source: str, job_id: Optional[str] = None) -> AsyncIterator["SyncTracker"]:
+        """
+        Abre um SyncRun, grava progresso periodicamente enquanto o bloco roda e
+        fecha o run com o status final (o chamador pode ajustar com `finish`).
+        """
+        tracker = cls(source, job_id)
+        token = _current.set(tracker)
+        await tracker.flush()
+        flusher = asyncio.create_task(tracker._flush_periodically())
+        try:
+            yield tracker
+        except BaseException as e:
+            if tracker.run.status == "running":
+                tracker.finish("timeout" if isinstance(e, asyncio.CancelledError) else "error", str(e) or None)
+            raise
+        finally:
+            _current.reset(token)
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            if tracker.run.status == "running":
+                tracker.finish("success")
+            await tracker.flush()
+
+    def finish(self, status: str, error: Optional[str] = None):
+        now = datetime.utcnow()
+        self.run.status = status
+        self.run.error = error
+        self.run.finished_at = now
+        for row in self.stages.values():
+            row.finished_at = row.finished_at or now
+        self._dirty = True
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(settings.SYNC_PROGRESS_FLUSH_SECONDS)
+            await self.flush()
+
+    async def flush(self):
+        """Grava run + etapas (numa sessão própria, para não misturar com a transação do sync)."""
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            new_rows = [r for r in [self.run, *self.stages.values()] if r.id is None]
+            try:
+                async with async_session_factory() as session:
+                    await self._persist(session)
+                    await session.commit()
+            except BaseException as e:
+                # Linhas inseridas numa transação que não foi confirmada voltam a ser "novas"
+                for row in new_rows:
+                    row.id = None
+                self._dirty = True
+                if not isinstance(e, Exception):
+                    raise
+                logger.warning(f"Não foi possível gravar o progresso do sync {self.run.source}: {e}")
+
+    async def _persist(self, session: AsyncSession):
+        run = self.run
+        run.heartbeat_at = datetime.utcnow()
+        run.new_items = sum(s.new_items for s in self.stages.values())
+        run.updated_items = sum(s.updated_items for s in self.stages.values())
+        run.rejected_items = sum(s.rejected_items for s in self.stages.values())
+
+        if run.id is None:
+            session.add(run)
+            await session.flush()
+        else:
+            await session.execute(
+                update(SyncRun).where(SyncRun.id == run.id).values(**run.model_dump(exclude={"id"}))
+            )
+
+        for row in list(self.stages.values()):
+            if row.id is None:
+                row.run_id = run.id
+                session.add(row)
+                await session.flush()
+            else:
+                await session.execute(
+                    update(SyncStage).where(SyncStage.id == row.id).values(**row.model_dump(exclude={"id"}))
+                )
+
+    # ─── Consultas ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    async def list_runs(session: AsyncSession, source: Optional[str] = None, limit: int = 20) -> List[dict]:
+        stmt = select(SyncRun).order_by(col(SyncRun.started_at).desc()).limit(limit)
+        if source:
+            stmt = stmt.where(SyncRun.source == source)
+        runs = (await session.exec(stmt)).all()
+        if not runs:
+            return []
+
+        stages = (await session.exec(
+            select(SyncStage).where(col(SyncStage.run_id).in_([r.id for r in runs])).order_by(SyncStage.id)
+        )).all()
+        by_run: Dict[int, list] = {}
+        for stage in stages:
+            by_run.setdefault(stage.run_id, []).append(stage.model_dump(exclude={"run_id"}))
+        return [{**run.model_dump(), "stages": by_run.get(run.id, [])} for run in runs]
+
+    @staticmethod
+    async def get_run(session: AsyncSession, run_id: int) -> Optional[dict]:
+        run = await session.get(SyncRun, run_id)
+        if not run:
+            return None
+        stages = (await session.exec(
+            select(SyncStage).where(SyncStage.run_id == run_id).order_by(SyncStage.id)
+        )).all()
+        return {**run.model_dump(), "stages": [s.model_dump(exclude={"run_id"}) for s in stages]}
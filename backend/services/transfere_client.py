@@ -1,9 +1,13 @@
 import httpx
 import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
+from infra.config import settings
+from services.ingestion_pipeline import Page, SourceAdapter, map_item
+from services.sync_tracker import timed, track
+
 logger = logging.getLogger(__name__)
 
 class TransfereClient:
@@ -12,14 +16,23 @@ class TransfereClient:
     Focus on 'Processo de Compra' (Purchase Processes/Tenders).
     """
     
-    BASE_URL = "https://pro-siconv.estaleiro.serpro.gov.br/maisbrasil-api/v1/services/public"
+    BASE_URL = settings.TRANSFEREGOV_URL
     
-    def __init__(self):
-        self.timeout = httpx.Timeout(30.0, connect=10.0)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0))
+
+    async def close(self):
+        if self._owns_client:
+            await self.client.aclose()
 
     async def fetch_processos(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Fetch purchase processes from the last N days, mapped to internal dicts."""
+        return self._map_to_internal(await self.fetch_raw(days=days))
+
+    async def fetch_raw(self, days: int = 7) -> List[Dict[str, Any]]:
         """
-        Fetch purchase processes from the last N days.
+        Fetch raw purchase processes (API payload) from the last N days.
         Note: The API usually requires specific filters like instrument or year.
         If no direct 'list by date' is broadly available without filters, 
         we might need to search by recent years and common hospital-related instrument types.
@@ -38,27 +51,63 @@ class TransfereClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Fetching Transfere.gov.br processes for year {current_year}")
-                # Note: SERPRO APIs often requires basic auth or client certificates in some cases, 
-                # but these 'public' ones are usually open.
-                response = await client.get(url, params=params)
+            logger.info(f"Fetching Transfere.gov.br processes for year {current_year}")
+            # Note: SERPRO APIs often requires basic auth or client certificates in some cases, 
+            # but these 'public' ones are usually open.
+            with timed("fetch"):
+                response = await self.client.get(url, params=params)
+            
+            if response.status_code == 200:
+                data = response.json()
+                # Transferegov structure is usually a list under a main key
+                items = data if isinstance(data, list) else data.get('itens', [])
+                
+                logger.info(f"Retrieved {len(items)} items from Transfere.gov.br")
+                track("fetch", pages=1, bytes=len(response.content), records_seen=len(items))
+                return items
+            else:
+                logger.error(f"Transferegov API error: {response.status_code} - {response.text}")
+                track("fetch", error=f"HTTP {response.status_code}")
+                return []
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    # Transferegov structure is usually a list under a main key
-                    items = data if isinstance(data, list) else data.get('itens', [])
-                    
-                    logger.info(f"Retrieved {len(items)} items from Transfere.gov.br")
-                    return self._map_to_internal(items)
-                else:
-                    logger.error(f"Transferegov API error: {response.status_code} - {response.text}")
-                    return []
-                    
         except Exception as e:
             logger.error(f"Failed to fetch from Transfere.gov.br: {str(e)}")
+            track("fetch", error=f"{type(e).__name__}: {e}")
             return []
 
+    @staticmethod
+    def item_id(item: Dict[str, Any]) -> str:
+        return str(item.get('id', item.get('numeroProcesso', '')) or '')
+
+    @staticmethod
+    def normalize_item(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Campos da Licitacao a partir de um processo do Transferegov, sem
+        classificação. None se o processo não tem identificador.
+        """
+        item_id = TransfereClient.item_id(item)
+        if not item_id:
+            return None
+        pub_str = item.get("dataPublicacao")
+        return dict(
+            pncp_id=f"transferegov-{item_id}",
+            titulo=item.get("objeto", item.get("descricao", "Sem título")),
+            orgao_nome=item.get("nomeOrgao", "Órgão não informado"),
+            orgao_cnpj=item.get("cnpjOrgao", ""),
+            estado_sigla=item.get("uf", "BR"),
+            cidade=item.get("municipio", ""),
+            data_publicacao=datetime.fromisoformat(pub_str.replace('Z', '+00:00')) if isinstance(pub_str, str) else datetime.utcnow(),
+            link_edital=f"https://www.transferegov.sistema.gov.br/consulta-publica/{item_id}",
+            modalidade=item.get("modalidade", "Pregão"),
+            valor_estimado_total=item.get("valorProcesso", 0.0),
+            me_epp_status=None,
+        )
+
+    @staticmethod
+    def map_item(item: Dict[str, Any], uf: str) -> Optional[Dict[str, Any]]:
+        """normalize + classify, sem I/O (usado pelo replay do arquivo bruto)."""
+        return map_item(TransfereAdapter(None), item, Page(items=[]))
+
     def _map_to_internal(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Maps Transferegov fields to our internal Licitacao schema.
@@ -90,9 +139,38 @@ class TransfereClient:
                 continue
         return internal_items
 
+class TransfereAdapter(SourceAdapter):
+    """
+    Transferegov como fonte do IngestionPipeline: uma única página por sync.
+    Os processos já vêm de convênios federais de todo o país: sem filtro geográfico.
+    """
+    name = "transferegov"
+    archive_source = "transferegov"
+    geographic_filter = False
+
+    def __init__(self, client: Optional[TransfereClient], days: int = 7):
+        self.client = client
+        self.days = days
+
+    async def pages(self) -> AsyncIterator[Page]:
+        items = await self.client.fetch_raw(days=self.days)
+        if items:
+            yield Page(items=items)
+
+    def normalize(self, item: dict, page: Page) -> Optional[dict]:
+        return TransfereClient.normalize_item(item)
+
+    def natural_id(self, item: dict) -> str:
+        return f"transferegov-{TransfereClient.item_id(item)}"
+
+    def published(self, item: dict) -> Optional[str]:
+        return item.get("dataPublicacao")
+
+
 async def test_transfere():
     client = TransfereClient()
     items = await client.fetch_processos(days=3)
+    await client.close()
     print(f"Found {len(items)} items")
     for i in items[:2]:
         print(f"- {i['titulo']} | {i['orgao_nome']}")
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+
+from domain.models import BackfillWindow
+from services.backfill_service import BackfillPageError, BackfillService
+from services.pncp_client import PNCPClient
+
+
+class FakeSession:
+    def __init__(self, window):
+        self.window = window
+        self.checkpoints = []
+        self.rollbacks = 0
+        self.executed = []
+
+    async def get(self, model, window_id):
+        return self.window
+
+    def add(self, row):
+        pass
+
+    async def commit(self):
+        self.checkpoints.append((self.window.status, self.window.last_page))
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+    async def execute(self, stmt):
+        self.executed.append(stmt)
+
+
+class RecordingClient(PNCPClient):
+    def __init__(self, handler):
+        super().__init__(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), concurrency=2)
+        self.persisted = []
+
+    async def persist_page(self, session, uf, items):
+        self.persisted.extend(item["page"] for item in items)
+        return len(items)
+
+
+def test_split_windows():
+    assert BackfillService.split_windows(date(2024, 1, 1), date(2024, 1, 17), 7) == [
+        ("20240101", "20240107"), ("20240108", "20240114"), ("20240115", "20240117"),
+    ]
+    assert BackfillService.split_windows(date(2024, 1, 1), date(2024, 1, 1), 7) == [("20240101", "20240101")]
+
+
+def test_run_window_checkpoints_and_resumes_after_failure():
+    failures = {4}
+    requested = []
+
+    async def handler(request):
+        page = int(request.url.params["pagina"])
+        requested.append(page)
+        assert request.url.params["dataInicial"] == "20240101"
+        assert request.url.params["dataFinal"] == "20240107"
+        if page in failures:
+            failures.discard(page)
+            return httpx.Response(503)
+        return httpx.Response(200, json={"data": [{"page": page}], "totalPaginas": 5})
+
+    window = BackfillWindow(id=1, backfill_id="bf", uf="MA", modalidade="6", window_start="20240101", window_end="20240107")
+    session = FakeSession(window)
+    client = RecordingClient(handler)
+
+    with pytest.raises(BackfillPageError):
+        asyncio.run(BackfillService.run_window(session, client, 1))
+    assert window.status == "failed"
+    assert window.last_page == 3
+    assert client.persisted == [1, 2, 3]
+
+    # Retomada: começa depois do checkpoint, não rebaixa as páginas 1-3
+    requested.clear()
+    asyncio.run(BackfillService.run_window(session, client, 1))
+    assert requested == [4, 5]
+    assert client.persisted == [1, 2, 3, 4, 5]
+    assert (window.status, window.last_page, window.new_items, window.attempts) == ("done", 5, 5, 2)
+
+
+def test_run_window_skips_done_windows():
+    window = BackfillWindow(id=1, backfill_id="bf", uf="MA", modalidade="6",
+                            window_start="20240101", window_end="20240107", status="done")
+
+    async def handler(request):
+        raise AssertionError("não deveria buscar nada")
+
+    assert asyncio.run(BackfillService.run_window(FakeSession(window), RecordingClient(handler), 1)) is window
+
+
+def test_run_window_marks_failed_and_retries_on_write_error():
+    async def handler(request):
+        page = int(request.url.params["pagina"])
+        return httpx.Response(200, json={"data": [{"page": page}], "totalPaginas": 3})
+
+    class BrokenClient(RecordingClient):
+        async def persist_page(self, session, uf, items):
+            if items[0]["page"] == 2:
+                raise RuntimeError("deadlock detected")
+            return await super().persist_page(session, uf, items)
+
+    window = BackfillWindow(id=7, backfill_id="bf", uf="MA", modalidade="6", window_start="20240101", window_end="20240107")
+    session = FakeSession(window)
+
+    with pytest.raises(BackfillPageError, match="deadlock detected"):
+        asyncio.run(BackfillService.run_window(session, BrokenClient(handler), 7))
+
+    assert session.rollbacks == 1
+    [stmt] = session.executed
+    params = stmt.compile().params
+    assert params["status"] == "failed" and params["id_1"] == 7
+    assert params["error"] == "RuntimeError: deadlock detected"
+    assert window.last_page == 1  # checkpoint da última página gravada
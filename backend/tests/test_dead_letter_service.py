@@ -0,0 +1,170 @@
+import asyncio
+
+import httpx
+
+from domain.models import DeadLetter
+from infra.config import settings
+from services.dead_letter_service import DeadLetterService
+from services.pncp_client import PNCPClient, PNCPFeedAdapter
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def exec(self, stmt):
+        return FakeResult(self.rows)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def stub_client(handler):
+    return PNCPClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), concurrency=2)
+
+
+def capture_dead_letters(monkeypatch):
+    recorded, marks = [], []
+
+    async def fake_record(session, endpoint, uf, modalidade, data_inicial, data_final, pages, discover_page=None):
+        recorded.append((endpoint, uf, modalidade, data_inicial, data_final, dict(pages), discover_page))
+        return len(pages)
+
+    async def fake_supersede(session, endpoint, combo):
+        return 0
+
+    async def fake_mark(session, unit_id, **values):
+        marks.append((unit_id, values))
+
+    monkeypatch.setattr(DeadLetterService, "record", staticmethod(fake_record))
+    monkeypatch.setattr(DeadLetterService, "supersede", staticmethod(fake_supersede))
+    monkeypatch.setattr(DeadLetterService, "_mark", staticmethod(fake_mark))
+    return recorded, marks
+
+
+def test_crawl_dead_letters_only_the_failed_pages(monkeypatch):
+    recorded, _ = capture_dead_letters(monkeypatch)
+
+    async def handler(request):
+        params = request.url.params
+        mod, page = params["codigoModalidadeContratacao"], int(params["pagina"])
+        if (mod, page) in {("6", 2), ("8", 1)}:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"data": [{"page": page}], "totalPaginas": 3})
+
+    client = PNCPClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), states=["MA"])
+    persisted = []
+
+    async def fake_persist(self, session, rows):
+        persisted.extend(rows)
+        return len(rows), 0
+
+    monkeypatch.setattr(PNCPFeedAdapter, "persist", fake_persist)
+    monkeypatch.setattr(settings, "RAW_ARCHIVE_ENABLED", False)
+
+    total = asyncio.run(client._crawl(
+        FakeSession(), endpoint="publicacao", source="test", days=3, incremental=False,
+        watermark_fields=("dataPublicacaoPncp",), modalities=["6", "8", "9"],
+    ))
+
+    assert total == 5  # 6: páginas 1 e 3; 9: 1..3
+    [(endpoint, uf, mod6, _, _, pages6, discover6), (_, _, mod8, _, _, pages8, discover8)] = recorded
+    assert (endpoint, uf, mod6, pages6, discover6) == ("publicacao", "MA", "6", {2: "HTTP 503"}, None)
+    # Primeira página falhou: a re-busca é que vai descobrir as demais
+    assert (mod8, pages8, discover8) == ("8", {1: "HTTP 503"}, 1)
+
+
+def test_retry_due_resolves_discovers_and_backs_off(monkeypatch):
+    recorded, marks = capture_dead_letters(monkeypatch)
+    monkeypatch.setattr(settings, "DEAD_LETTER_MAX_ATTEMPTS", 3)
+
+    units = [
+        DeadLetter(id=1, endpoint="publicacao", uf="MA", modalidade="8", data_inicial="20250101",
+                   data_final="20250103", page=1, discover_pages=True),
+        DeadLetter(id=2, endpoint="publicacao", uf="PI", modalidade="6", data_inicial="20250101",
+                   data_final="20250103", page=4, attempts=0),
+        DeadLetter(id=3, endpoint="publicacao", uf="PA", modalidade="6", data_inicial="20250101",
+                   data_final="20250103", page=2, attempts=2),
+    ]
+
+    async def handler(request):
+        if request.url.params["uf"] == "MA":
+            return httpx.Response(200, json={"data": [{"page": 1}], "totalPaginas": 3})
+        return httpx.Response(500)
+
+    client = stub_client(handler)
+    persisted = []
+
+    async def persist_page(session, uf, items):
+        persisted.append(uf)
+        return len(items)
+
+    client.persist_page = persist_page
+    session = FakeSession(units)
+    stats = asyncio.run(DeadLetterService.retry_due(session, client))
+
+    assert persisted == ["MA"]
+    assert recorded[0][:5] == ("publicacao", "MA", "8", "20250101", "20250103")
+    assert sorted(recorded[0][5]) == [2, 3]
+    by_id = dict(marks)
+    assert by_id[1]["status"] == "resolved"
+    assert by_id[2]["attempts"] == 1 and "next_attempt_at" in by_id[2] and by_id[2]["error"] == "HTTP 500"
+    assert by_id[3]["status"] == "abandoned"
+    assert stats == {"retried": 3, "resolved": 1, "failed": 1, "abandoned": 1, "discovered": 2, "items": 1}
+    assert session.commits == 3
+
+
+class Expiring:
+    """DeadLetter que, como num AsyncSession real, não pode ser lido depois de um rollback."""
+
+    def __init__(self, unit, session):
+        self._unit, self._session = unit, session
+
+    def __getattr__(self, name):
+        if self._session.rollbacks:
+            raise RuntimeError(f"MissingGreenlet: lazy refresh de {name}")
+        return getattr(self._unit, name)
+
+
+def test_retry_due_keeps_going_after_a_page_fails_to_write(monkeypatch):
+    _, marks = capture_dead_letters(monkeypatch)
+    monkeypatch.setattr(settings, "DEAD_LETTER_MAX_ATTEMPTS", 5)
+
+    async def handler(request):
+        return httpx.Response(200, json={"data": [{"uf": request.url.params["uf"]}], "totalPaginas": 1})
+
+    client = stub_client(handler)
+
+    async def persist_page(session, uf, items):
+        if uf == "MA":
+            raise ValueError("payload inválido")
+        return len(items)
+
+    client.persist_page = persist_page
+    session = FakeSession()
+    session.rows = [
+        Expiring(DeadLetter(id=i, endpoint="publicacao", uf=uf, modalidade="6", data_inicial="20250101",
+                            data_final="20250103", page=1, attempts=0), session)
+        for i, uf in enumerate(["MA", "PI", "PA"], start=1)
+    ]
+
+    stats = asyncio.run(DeadLetterService.retry_due(session, client))
+
+    assert session.rollbacks == 1
+    by_id = dict(marks)
+    assert by_id[1]["attempts"] == 1 and by_id[1]["error"].startswith("Erro ao gravar")
+    assert by_id[2]["status"] == "resolved" and by_id[3]["status"] == "resolved"
+    assert stats["resolved"] == 2 and stats["failed"] == 1
@@ -0,0 +1,112 @@
+import asyncio
+import io
+from datetime import datetime
+
+import pytest
+from sqlmodel import select
+
+from services.export_service import EXPORT_COLUMNS, HEADER, ExportService
+
+ROW = (
+    "pncp-1", "Aquisição de seringas", "Prefeitura", "123", "MA", "São Luís",
+    datetime(2025, 3, 1, 10, 30), None, "Pregão", True, "parcial", "recebido", "alta", 60, "http://x",
+)
+
+
+async def batches(*sizes):
+    for size in sizes:
+        yield [ROW] * size
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_csv_streams_one_chunk_per_batch_in_legacy_format():
+    chunks = asyncio.run(collect(ExportService.chunks("csv", batches(2, 1))))
+
+    assert len(chunks) == 3  # cabeçalho + um pedaço por lote
+    assert chunks[0] == "\ufeff" + ";".join(HEADER) + "\r\n"
+    assert chunks[1].count("\r\n") == 2
+    assert chunks[2] == (
+        "pncp-1;Aquisição de seringas;Prefeitura;123;MA;São Luís;01/03/2025;;Pregão;Sim;parcial;recebido;alta;60;http://x\r\n"
+    )
+
+
+def test_xlsx_keeps_native_types():
+    import openpyxl
+
+    data = b"".join(asyncio.run(collect(ExportService.chunks("xlsx", batches(3)))))
+
+    sheet = openpyxl.load_workbook(io.BytesIO(data), read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert list(rows[0]) == HEADER
+    assert len(rows) == 4
+    assert rows[1][6] == datetime(2025, 3, 1, 10, 30) and rows[1][9] is True and rows[1][13] == 60
+
+
+def test_parquet_writes_a_row_group_per_batch():
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    data = b"".join(asyncio.run(collect(ExportService.chunks("parquet", batches(2, 1)))))
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    assert table.column_names == HEADER and table.num_rows == 3
+    assert table.column("Abertura").to_pylist() == [None] * 3
+
+
+class FakeStreamResult:
+    def __init__(self, rows, size):
+        self.rows, self.size = rows, size
+
+    async def partitions(self):
+        for i in range(0, len(self.rows), self.size):
+            yield self.rows[i:i + self.size]
+
+
+class FakeStreamSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.streamed = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def stream(self, stmt):
+        self.streamed.append(stmt)
+        return FakeStreamResult(self.rows, stmt.get_execution_options()["yield_per"])
+
+
+def test_batches_reads_server_side_cursor_with_yield_per():
+    session = FakeStreamSession([ROW] * 5)
+
+    async def build_query(s):
+        assert s is session
+        return select(*EXPORT_COLUMNS)
+
+    result = asyncio.run(collect(ExportService.batches(lambda: session, build_query, batch_size=2)))
+
+    assert [len(batch) for batch in result] == [2, 2, 1]
+    assert session.streamed[0].get_execution_options()["yield_per"] == 2
+
+
+def test_batch_work_runs_off_the_event_loop(monkeypatch):
+    import threading
+
+    main = threading.get_ident()
+    seen = []
+    original = ExportService._csv_text
+
+    def spy(batch):
+        seen.append(threading.get_ident())
+        return original(batch)
+
+    monkeypatch.setattr(ExportService, "_csv_text", staticmethod(spy))
+    asyncio.run(collect(ExportService.chunks("csv", batches(2, 2))))
+
+    assert len(seen) == 2 and main not in seen
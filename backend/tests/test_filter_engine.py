@@ -1,4 +1,6 @@
-from services.filter_engine import FilterEngine
+from domain.text import normalize_text
+from services import filter_engine
+from services.filter_engine import FilterEngine, TermMatcher
 
 def test_geographic_filter():
     assert FilterEngine.check_geographic("MA") == True
@@ -7,6 +9,12 @@ def test_geographic_filter():
     assert FilterEngine.check_geographic("PA") == True
     assert FilterEngine.check_geographic("SP") == False
     assert FilterEngine.check_geographic("RJ") == False
+    assert FilterEngine.check_geographic("") == False
+
+def test_geographic_filter_follows_target_ufs(monkeypatch):
+    monkeypatch.setattr(FilterEngine, "TARGET_UFS", frozenset({"CE", "BA"}))
+    assert FilterEngine.check_geographic("ce") == True
+    assert FilterEngine.check_geographic("MA") == False
 
 def test_semantic_filter():
     # White list
@@ -22,6 +30,61 @@ def test_semantic_filter():
     # Neutral (Rejected by default policy)
     assert FilterEngine.check_semantic("Aquisição de Canetas") == False
 
+def test_normalize_text_strips_accents_case_and_spaces():
+    assert normalize_text("  Saúde   Pública\tALGODÃO ", None, "São Luís") == "saude publica algodao sao luis"
+    assert normalize_text() == ""
+
+def test_semantic_filter_ignores_accents():
+    # Termos sem acento na lista casam com títulos acentuados, e vice-versa
+    assert FilterEngine.check_semantic("Fundo Municipal de Saúde - Algodão hidrófilo") == True
+    assert FilterEngine.check_semantic("Kits de DIAGNÓSTICO") == True
+    assert FilterEngine.check_semantic("Locacao de veiculos") == False
+    assert FilterEngine.calculate_priority("Aquisição de Material  Médico") == ("media", 10)
+
+def naive_match(categories, text):
+    lower = normalize_text(text)
+    return {name: len({normalize_text(t) for t in terms if normalize_text(t) in lower}) for name, terms in categories.items()}
+
+def test_term_matcher_counts_overlapping_and_nested_terms(monkeypatch):
+    categories = {"a": ["gaze", "zero", "material medico", "medic"], "b": ["Medic", "obra", "sobra"]}
+    texts = ["GAZERO", "Material Medico e sobras", "manobra de medicamentos", "", "nada aqui"]
+    for automaton in (True, False):
+        if not automaton:
+            monkeypatch.setattr(filter_engine, "ahocorasick", None)
+        matcher = TermMatcher(categories)
+        assert matcher.uses_automaton == (automaton and filter_engine.ahocorasick is not None)
+        for text in texts:
+            assert matcher.match(text) == naive_match(categories, text)
+
+def test_classify_many_matches_single_title_checks():
+    titles = [
+        "Aquisição de medicamentos e luvas para o hospital",
+        "Obra de engenharia no hospital municipal",
+        "Material medico: seringa, gaze, cateter, agulha, curativo, penso, luva, algodao",
+        "Aquisição de Canetas",
+    ]
+    verdicts = FilterEngine.classify_many(titles)
+    assert [v.semantic for v in verdicts] == [FilterEngine.check_semantic(t) for t in titles]
+    assert [(v.priority, v.score) for v in verdicts] == [FilterEngine.calculate_priority(t) for t in titles]
+    assert [tuple(v) for v in verdicts] == [
+        (True, "alta", 70),
+        (False, "alta", 30),
+        (True, "alta", 90),
+        (False, "baixa", 0),
+    ]
+
+def test_me_epp_is_word_boundary_aware():
+    # "ME" dentro de outra palavra não conta
+    assert FilterEngine.detect_me_epp("AQUISIÇÃO DE MEDICAMENTOS - ITENS DIVERSOS") == "nao"
+    assert FilterEngine.detect_me_epp("Material médico e implementos, cota 1") == "nao"
+    assert FilterEngine.detect_me_epp("Medicamentos - exclusivo ME/EPP") == "exclusivo"
+    assert FilterEngine.detect_me_epp("Participação exclusiva de microempresas e empresas de pequeno porte") == "exclusivo"
+    assert FilterEngine.detect_me_epp("Exclusivo conforme LC 123/2006") == "exclusivo"
+    assert FilterEngine.detect_me_epp("Cota reservada de até 25% para ME/EPP") == "parcial"
+    assert FilterEngine.detect_me_epp("Itens exclusivos para ME/EPP e itens de ampla concorrência") == "parcial"
+    assert FilterEngine.detect_me_epp("nos termos do art. 48, inciso III, da Lei Complementar nº 123") == "parcial"
+    assert FilterEngine.detect_me_epp("Aquisição exclusiva para a UPA") == "nao"
+
 def test_gatekeeper():
     allowed, reason = FilterEngine.check_gatekeeper("Licitação aberta para ampla concorrência")
     assert allowed == True
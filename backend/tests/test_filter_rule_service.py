@@ -0,0 +1,89 @@
+import asyncio
+import contextlib
+from datetime import datetime
+
+import pytest
+
+from infra.config import settings
+from services.filter_engine import FilterEngine
+from services.filter_rule_service import FilterRuleService
+
+
+class RulesSession:
+    """Responde a consulta de versão e a de regras ativas a partir de `rules`."""
+
+    def __init__(self, rules, updated_at=datetime(2026, 1, 1)):
+        self.rules = rules
+        self.updated_at = updated_at
+        self.queries = 0
+
+    async def exec(self, stmt):
+        self.queries += 1
+        sql = str(stmt)
+        rows = (
+            [(len(self.rules), self.updated_at)] if "count(" in sql
+            else [(category, term) for category, term, active in self.rules if active]
+        )
+
+        class _Result:
+            def one(_self):
+                return rows[0]
+
+            def all(_self):
+                return rows
+        return _Result()
+
+
+@pytest.fixture
+def builtin_rules():
+    rules, version = FilterEngine.rules(), FilterEngine.RULES_VERSION
+    FilterRuleService._checked_at = None
+    yield rules
+    FilterEngine.use_rules(rules, version)
+    FilterRuleService._checked_at = None
+
+
+def factory(session):
+    @contextlib.asynccontextmanager
+    async def _factory():
+        yield session
+    return _factory
+
+
+def test_refresh_swaps_matcher_when_version_changes(builtin_rules):
+    session = RulesSession([
+        ("black", "obra", True), ("white", "medicamento", True), ("white", "curativo", True),
+        ("high", "curativo", True), ("white", "seringa", False),
+    ])
+
+    assert asyncio.run(FilterRuleService.refresh(factory(session))) is True
+
+    assert FilterEngine.RULES_VERSION == "5:2026-01-01T00:00:00"
+    assert FilterEngine.WHITE_LIST == ["medicamento", "curativo"]
+    assert FilterEngine.check_semantic("Aquisição de curativos") is True
+    assert FilterEngine.check_semantic("Aquisição de seringas") is False
+    assert FilterEngine.calculate_priority("Aquisição de curativos") == ("alta", 30)
+
+    # Mesma versão: não recarrega
+    assert asyncio.run(FilterRuleService.refresh(factory(session), force=True)) is False
+
+
+def test_refresh_is_throttled(builtin_rules, monkeypatch):
+    monkeypatch.setattr(settings, "FILTER_RULES_REFRESH_SECONDS", 60.0)
+    session = RulesSession([("white", "medicamento", True)])
+
+    asyncio.run(FilterRuleService.refresh(factory(session)))
+    session.rules.append(("white", "curativo", True))
+    assert asyncio.run(FilterRuleService.refresh(factory(session))) is False
+    assert session.queries == 2  # versão + regras da primeira chamada só
+
+
+def test_refresh_keeps_current_rules_when_db_fails(builtin_rules):
+    assert asyncio.run(FilterRuleService.refresh(factory(object()))) is False
+    assert FilterEngine.rules() == builtin_rules
+    assert FilterEngine.RULES_VERSION is None
+
+
+def test_empty_table_keeps_builtin_lists(builtin_rules):
+    assert asyncio.run(FilterRuleService.refresh(factory(RulesSession([])))) is False
+    assert FilterEngine.rules() == builtin_rules
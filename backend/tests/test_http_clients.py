@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from infra.http_clients import HttpClientRegistry
+
+
+def test_registry_reuses_one_client_per_upstream():
+    registry = HttpClientRegistry(http2=False)
+
+    pncp = registry.get("pncp")
+    assert registry.get("pncp") is pncp
+    assert registry.get("anvisa") is not pncp
+    assert registry.get("anvisa").follow_redirects
+
+    asyncio.run(registry.aclose())
+    assert pncp.is_closed
+    # Depois de fechado, um novo client é criado sob demanda
+    assert registry.get("pncp") is not pncp
+
+
+def test_registry_rejects_unknown_upstream():
+    with pytest.raises(KeyError):
+        HttpClientRegistry(http2=False).get("nao-existe")
@@ -0,0 +1,122 @@
+import asyncio
+
+from infra.config import settings
+from services.ingestion_pipeline import IngestionPipeline, Page, SourceAdapter, map_item
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class ListAdapter(SourceAdapter):
+    """Fonte em memória: uma página por lista de títulos; grava só em `written`."""
+    name = "test"
+
+    def __init__(self, pages, fail_on=None, slow_write=0.0):
+        self._pages = pages
+        self.fail_on = fail_on
+        self.slow_write = slow_write
+        self.fetched = 0
+        self.written = []
+        self.batches = []
+        self.committed = []
+        self.failed = []
+
+    async def pages(self):
+        for i, titulos in enumerate(self._pages):
+            self.fetched += 1
+            yield Page(items=[{"id": f"{i}-{j}", "titulo": t} for j, t in enumerate(titulos)], uf="MA", key=i)
+
+    def normalize(self, item, page):
+        return {"pncp_id": item["id"], "titulo": item["titulo"], "estado_sigla": page.uf, "me_epp_status": None}
+
+    async def persist(self, session, rows):
+        await asyncio.sleep(self.slow_write)
+        if any(row["titulo"] == self.fail_on for row in rows):
+            raise RuntimeError("boom")
+        self.batches.append(len(rows))
+        self.written.extend(rows)
+        return len(rows), 0
+
+    async def on_committed(self, session, pages):
+        self.committed.extend(page.key for page in pages)
+
+    async def on_failed(self, session, pages, error):
+        self.failed.extend((page.key, error) for page in pages)
+
+
+def test_classify_applies_filter_engine_to_normalized_fields():
+    adapter = ListAdapter([])
+    page = Page(items=[], uf="MA")
+
+    kept = map_item(adapter, {"id": "1", "titulo": "Medicamentos - exclusivo ME/EPP"}, page)
+    rejected = map_item(adapter, {"id": "2", "titulo": "Obra de engenharia"}, page)
+    outside = map_item(adapter, {"id": "3", "titulo": "Medicamentos"}, Page(items=[], uf="SP"))
+
+    assert (kept["status"], kept["me_epp_status"], kept["priority"]) == ("recebido", "exclusivo", "alta")
+    assert (rejected["status"], rejected["rejection_reason"]) == ("rejeitado", "Blacklist/Not Whitelisted")
+    assert outside is None
+    assert (kept["titulo_normalizado"], kept["busca_normalizada"]) == ("medicamentos - exclusivo me/epp",) * 2
+
+
+def test_me_epp_uses_edital_text_and_keeps_source_flag():
+    class EditalAdapter(ListAdapter):
+        def normalize(self, item, page):
+            return {**super().normalize(item, page), "texto_edital": item.get("edital"), "me_epp_status": item.get("flag")}
+
+    adapter, page = EditalAdapter([]), Page(items=[], uf="MA")
+    by_edital = map_item(adapter, {"id": "1", "titulo": "Medicamentos", "edital": "Cota reservada para ME/EPP"}, page)
+    by_flag = map_item(adapter, {"id": "2", "titulo": "Medicamentos", "flag": "exclusivo"}, page)
+    plain = map_item(adapter, {"id": "3", "titulo": "MEDICAMENTOS E MATERIAL MÉDICO"}, page)
+
+    assert (by_edital["me_epp_status"], by_flag["me_epp_status"], plain["me_epp_status"]) == ("parcial", "exclusivo", "nao")
+    assert "texto_edital" not in by_edital
+
+
+def test_run_batches_pages_and_reports_totals(monkeypatch):
+    monkeypatch.setattr(settings, "RAW_ARCHIVE_ENABLED", False)
+    # Gravação lenta: as páginas acumulam na fila e são gravadas juntas
+    adapter = ListAdapter([["Medicamentos"] * 3 for _ in range(6)], slow_write=0.01)
+    session = FakeSession()
+
+    new, updated = asyncio.run(IngestionPipeline.run(session, adapter, batch_size=6, queue_size=4))
+
+    assert (new, updated) == (18, 0)
+    assert sorted(adapter.committed) == list(range(6))
+    assert len(adapter.batches) < 6 and max(adapter.batches) <= 6
+    assert session.rollbacks == 0
+
+
+def test_run_applies_backpressure_to_fetch():
+    adapter = ListAdapter([["Medicamentos"]] * 50, slow_write=0.01)
+
+    async def scenario():
+        task = asyncio.create_task(IngestionPipeline.run(FakeSession(), adapter, batch_size=1, queue_size=2))
+        await asyncio.sleep(0.03)
+        in_flight = adapter.fetched - len(adapter.written)
+        task.cancel()
+        return in_flight
+
+    # 2 filas de 2 páginas + uma em cada estágio: o fetch não dispara na frente
+    assert asyncio.run(scenario()) <= 7
+
+
+def test_failed_batch_is_rolled_back_and_handed_to_adapter(monkeypatch):
+    monkeypatch.setattr(settings, "RAW_ARCHIVE_ENABLED", False)
+    adapter = ListAdapter([["Medicamentos"], ["Curativo"], ["Seringa"]], fail_on="Curativo")
+    session = FakeSession()
+
+    new, _ = asyncio.run(IngestionPipeline.run(session, adapter, batch_size=1, queue_size=1))
+
+    assert new == 2
+    assert adapter.committed == [0, 2]
+    assert adapter.failed == [(1, "boom")]
+    assert session.rollbacks == 1
@@ -0,0 +1,71 @@
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+from services import ingestion_service
+from services.ingestion_service import IngestionService
+from services.sync_tracker import SyncTracker
+
+
+async def fake_flush(self):
+    self.run.id = self.run.id or id(self)
+
+
+@pytest.fixture
+def fake_sources(monkeypatch):
+    sessions = []
+
+    @contextlib.asynccontextmanager
+    async def fake_session_factory():
+        session = object()
+        sessions.append(session)
+        yield session
+
+    monkeypatch.setattr(ingestion_service, "async_session_factory", fake_session_factory)
+    monkeypatch.setattr(SyncTracker, "flush", fake_flush)
+
+    def runner(delay=0.0, new=0, updated=0, exc=None):
+        async def _run(session, days, strategy, ufs=None):
+            await asyncio.sleep(delay)
+            if exc:
+                raise exc
+            return new, updated
+        return staticmethod(_run)
+
+    monkeypatch.setattr(IngestionService, "_sync_pncp", runner(0.2, new=5, updated=2))
+    monkeypatch.setattr(IngestionService, "_sync_transferegov", runner(0.2, new=3))
+    monkeypatch.setattr(IngestionService, "_sync_scraper", runner(exc=RuntimeError("feed fora do ar")))
+    monkeypatch.setattr(IngestionService, "_sync_comprasnet", runner(5.0, new=99))
+    monkeypatch.setattr(ingestion_service.settings, "SYNC_SOURCE_TIMEOUTS", {"comprasnet": 0.3})
+    return sessions
+
+
+def test_sync_all_runs_sources_concurrently_with_own_sessions(fake_sources):
+    started = time.perf_counter()
+    report = asyncio.run(IngestionService.sync_all(days=1))
+    elapsed = time.perf_counter() - started
+
+    # Limitado pela fonte mais lenta (timeout do comprasnet), não pela soma
+    assert elapsed < 0.6
+    assert len(set(map(id, fake_sources))) == 4
+
+    by_source = {r.source: r for r in report.results}
+    assert [r.source for r in report.results] == list(IngestionService.SOURCES)
+    assert by_source["pncp"].new_items == 5 and by_source["pncp"].updated_items == 2
+    assert by_source["scraper"].status == "error"
+    assert by_source["scraper"].error == "feed fora do ar"
+    assert by_source["comprasnet"].status == "timeout"
+    assert report.new_items == 8
+    assert report.failed_sources == ["scraper", "comprasnet"]
+    assert report.to_dict()["sources"]["transferegov"]["new_items"] == 3
+    assert all(r.run_id for r in report.results)
+
+
+def test_sync_all_can_restrict_sources(fake_sources):
+    report = asyncio.run(IngestionService.sync_all(sources=["transferegov"]))
+    assert [r.source for r in report.results] == ["transferegov"]
+
+    with pytest.raises(ValueError):
+        asyncio.run(IngestionService.sync_all(sources=["nao-existe"]))
@@ -0,0 +1,94 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_job_queue
+from app.routers import sync
+from infra.config import settings
+from infra.queue import enqueue_sync, single_flight, uf_shards
+from worker import cron_schedule
+
+
+class FakeRedis:
+    """Só o necessário para SET NX e o script de liberação do lock."""
+
+    def __init__(self):
+        self.data = {}
+        self.enqueued = []
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    async def enqueue_job(self, name, *args, **kwargs):
+        self.enqueued.append((name, args, kwargs))
+
+        class _Job:
+            job_id = f"job-{len(self.enqueued)}"
+        return _Job()
+
+
+def test_single_flight_skips_overlapping_runs():
+    redis = FakeRedis()
+
+    async def _run():
+        async with single_flight(redis, "sync:pncp", ttl=60) as first:
+            async with single_flight(redis, "sync:pncp", ttl=60) as second:
+                async with single_flight(redis, "sync:comprasnet", ttl=60) as other:
+                    inner = (first, second, other)
+        async with single_flight(redis, "sync:pncp", ttl=60) as again:
+            return inner, again
+
+    (first, second, other), again = asyncio.run(_run())
+    assert (first, second, other) == (True, False, True)
+    assert again  # liberado ao sair
+    assert redis.data == {}
+
+
+def test_cron_schedule():
+    assert cron_schedule(15) == {"minute": {0, 15, 30, 45}}
+    assert cron_schedule(20, offset=3) == {"minute": {3, 23, 43}}
+    assert cron_schedule(360, offset=5) == {"hour": {0, 6, 12, 18}, "minute": 5}
+
+
+def test_sync_endpoint_enqueues_one_job_per_source():
+    redis = FakeRedis()
+    app = FastAPI()
+    app.include_router(sync.router)
+    app.dependency_overrides[get_job_queue] = lambda: redis
+    client = TestClient(app)
+
+    response = client.post("/api/sync", params={"days": 2, "strategy": "proposta_aberta"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "queued"
+    assert list(body["jobs"]) == ["pncp", "transferegov", "scraper", "comprasnet"]
+    assert redis.enqueued[0] == ("task_sync_source", ("pncp",), {"days": 2, "strategy": "proposta_aberta"})
+
+    response = client.post("/api/sync", params=[("sources", "pncp"), ("sources", "nada")])
+    assert response.status_code == 422
+
+
+def test_uf_shards_balances_states():
+    assert uf_shards(["MA", "PI", "PA"], 1) == [["MA", "PI", "PA"]]
+    assert uf_shards(["MA", "PI", "PA", "CE", "BA"], 2) == [["MA", "PA", "BA"], ["PI", "CE"]]
+    assert uf_shards(["MA", "PI"], 5) == [["MA"], ["PI"]]
+
+
+def test_enqueue_sync_shards_uf_sources(monkeypatch):
+    monkeypatch.setattr(settings, "TARGET_UFS", ["MA", "PI", "PA", "CE"])
+    monkeypatch.setattr(settings, "SYNC_UF_SHARDS", 2)
+    redis = FakeRedis()
+
+    jobs = asyncio.run(enqueue_sync(redis, ["pncp", "scraper"], uf_sources=["pncp", "comprasnet"]))
+    assert list(jobs) == ["pncp:MA-PA", "pncp:PI-CE", "scraper"]
+    assert [kwargs.get("ufs") for _, _, kwargs in redis.enqueued] == [["MA", "PA"], ["PI", "CE"], None]
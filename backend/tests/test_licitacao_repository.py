@@ -0,0 +1,284 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from domain.models import Licitacao
+from infra.licitacao_repository import LicitacaoRepository
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Captura os statements e simula o RETURNING do Postgres."""
+
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        ids = {v for k, v in params.items() if k.startswith("pncp_id")}
+        new_ids = ids - self.existing
+        self.existing |= new_ids
+        return FakeResult([(i,) for i in range(len(new_ids))])
+
+
+def make(pncp_id: str) -> Licitacao:
+    return Licitacao(
+        pncp_id=pncp_id, titulo="Aquisição de medicamentos", orgao_nome="Órgão",
+        estado_sigla="MA", data_publicacao=datetime(2025, 1, 1),
+    )
+
+
+def test_bulk_insert_uses_on_conflict_and_counts_only_new_rows():
+    session = FakeSession(existing={"a"})
+
+    inserted = asyncio.run(LicitacaoRepository.bulk_insert(session, [make("a"), make("b"), make("b"), make("c")]))
+
+    assert inserted == 2
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (pncp_id) DO NOTHING" in sql
+    assert "RETURNING licitacao.id" in sql
+
+
+def test_bulk_insert_fills_normalized_text():
+    session = FakeSession()
+
+    asyncio.run(LicitacaoRepository.bulk_insert(session, [make("a")]))
+
+    params = session.statements[0].compile(dialect=postgresql.dialect()).params
+    assert params["titulo_normalizado_m0"] == "aquisicao de medicamentos"
+    assert params["busca_normalizada_m0"] == "aquisicao de medicamentos orgao"
+
+
+def test_bulk_insert_empty_batch_is_noop():
+    session = FakeSession()
+    assert asyncio.run(LicitacaoRepository.bulk_insert(session, [])) == 0
+    assert session.statements == []
+
+
+class FakeRow:
+    def __init__(self, **mapping):
+        self._mapping = mapping
+
+
+class FakeUpdateSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    async def exec(self, stmt):
+        return FakeResult(self.rows)
+
+    async def execute(self, stmt, params=None):
+        self.executed.append((stmt, params))
+
+
+def test_bulk_apply_updates_writes_only_changed_rows():
+    old_deadline = datetime(2025, 5, 10, 9, 0)
+    new_deadline = datetime(2025, 5, 20, 9, 0)
+    session = FakeUpdateSession([
+        FakeRow(id=1, pncp_id="a", data_abertura_proposta=old_deadline, valor_estimado_total=100.0),
+        FakeRow(id=2, pncp_id="b", data_abertura_proposta=old_deadline, valor_estimado_total=100.0),
+    ])
+
+    changed = asyncio.run(LicitacaoRepository.bulk_apply_updates(session, {
+        "a": {"data_abertura_proposta": new_deadline, "valor_estimado_total": None},
+        "b": {"data_abertura_proposta": old_deadline, "valor_estimado_total": 100.0},
+        "nao-gravada": {"data_abertura_proposta": new_deadline, "valor_estimado_total": 1.0},
+    }))
+
+    assert changed == 1
+    [(stmt, params)] = session.executed
+    assert params[0]["b_id"] == 1
+    assert params[0]["data_abertura_proposta"] == new_deadline
+    assert params[0]["valor_estimado_total"] == 100.0
+    assert params[0]["edital_atualizado"] is True
+
+
+def test_bulk_rewrite_keeps_manual_status():
+    session = FakeUpdateSession([
+        FakeRow(id=1, pncp_id="a", status="recebido", rejection_reason=None, score=10, decided=False),
+        FakeRow(id=2, pncp_id="b", status="aprovado", rejection_reason=None, score=10, decided=True),
+        FakeRow(id=3, pncp_id="c", status="rejeitado", rejection_reason="Blacklist/Not Whitelisted", score=0,
+                decided=False),
+    ])
+    rows = {
+        "a": {"status": "rejeitado", "rejection_reason": "Blacklist/Not Whitelisted", "score": 0},
+        "b": {"status": "rejeitado", "rejection_reason": "Blacklist/Not Whitelisted", "score": 0},
+        "c": {"status": "rejeitado", "rejection_reason": "Blacklist/Not Whitelisted", "score": 0},
+    }
+
+    changed = asyncio.run(LicitacaoRepository.bulk_rewrite(session, rows, keep_decisions=True))
+
+    assert changed == 2
+    [(_, params)] = session.executed
+    by_id = {p["b_id"]: p for p in params}
+    assert by_id[1]["status"] == "rejeitado" and by_id[1]["score"] == 0
+    # Decisão manual preservada; o score é recalculado mesmo assim
+    assert by_id[2]["status"] == "aprovado" and by_id[2]["score"] == 0
+    assert "edital_atualizado" not in by_id[1]
+
+
+def test_bulk_rewrite_keeps_operator_rejections_and_exclusivo():
+    session = FakeUpdateSession([
+        # Rejeitada pelo operador: o replay acha o título relevante, mas não reabre
+        FakeRow(id=1, pncp_id="a", status="rejeitado", rejection_reason="Preço inexequível (operador)",
+                me_epp_status="nao", score=0, decided=False),
+        # Reaberta no kanban depois de rejeitada pela ingestão
+        FakeRow(id=2, pncp_id="b", status="recebido", rejection_reason="Blacklist/Not Whitelisted",
+                me_epp_status="nao", score=0, decided=True),
+        # "exclusivo" da flag exclusivoMeEpp / análise do edital; o título sozinho diz "nao"
+        FakeRow(id=3, pncp_id="c", status="recebido", rejection_reason=None,
+                me_epp_status="exclusivo", score=0, decided=False),
+        FakeRow(id=4, pncp_id="d", status="recebido", rejection_reason=None,
+                me_epp_status="parcial", score=30, decided=False),
+    ])
+    incoming = {"status": "recebido", "rejection_reason": None, "me_epp_status": "nao", "score": 30}
+    rows = {pncp_id: dict(incoming) for pncp_id in "abcd"}
+
+    changed = asyncio.run(LicitacaoRepository.bulk_rewrite(session, rows, keep_decisions=True))
+
+    [(stmt, params)] = session.executed
+    by_id = {p["b_id"]: p for p in params}
+    assert changed == 4
+    assert (by_id[1]["status"], by_id[1]["rejection_reason"], by_id[1]["score"]) == (
+        "rejeitado", "Preço inexequível (operador)", 30)
+    assert (by_id[2]["status"], by_id[2]["rejection_reason"]) == ("recebido", "Blacklist/Not Whitelisted")
+    assert by_id[3]["me_epp_status"] == "exclusivo"
+    # "parcial" não é protegido: o replay corrige (ex.: antiga checagem por substring)
+    assert by_id[4]["me_epp_status"] == "nao"
+
+
+class BackfillSession:
+    """Serve a tabela por keyset (id > último) e guarda os UPDATEs e commits."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.commits = 0
+
+    async def exec(self, stmt):
+        params = stmt.compile().params
+        after, limit = params["id_1"], params["param_1"]
+        return FakeResult([r for r in self.rows if r[0] > after][:limit])
+
+    async def execute(self, stmt, params=None):
+        self.executed.append(params)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_backfill_normalized_walks_table_in_batches():
+    session = BackfillSession([
+        (1, "Saúde Pública", "Prefeitura", "São Luís"),
+        (2, "ALGODÃO", None, None),
+        (5, "Diagnóstico", "Hospital", "Belém"),
+    ])
+
+    filled = asyncio.run(LicitacaoRepository.backfill_normalized(session, batch_size=2))
+
+    assert filled == 3
+    assert session.commits == 2
+    assert [len(batch) for batch in session.executed] == [2, 1]
+    assert session.executed[0][0] == {
+        "b_id": 1, "titulo_normalizado": "saude publica", "busca_normalizada": "saude publica prefeitura sao luis",
+    }
+    assert session.executed[1][0]["busca_normalizada"] == "diagnostico hospital belem"
+
+
+def test_search_combines_fulltext_substring_and_trigram_paths(monkeypatch):
+    from sqlmodel import select
+
+    from infra.config import settings
+
+    monkeypatch.setattr(settings, "SEARCH_SIMILARITY_THRESHOLD", 0.5)
+    session = FakeSession()
+    matches, rank = asyncio.run(LicitacaoRepository.search(session, "Seringas DESCARTÁVEIS 10%"))
+    stmt = select(Licitacao.id).where(matches).order_by(rank.desc()).limit(20)
+    # Dialeto do app (asyncpg): sem o escape de % do pyformat
+    compiled = stmt.compile(dialect=postgresql.asyncpg.dialect())
+    sql = str(compiled)
+
+    assert "licitacao.busca_tsv @@ websearch_to_tsquery" in sql
+    assert "licitacao.busca_normalizada LIKE '%' ||" in sql and "ESCAPE '/'" in sql
+    assert "<% licitacao.busca_normalizada" in sql
+    assert "ts_rank_cd(licitacao.busca_tsv" in sql and "word_similarity(" in sql
+    assert "seringas descartaveis 10%" in compiled.params.values()
+    assert "seringas descartaveis 10/%" in compiled.params.values()  # curinga do LIKE escapado
+    # Limiar do pg_trgm só nesta transação
+    threshold = session.statements[0].compile(dialect=postgresql.dialect())
+    assert "set_config" in str(threshold) and "0.5" in threshold.params.values()
+    # A coluna gerada não entra no INSERT nem no SELECT do modelo
+    assert "busca_tsv" not in str(select(Licitacao))
+
+
+def test_cursor_round_trip_compiles_to_row_comparison():
+    from sqlmodel import select
+
+    from infra.licitacao_repository import LISTING_ORDER
+
+    row = make("a")
+    row.id, row.score = 42, 30
+    cursor = LicitacaoRepository.encode_cursor(row)
+
+    stmt = select(Licitacao.id).where(LicitacaoRepository.after_cursor(cursor)).order_by(*LISTING_ORDER)
+    compiled = stmt.compile(dialect=postgresql.asyncpg.dialect())
+    sql = str(compiled)
+
+    assert "=" not in cursor
+    assert "(licitacao.score, licitacao.data_publicacao, licitacao.id) < (" in sql
+    assert "ORDER BY licitacao.score DESC, licitacao.data_publicacao DESC, licitacao.id DESC" in sql
+    assert {30, datetime(2025, 1, 1), 42} <= set(compiled.params.values())
+
+
+def test_invalid_cursor_raises_value_error():
+    import pytest
+
+    for cursor in ("não-é-base64", "WzEsMl0", ""):  # WzEsMl0 = [1,2]
+        with pytest.raises(ValueError):
+            LicitacaoRepository.after_cursor(cursor)
+
+
+class CountSession:
+    def __init__(self, total):
+        self.total = total
+        self.calls = 0
+
+    async def exec(self, stmt):
+        self.calls += 1
+        return self
+
+    def one(self):
+        return self.total
+
+
+def test_cached_count_reuses_total_within_ttl(monkeypatch):
+    from sqlmodel import func, select
+
+    import infra.licitacao_repository as repository
+
+    monkeypatch.setattr(repository, "_count_cache", {})
+    session = CountSession(1234)
+    stmt = select(func.count()).select_from(Licitacao).where(Licitacao.status != "rejeitado")
+    # O corte de `days` muda a cada request; dentro do mesmo minuto é a mesma chave
+    cut = lambda s: stmt.where(Licitacao.data_publicacao >= datetime(2025, 1, 1, 10, 0, s))  # noqa: E731
+
+    assert asyncio.run(LicitacaoRepository.cached_count(session, cut(5), ttl=60)) == 1234
+    session.total = 9999
+    assert asyncio.run(LicitacaoRepository.cached_count(session, cut(40), ttl=60)) == 1234
+    assert session.calls == 1
+    # Outro filtro, ou TTL vencido, vai ao banco
+    assert asyncio.run(LicitacaoRepository.cached_count(session, stmt, ttl=60)) == 9999
+    assert asyncio.run(LicitacaoRepository.cached_count(session, cut(5), ttl=0)) == 9999
+    assert session.calls == 3
@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+
+from services.pncp_client import PNCPClient
+
+
+def make_client(pages_by_combo: dict, concurrency: int, in_flight: list):
+    """PNCPClient apontando para um stub local do /contratacoes/publicacao."""
+    active = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active
+        active += 1
+        in_flight.append(active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+        params = request.url.params
+        combo = (params["uf"], params["codigoModalidadeContratacao"])
+        page = int(params["pagina"])
+        total = pages_by_combo.get(combo, 0)
+        data = [{"combo": combo, "page": page}] if page <= total else []
+        return httpx.Response(200, json={"data": data, "totalPaginas": total})
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return PNCPClient(client=http, concurrency=concurrency)
+
+
+def collect(client: PNCPClient, states, modalities):
+    async def _run():
+        return [
+            (uf, mod, page, items)
+            async for uf, mod, page, items in client.iter_pages("20250101", "20250103", states, modalities)
+        ]
+    return asyncio.run(_run())
+
+
+def test_iter_pages_keeps_order():
+    pages = {("MA", "6"): 3, ("MA", "8"): 0, ("PI", "6"): 2, ("PI", "8"): 1}
+    client = make_client(pages, concurrency=4, in_flight=[])
+
+    result = collect(client, ["MA", "PI"], ["6", "8"])
+
+    assert [(uf, mod, page) for uf, mod, page, _ in result] == [
+        ("MA", "6", 1), ("MA", "6", 2), ("MA", "6", 3),
+        ("PI", "6", 1), ("PI", "6", 2),
+        ("PI", "8", 1),
+    ]
+    for uf, mod, page, items in result:
+        assert items == [{"combo": [uf, mod], "page": page}]
+
+
+def test_iter_pages_respects_concurrency_limit():
+    pages = {(uf, mod): 4 for uf in ["MA", "PI", "PA"] for mod in ["6", "8"]}
+    in_flight: list = []
+    client = make_client(pages, concurrency=3, in_flight=in_flight)
+
+    result = collect(client, ["MA", "PI", "PA"], ["6", "8"])
+
+    assert len(result) == 24
+    assert max(in_flight) <= 3
+    assert max(in_flight) > 1
+
+
+def test_iter_combos_honours_plan_start_page():
+    pages = {("MA", "6"): 5}
+    client = make_client(pages, concurrency=2, in_flight=[])
+
+    async def _run():
+        return [
+            combo async for combo in client.iter_combos(
+                "20250101", "20250103", ["MA"], ["6"], plan={("MA", "6"): ("20250102", 4)}
+            )
+        ]
+
+    [combo] = asyncio.run(_run())
+    assert combo.window_start == "20250102"
+    assert [page for page, _ in combo.pages] == [4, 5]
+    assert combo.complete
+
+
+def test_open_proposals_feed_only_sends_data_final():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url)
+        return httpx.Response(200, json={"data": [], "totalPaginas": 0})
+
+    client = PNCPClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def _run():
+        return [c async for c in client.iter_combos("", "20250301", ["MA"], client.OPEN_MODALITIES, endpoint="proposta")]
+
+    asyncio.run(_run())
+    assert len(seen) == len(PNCPClient.OPEN_MODALITIES)
+    assert "8" not in PNCPClient.OPEN_MODALITIES
+    for url in seen:
+        assert url.path.endswith("/contratacoes/proposta")
+        assert url.params["dataFinal"] == "20250301"
+        assert "dataInicial" not in url.params
+
+
+def test_crawl_returns_the_count_of_its_own_feed(monkeypatch):
+    from services.ingestion_pipeline import IngestionPipeline
+
+    async def fake_run(session, adapter):
+        return 4, 3
+
+    monkeypatch.setattr(IngestionPipeline, "run", staticmethod(fake_run))
+    client = PNCPClient(states=["MA"])
+    crawl = dict(source="test", days=1, incremental=False, watermark_fields=("dataPublicacaoPncp",))
+
+    assert asyncio.run(client._crawl(None, endpoint="publicacao", **crawl)) == 4
+    assert asyncio.run(client._crawl(None, endpoint="atualizacao", **crawl)) == 3
@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+import pytest
+
+from infra.config import settings
+from services.ingestion_pipeline import Page, SourceAdapter, map_item
+from services.relevance_classifier import RelevanceClassifier, RelevanceModel, features
+from services.relevance_service import RelevanceService
+
+APPROVED = [
+    "aquisicao de medicamentos para a secretaria de saude",
+    "registro de precos de material medico hospitalar",
+    "aquisicao de seringas e agulhas descartaveis",
+    "fornecimento de medicamentos de uso continuo",
+    "aquisicao de material hospitalar para upa",
+]
+REJECTED = [
+    "aquisicao de material de expediente",
+    "locacao de veiculos para a secretaria de administracao",
+    "aquisicao de generos alimenticios para merenda escolar",
+    "contratacao de servicos de limpeza e conservacao",
+    "aquisicao de pneus para a frota municipal",
+]
+
+
+@pytest.fixture
+def no_model():
+    yield
+    RelevanceClassifier.use_model(None)
+
+
+def trained_model() -> RelevanceModel:
+    model = RelevanceModel()
+    model.partial_fit([(t, 1) for t in APPROVED] + [(t, 0) for t in REJECTED], epochs=20)
+    return model
+
+
+def test_features_are_stable_hashed_ngrams():
+    feats = features("aquisicao de medicamentos", bits=20)
+    # "de" entra (2 letras); bigramas também; índices dentro do espaço de hashing
+    assert len(feats) == 5
+    assert all(0 <= f < 2 ** 20 for f in feats)
+    assert sorted(feats) == sorted(features("aquisicao  de medicamentos", bits=20))
+
+
+def test_partial_fit_separates_kanban_decisions():
+    model = trained_model()
+    relevant, irrelevant = model.predict_many([
+        "aquisicao de medicamentos e material hospitalar",
+        "locacao de veiculos e material de expediente",
+    ])
+    assert relevant > 0.7 and irrelevant < 0.3
+    assert model.examples == len(APPROVED) + len(REJECTED)
+
+
+def test_incremental_fit_moves_predictions_and_roundtrips():
+    model = trained_model()
+    before = model.predict_many(["aquisicao de pneus para ambulancias"])[0]
+    model.partial_fit([("aquisicao de pneus para ambulancias", 1)] * 3)
+    after = model.predict_many(["aquisicao de pneus para ambulancias"])[0]
+    assert after > before
+
+    loaded = RelevanceModel.loads(model.dumps())
+    assert loaded.examples == model.examples
+    assert loaded.predict_many(APPROVED) == model.predict_many(APPROVED)
+
+
+def test_no_relevance_until_min_examples(monkeypatch, no_model):
+    monkeypatch.setattr(settings, "RELEVANCE_MIN_EXAMPLES", 30)
+    RelevanceClassifier.use_model(trained_model())
+    assert RelevanceClassifier.predict_many(APPROVED[:2]) == [None, None]
+
+    monkeypatch.setattr(settings, "RELEVANCE_MIN_EXAMPLES", 10)
+    assert all(p is not None for p in RelevanceClassifier.predict_many(APPROVED[:2]))
+
+
+class OneAdapter(SourceAdapter):
+    geographic_filter = False
+
+    def normalize(self, item, page):
+        return {"pncp_id": item["id"], "titulo": item["titulo"], "estado_sigla": "MA", "me_epp_status": None}
+
+
+def test_ingestion_writes_relevance_next_to_score(monkeypatch, no_model):
+    monkeypatch.setattr(settings, "RELEVANCE_MIN_EXAMPLES", 1)
+    RelevanceClassifier.use_model(trained_model())
+
+    fields = map_item(OneAdapter(), {"id": "1", "titulo": "Aquisição de Medicamentos"}, Page(items=[]))
+
+    assert fields["score"] == 30
+    assert fields["relevance"] > 0.5
+
+
+def test_page_inference_takes_milliseconds(no_model):
+    model = trained_model()
+    page = [f"{t} - processo {i}/2026" for i in range(50) for t in APPROVED + REJECTED][:500]
+    started = time.perf_counter()
+    model.predict_many(page)
+    assert time.perf_counter() - started < 0.05
+
+
+def test_refresh_keeps_model_when_db_fails(no_model):
+    import contextlib
+
+    @contextlib.asynccontextmanager
+    async def broken_factory():
+        yield object()
+
+    model = trained_model()
+    RelevanceClassifier.use_model(model)
+    assert asyncio.run(RelevanceService.refresh(broken_factory, force=True)) is False
+    assert RelevanceClassifier.MODEL is model
+
+
+class TrainSession:
+    """Sem modelo salvo: serve os StatusEvent pendentes e depois o histórico do kanban."""
+
+    def __init__(self, events, history):
+        self.results = [events, history]
+        self.statements = []
+        self.executed = []
+        self.commits = 0
+
+    async def exec(self, stmt):
+        self.statements.append(stmt)
+        rows = self.results.pop(0)
+
+        class _Result:
+            def all(_self):
+                return rows
+        return _Result()
+
+    async def get(self, model, row_id):
+        return None
+
+    async def execute(self, stmt):
+        self.executed.append(stmt)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_first_training_seeds_from_existing_kanban_history():
+    from sqlalchemy.dialects import postgresql
+
+    history = [(t.upper(), t, "aprovado") for t in APPROVED] + [(t, "", "rejeitado") for t in REJECTED]
+    session = TrainSession(events=[], history=history)
+
+    examples = asyncio.run(RelevanceService.train(session))
+
+    assert examples == len(APPROVED) + len(REJECTED)
+    assert session.commits == 1
+    [upsert] = session.executed  # sem eventos, nada a marcar como treinado
+    params = upsert.compile(dialect=postgresql.dialect()).params
+    model = RelevanceModel.loads(params["weights"])
+    assert model.examples == examples
+    relevant, irrelevant = model.predict_many([APPROVED[0], REJECTED[0]])
+    assert relevant > 0.5 > irrelevant
+    # Só rejeições do operador e licitações ainda sem StatusEvent
+    sql = str(session.statements[1].compile(dialect=postgresql.dialect()))
+    assert "licitacao.rejection_reason IS NULL OR (licitacao.rejection_reason NOT IN" in sql
+    assert "NOT (EXISTS (SELECT" in sql and "status_event.licitacao_id = licitacao.id" in sql
@@ -0,0 +1,89 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from infra.licitacao_repository import LicitacaoRepository
+from services.raw_archive_service import decode, encode
+from services.replay_service import ReplayService, rescore_rows
+
+
+def pncp_item(seq: int, objeto: str) -> dict:
+    return {
+        "orgaoEntidade": {"cnpj": "00000000000191", "razaoSocial": "Prefeitura"},
+        "anoCompra": 2024, "sequencialCompra": seq, "objetoCompra": objeto,
+        "codigoModalidadeContratacao": 6, "dataPublicacaoPncp": "2024-05-01T10:00:00",
+    }
+
+
+def archived(item: dict) -> tuple:
+    codec, _, payload = encode(item, "zlib")
+    return codec, payload
+
+
+def test_encode_roundtrip_is_canonical():
+    item = {"b": 1, "a": "ação"}
+    codec, digest, payload = encode(item, "zlib")
+    assert decode(codec, payload) == item
+    assert encode({"a": "ação", "b": 1}, "zlib")[1] == digest
+
+
+def test_rescore_rows_maps_filters_and_counts_errors():
+    rows = [
+        ("pncp", "MA", *archived(pncp_item(1, "Aquisição de medicamentos"))),
+        ("pncp", "MA", *archived(pncp_item(2, "Obra de engenharia"))),
+        ("pncp", "SP", *archived(pncp_item(3, "Aquisição de medicamentos"))),
+        ("pncp", "MA", "zlib", b"corrompido"),
+    ]
+
+    out, errors = rescore_rows(rows)
+
+    assert errors == 1
+    assert set(out) == {"00000000000191-2024-1", "00000000000191-2024-2"}  # SP fora das TARGET_UFS
+    assert out["00000000000191-2024-1"]["status"] == "recebido"
+    assert out["00000000000191-2024-1"]["modalidade_codigo"] == 6
+    assert out["00000000000191-2024-2"]["status"] == "rejeitado"
+
+
+class ArchiveSession:
+    """Serve o arquivo em lotes por keyset (id > último) e conta commits."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.commits = 0
+
+    async def exec(self, stmt):
+        params = stmt.compile().params
+        after, limit = params["id_1"], params["param_1"]
+
+        class _Result:
+            def all(_self):
+                return [r for r in self.rows if r[0] > after][:limit]
+        return _Result()
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_replay_pipeline_rewrites_in_batches(monkeypatch):
+    rows = [
+        (i, "pncp", "MA", *archived(pncp_item(i, "Material hospitalar")))
+        for i in range(1, 8)
+    ]
+    written = []
+
+    async def fake_rewrite(session, batch, keep_decisions=False):
+        written.append(sorted(batch))
+        return len(batch)
+
+    monkeypatch.setattr(LicitacaoRepository, "bulk_rewrite", staticmethod(fake_rewrite))
+    session = ArchiveSession(rows)
+
+    async def _run():
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            return await ReplayService.replay(session, batch_size=3, workers=2, executor=pool)
+
+    report = asyncio.run(_run())
+
+    assert (report.scanned, report.mapped, report.changed, report.errors) == (7, 7, 7, 0)
+    assert [len(batch) for batch in written] == [3, 3, 1]
+    assert written[0][0] == "00000000000191-2024-1"
+    assert session.commits == 3
@@ -0,0 +1,104 @@
+import asyncio
+
+from services.rescore_service import RescoreService
+
+
+class TableSession:
+    """Serve licitações por keyset (id > último) e guarda os UPDATEs executemany."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+        self.statements = []
+        self.commits = 0
+
+    async def exec(self, stmt):
+        params = stmt.compile().params
+        after, limit = params["id_1"], params["param_1"]
+
+        class _Result:
+            def all(_self):
+                return [r for r in self.rows if r[0] > after][:limit]
+        return _Result()
+
+    async def execute(self, stmt, params):
+        self.statements.append(stmt)
+        self.updates.append(params)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def row(row_id, pncp_id, titulo, titulo_normalizado, status="recebido", reason=None, priority="baixa", score=0,
+        decided=False):
+    return (row_id, pncp_id, titulo, titulo_normalizado, status, reason, priority, score, None, decided)
+
+
+def test_rescore_updates_only_changed_rows_in_batches():
+    session = TableSession([
+        # Já classificada como está hoje: não muda
+        row(1, "a", "Aquisição de medicamentos", "aquisicao de medicamentos", priority="alta", score=30),
+        # Não passa mais pelo filtro semântico
+        row(2, "b", "Obra de engenharia", "obra de engenharia"),
+        # Gravada antes da coluna normalizada
+        row(3, "c", "Aquisição de medicamentos", ""),
+        # Scraper não tem filtro semântico: só prioridade
+        row(4, "scraper-1", "Obra de engenharia", "obra de engenharia", priority="alta", score=30),
+    ])
+
+    report = asyncio.run(RescoreService.rescore(session, batch_size=2))
+
+    assert (report.scanned, report.changed) == (4, 3)
+    assert session.commits == 2
+    updates = {p["b_id"]: p for batch in session.updates for p in batch}
+    assert set(updates) == {2, 3, 4}
+    assert (updates[2]["b_status"], updates[2]["b_rejection_reason"]) == ("rejeitado", "Blacklist/Not Whitelisted")
+    assert (updates[3]["b_priority"], updates[3]["b_score"]) == ("alta", 30)
+    assert (updates[4]["b_status"], updates[4]["b_priority"]) == ("recebido", "baixa")
+
+
+def test_rescore_keeps_operator_decisions():
+    session = TableSession([
+        # Rejeitada pelo operador, mas o título passa no whitelist
+        row(1, "a", "Aquisição de medicamentos", "aquisicao de medicamentos",
+            status="rejeitado", reason="Preço inexequível (operador)"),
+        # Rejeitada pelo operador sem motivo
+        row(2, "b", "Aquisição de medicamentos", "aquisicao de medicamentos", status="rejeitado"),
+        # Reaberta no kanban ("recebido" com StatusEvent): também é decisão humana
+        row(3, "c", "Obra de engenharia", "obra de engenharia", decided=True),
+        # Rejeição da própria ingestão: essa a máquina pode desfazer
+        row(4, "d", "Aquisição de medicamentos", "aquisicao de medicamentos",
+            status="rejeitado", reason="Blacklist/Not Whitelisted"),
+    ])
+
+    report = asyncio.run(RescoreService.rescore(session))
+
+    updates = {p["b_id"]: p for batch in session.updates for p in batch}
+    assert set(updates) == {4} and report.changed == 1
+    assert (updates[4]["b_status"], updates[4]["b_rejection_reason"]) == ("recebido", None)
+    update_sql = str(session.statements[0])
+    assert "NOT (EXISTS (SELECT" in update_sql and "status_event.licitacao_id = licitacao.id" in update_sql
+
+
+def test_rescore_dry_run_only_counts():
+    session = TableSession([row(1, "a", "Obra de engenharia", "obra de engenharia")])
+
+    report = asyncio.run(RescoreService.rescore(session, dry_run=True))
+
+    assert report.changed == 1
+    assert session.updates == [] and session.commits == 0
+
+
+def test_relabel_me_epp_fixes_substring_matches_without_downgrading_exclusivo():
+    session = TableSession([
+        (1, "Aquisição de MEDICAMENTOS", "aquisicao de medicamentos", "parcial"),
+        (2, "Medicamentos - cota reservada ME/EPP", "medicamentos - cota reservada me/epp", "nao"),
+        (3, "Medicamentos", "medicamentos", "exclusivo"),  # flag exclusivoMeEpp da fonte
+        (4, "Material hospitalar", "material hospitalar", "nao"),
+    ])
+
+    report = asyncio.run(RescoreService.relabel_me_epp(session, batch_size=3))
+
+    assert (report.scanned, report.changed) == (4, 2)
+    updates = {p["b_id"]: p["b_me_epp_status"] for batch in session.updates for p in batch}
+    assert updates == {1: "nao", 2: "parcial"}
@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx
+import pytest
+
+from infra.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LocalTokenBucket,
+    ResilientTransport,
+    backoff_delay,
+    parse_retry_after,
+)
+
+
+def make_client(handler, **kwargs) -> httpx.AsyncClient:
+    kwargs.setdefault("backoff_base", 0)
+    transport = ResilientTransport(httpx.MockTransport(handler), **kwargs)
+    return httpx.AsyncClient(transport=transport)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("lixo") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_backoff_honours_retry_after():
+    assert backoff_delay(0, base=0.1, cap=30, retry_after=5) >= 5
+    assert backoff_delay(10, base=1, cap=2) <= 2
+
+
+def test_retries_429_and_5xx_until_success():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if len(calls) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True})
+
+    async def _run():
+        async with make_client(handler) as client:
+            return await client.get("https://pncp.gov.br/api/x")
+
+    response = asyncio.run(_run())
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+def test_gives_back_last_response_when_retries_exhausted():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        return httpx.Response(502)
+
+    async def _run():
+        async with make_client(handler, max_retries=2) as client:
+            return await client.get("https://pncp.gov.br/api/x")
+
+    assert asyncio.run(_run()).status_code == 502
+    assert len(calls) == 3
+
+
+def test_circuit_opens_and_sheds_load():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        return httpx.Response(500)
+
+    async def _run():
+        async with make_client(handler, max_retries=0, failure_threshold=2, reset_timeout=60) as client:
+            for _ in range(2):
+                await client.get("https://pncp.gov.br/api/x")
+            with pytest.raises(CircuitOpenError):
+                await client.get("https://pncp.gov.br/api/x")
+            # Outro host tem o próprio circuito
+            await client.get("https://compras.dados.gov.br/x")
+
+    asyncio.run(_run())
+    assert len(calls) == 3
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("pncp", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+
+    breaker.before_request()
+    assert breaker.state == breaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+
+
+def test_local_bucket_limits_burst():
+    bucket = LocalTokenBucket()
+
+    async def _run():
+        return [await bucket.try_acquire("pncp", rate=1, burst=2) for _ in range(3)]
+
+    first, second, third = asyncio.run(_run())
+    assert first == second == 0
+    assert 0 < third <= 1
@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+
+from infra.resilience import ResilientTransport
+from scripts.standin_server import StandinConfig, create_app
+from services.pncp_client import PNCPClient
+
+BASE = "http://standin/pncp/api/consulta/v1"
+
+
+def make_pncp(cfg: StandinConfig, transport=None) -> PNCPClient:
+    transport = transport or httpx.ASGITransport(app=create_app(cfg))
+    client = PNCPClient(client=httpx.AsyncClient(transport=transport, base_url="http://standin"), concurrency=4)
+    client.base_url = BASE
+    return client
+
+
+def test_pncp_client_reads_synthetic_pages():
+    client = make_pncp(StandinConfig(pages=3, page_size=5, ufs=["MA"]))
+
+    async def _run():
+        return [c async for c in client.iter_combos("20250101", "20250103", ["MA", "PI"], ["6"])]
+
+    ma, pi = asyncio.run(_run())
+    assert [page for page, _ in ma.pages] == [1, 2, 3]
+    assert ma.complete and sum(len(items) for _, items in ma.pages) == 15
+    assert pi.pages == [] and pi.complete
+
+    item = ma.pages[0][1][0]
+    assert PNCPClient.build_pncp_id(item).endswith("-2025-1")
+    assert PNCPClient.parse_tracked_fields(item)["modalidade_codigo"] == 6
+
+
+def test_injected_errors_are_retried_by_resilient_transport():
+    cfg = StandinConfig(pages=2, page_size=5, ufs=["MA"], error_rate=0.5, seed=7)
+    transport = ResilientTransport(
+        httpx.ASGITransport(app=create_app(cfg)), max_retries=20, backoff_base=0, failure_threshold=1000
+    )
+    client = make_pncp(cfg, transport)
+
+    async def _run():
+        return [c async for c in client.iter_combos("20250101", "20250103", ["MA"], ["6", "8"])]
+
+    for combo in asyncio.run(_run()):
+        assert combo.complete
+        assert len(combo.pages) == 2
+
+
+def test_stats_count_served_records():
+    app = create_app(StandinConfig(pages=1, page_size=4, ufs=["PI"]))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://standin") as http:
+            await http.get("/comprasnet/licitacoes/v1/licitacoes.json", params={"uf": "PI"})
+            await http.get("/pncp/pncp-api/v1/orgaos/123/compras/2025/1/arquivos")
+            return (await http.get("/_stats")).json()
+
+    stats = asyncio.run(_run())
+    assert stats["requests"] == 2
+    assert stats["records"] == 4 + 2
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime
+
+from domain.models import SyncState
+from infra.config import settings
+from services.sync_state_service import SyncStateService
+
+DEFAULT_START = datetime(2025, 3, 7, 12, 0)
+
+
+def test_plan_window_without_watermark_uses_default_window():
+    assert SyncStateService.plan_window(None, DEFAULT_START) == ("20250307", 1)
+
+
+def test_plan_window_applies_overlap():
+    state = SyncState(
+        source="pncp_publicacao", uf="MA", modalidade="6",
+        last_published_at=datetime(2025, 3, 10, settings.PNCP_SYNC_OVERLAP_HOURS - 1, 0),
+        window_start="20250310", last_page=4,
+    )
+    # Recuar o overlap cai no dia anterior: janela nova, começa da página 1
+    assert SyncStateService.plan_window(state, DEFAULT_START) == ("20250309", 1)
+
+
+def test_plan_window_resumes_interrupted_window_at_checkpoint():
+    state = SyncState(
+        source="pncp_publicacao", uf="MA", modalidade="6",
+        last_published_at=datetime(2025, 3, 10, 18, 0),
+        window_start="20250310", last_page=4,
+    )
+    assert SyncStateService.plan_window(state, DEFAULT_START) == ("20250310", 4)
+
+
+def test_plan_window_rereads_completed_window_from_first_page():
+    state = SyncState(
+        source="pncp_publicacao", uf="MA", modalidade="6",
+        last_published_at=datetime(2025, 3, 10, 18, 0),
+        window_start="20250310", last_page=0,
+    )
+    # Mesma janela, mas concluída: o overlap é relido inteiro (publicações atrasadas)
+    assert SyncStateService.plan_window(state, DEFAULT_START) == ("20250310", 1)
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class FakeSession:
+    def __init__(self, state):
+        self.state = state
+
+    async def exec(self, stmt):
+        return FakeResult(self.state)
+
+    def add(self, row):
+        pass
+
+
+def test_advance_clears_checkpoint_when_window_completes():
+    state = SyncState(source="pncp_publicacao", uf="MA", modalidade="6", window_start="20250310", last_page=4)
+    seen = datetime(2025, 3, 10, 20, 0)
+
+    asyncio.run(SyncStateService.advance(FakeSession(state), "pncp_publicacao", "MA", "6", "20250310", seen))
+
+    assert (state.window_start, state.last_page, state.last_published_at) == ("20250310", 0, seen)
+    assert SyncStateService.plan_window(state, DEFAULT_START)[1] == 1
+
+
+def test_plan_window_resumes_first_run_checkpoint_without_watermark():
+    # Primeira execução interrompida: ainda sem last_published_at, mas com checkpoint
+    state = SyncState(source="pncp_publicacao", uf="MA", modalidade="6", window_start="20250307", last_page=6)
+    assert SyncStateService.plan_window(state, DEFAULT_START) == ("20250307", 6)
+
+
+def test_feed_adapter_checkpoints_committed_pages_until_combo_finishes(monkeypatch):
+    from services.dead_letter_service import DeadLetterService
+    from services.ingestion_pipeline import Page
+    from services.pncp_client import ComboResult, PNCPFeedAdapter
+
+    calls = []
+
+    async def fake_advance(session, source, uf, modalidade, window_start, last_published_at, last_page=0):
+        calls.append((uf, modalidade, window_start, last_published_at, last_page))
+
+    async def fake_supersede(session, endpoint, combo):
+        return 0
+
+    monkeypatch.setattr(SyncStateService, "advance", staticmethod(fake_advance))
+    monkeypatch.setattr(DeadLetterService, "supersede", staticmethod(fake_supersede))
+    adapter = PNCPFeedAdapter(None, source="pncp_publicacao", incremental=True)
+    ma = ComboResult(uf="MA", modalidade="6", window_start="20250310")
+    pi = ComboResult(uf="PI", modalidade="6", window_start="20250310")
+    adapter._failures = {("MA", "6"): {}, ("PI", "6"): {2: "HTTP 503"}}
+    item = {"dataPublicacaoPncp": "2025-03-10T12:00:00"}
+
+    def page(combo, number, final=False):
+        return Page(items=[] if final else [item], uf=combo.uf, key=(combo, number), final=final)
+
+    asyncio.run(adapter.on_committed(None, [page(ma, 1), page(ma, 2), page(pi, 3)]))
+    # Checkpoint sem mexer no watermark; PI tem página anterior falhada: não avança
+    assert calls == [("MA", "6", "20250310", None, 2)]
+
+    calls.clear()
+    asyncio.run(adapter.on_committed(None, [page(ma, 3), page(ma, None, final=True)]))
+    # Janela concluída: watermark anda e o checkpoint é zerado
+    assert calls == [("MA", "6", "20250310", datetime(2025, 3, 10, 12, 0), 0)]
@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from services import sync_tracker
+from services.sync_tracker import SyncTracker, timed, track
+
+
+class FakeDB:
+    """Guarda o que seria gravado em sync_run/sync_stage, por id."""
+
+    def __init__(self):
+        self.rows = {}
+        self.next_id = 1
+
+    def session(self):
+        db = self
+
+        class _Session:
+            def __init__(self):
+                self.pending = []
+
+            def add(self, row):
+                self.pending.append(row)
+
+            async def flush(self):
+                for row in self.pending:
+                    row.id = db.next_id
+                    db.next_id += 1
+                    db.rows[(type(row).__name__, row.id)] = row.model_dump()
+                self.pending = []
+
+            async def execute(self, stmt):
+                table = stmt.table.name
+                model = {"sync_run": "SyncRun", "sync_stage": "SyncStage"}[table]
+                row_id = stmt.whereclause.right.value
+                values = {col.key: val.value for col, val in stmt._values.items()}
+                db.rows[(model, row_id)].update(values)
+
+            async def commit(self):
+                pass
+
+        @contextlib.asynccontextmanager
+        async def factory():
+            yield _Session()
+
+        return factory
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(sync_tracker, "async_session_factory", fake.session())
+    monkeypatch.setattr(sync_tracker.settings, "SYNC_PROGRESS_FLUSH_SECONDS", 0.01)
+    return fake
+
+
+def test_tracker_records_stages_and_progress(db):
+    seen_while_running = {}
+
+    async def _run():
+        async with SyncTracker.start("pncp", job_id="job-1") as tracker:
+            with timed("fetch"):
+                await asyncio.sleep(0.01)
+            track("fetch", pages=2, bytes=2048, records_seen=100)
+            track("filter", records_seen=100, rejected_items=40)
+
+            # Tasks filhas herdam o tracker corrente
+            await asyncio.gather(asyncio.create_task(_write()))
+
+            await asyncio.sleep(0.05)  # deixa o flush periódico rodar
+            seen_while_running.update(db.rows[("SyncRun", tracker.run.id)])
+        return tracker
+
+    async def _write():
+        track("write", new_items=60)
+        track("write", error="deadlock")
+
+    tracker = asyncio.run(_run())
+
+    assert seen_while_running["status"] == "running"
+    assert seen_while_running["new_items"] == 60
+
+    run = db.rows[("SyncRun", tracker.run.id)]
+    assert run["status"] == "success" and run["finished_at"] is not None
+    assert run["job_id"] == "job-1"
+    assert run["rejected_items"] == 40
+
+    stages = {row["name"]: row for (model, _), row in db.rows.items() if model == "SyncStage"}
+    assert stages["fetch"]["pages"] == 2 and stages["fetch"]["bytes"] == 2048
+    assert stages["fetch"]["elapsed"] > 0
+    assert stages["write"]["errors"] == 1 and stages["write"]["last_error"] == "deadlock"
+    assert all(s["run_id"] == tracker.run.id for s in stages.values())
+
+
+def test_tracker_marks_failed_and_timed_out_runs(db):
+    async def _fail():
+        async with SyncTracker.start("comprasnet") as tracker:
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_fail())
+
+    async def _timeout():
+        async def body():
+            async with SyncTracker.start("scraper"):
+                await asyncio.sleep(1)
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(body(), timeout=0.02)
+
+    asyncio.run(_timeout())
+
+    statuses = {row["source"]: row["status"] for (model, _), row in db.rows.items() if model == "SyncRun"}
+    assert statuses == {"comprasnet": "error", "scraper": "timeout"}
+
+
+def test_track_outside_a_run_is_a_noop():
+    track("fetch", pages=1)
+    with timed("fetch"):
+        pass
@@ -1,58 +1,286 @@
-import asyncio
-import os
 import logging
-from arq import create_pool
-from arq.connections import RedisSettings
+from datetime import datetime
+from typing import List, Optional
+from arq import Retry, cron
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from infra.database import engine
+from infra.config import settings
+from infra.database import async_session_factory, engine
+from infra.http_clients import http_clients
+from infra.queue import enqueue_sync, redis_settings, shard_name, single_flight
 from domain.models import AgentMessage
+from services.backfill_service import BackfillPageError, BackfillService
+from services.dead_letter_service import DeadLetterService
+from services.filter_rule_service import FilterRuleService
 from services.ingestion_service import IngestionService
+from services.pncp_client import PNCPClient
+from services.relevance_service import RelevanceService
+from services.rescore_service import RescoreService
 
 # Configuração de Logging
 logger = logging.getLogger("ArqWorker")
 
-# Configuração do Redis
-REDIS_HOST = os.getenv("REDIS_HOST", "licitacoes_redis")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+# Folga do lock/job sobre o orçamento de tempo da fonte
+LOCK_MARGIN_SECONDS = 60
+
+
+def source_timeout(source: str) -> int:
+    return settings.SYNC_SOURCE_TIMEOUTS.get(source, settings.SYNC_SOURCE_TIMEOUT)
+
 
 async def startup(ctx):
     logger.info("🚀 [Worker] Iniciado com sucesso! Conectado ao Redis.")
 
+async def on_job_start(ctx):
+    # Regras de filtro e modelo de relevância novos valem a partir do próximo job (hot reload, throttled)
+    await FilterRuleService.refresh(async_session_factory)
+    await RelevanceService.refresh(async_session_factory)
+
 async def shutdown(ctx):
     logger.info("👋 [Worker] Encerrando atividades...")
+    await http_clients.aclose()
+
+async def task_sync_source(
+    ctx, source: str, days: int = 3, strategy: Optional[str] = None, ufs: Optional[List[str]] = None
+):
+    """
+    Sincroniza UMA fonte (pncp, comprasnet, transferegov, scraper) — ou um shard
+    dela, quando `ufs` restringe as UFs (ver enqueue_sync / SYNC_UF_SHARDS).
+    Protegido por lock no Redis: se outra execução do mesmo shard estiver em
+    andamento (cron, disparo manual, outra réplica), esta é pulada.
+    """
+    if source not in IngestionService.SOURCES:
+        return {"status": "error", "message": f"Fonte desconhecida: {source}"}
+
+    name = shard_name(source, ufs)
+    ttl = source_timeout(source) + LOCK_MARGIN_SECONDS
+    async with single_flight(ctx["redis"], f"sync:{name}", ttl) as acquired:
+        if not acquired:
+            logger.info(f"⏭️ [Worker] Sync de {name} já em andamento; pulando.")
+            return {"status": "skipped", "source": name, "reason": "already_running"}
+
+        logger.info(f"🔄 [Worker] Sincronizando {name} ({days} dias)...")
+        result = await IngestionService.run_source(
+            source, days=days, strategy=strategy, job_id=ctx.get("job_id"), ufs=ufs
+        )
+
+    if result.new_items:
+        await notify(f"🔍 Radar atualizado! Encontrei {result.new_items} novas oportunidades ({source}).")
+    logger.info(f"✅ [Worker] {name}: {result.status}, {result.new_items} novos itens.")
+    return {
+        "status": result.status,
+        "source": name,
+        "new_items": result.new_items,
+        "updated_items": result.updated_items,
+        "elapsed": round(result.elapsed, 2),
+        "error": result.error,
+        "run_id": result.run_id,
+    }
+
+async def task_sync_all(ctx, days: int = 3, strategy: Optional[str] = None):
+    """
+    Enfileira um job por fonte (cada um com seu lock). Mantido para quem
+    ainda dispara o sync completo; retorna os IDs dos jobs.
+    """
+    jobs = await enqueue_sync(
+        ctx["redis"], IngestionService.SOURCES, days=days, strategy=strategy,
+        uf_sources=IngestionService.UF_SOURCES,
+    )
+    return {"status": "queued", "jobs": jobs}
+
+async def task_sync_updates(ctx, days: int = 3):
+    """
+    Aplica as retificações publicadas no feed `contratacoes/atualizacao` do PNCP.
+    Único dono do feed (o sync da fonte pncp não o lê), então o lock basta para
+    que duas execuções nunca avancem os mesmos watermarks ao mesmo tempo.
+    """
+    ttl = source_timeout("pncp") + LOCK_MARGIN_SECONDS
+    async with single_flight(ctx["redis"], f"sync:{PNCPClient.UPDATES_SYNC_SOURCE}", ttl) as acquired:
+        if not acquired:
+            return {"status": "skipped", "reason": "already_running"}
+
+        logger.info("🔄 [Worker] Buscando retificações no PNCP...")
+        client = PNCPClient(client=http_clients.get("pncp"))
+        try:
+            async with async_session_factory() as session:
+                count = await client.fetch_updates(session, days=days)
+                logger.info(f"✅ [Worker] {count} licitações atualizadas.")
+                return {"status": "success", "updated_items": count}
+        except Exception as e:
+            logger.error(f"❌ [Worker] Falha ao aplicar retificações: {str(e)}")
+            return {"status": "error", "message": str(e)}
+        finally:
+            await client.close()
+
+async def task_retry_dead_letters(ctx, limit: Optional[int] = None):
+    """
+    Re-busca as páginas do dead-letter cujo backoff já venceu (ver DeadLetterService).
+    Single-flight: duas execuções nunca pegam o mesmo lote.
+    """
+    async with single_flight(ctx["redis"], "sync:dead_letters", source_timeout("pncp")) as acquired:
+        if not acquired:
+            return {"status": "skipped", "reason": "already_running"}
+
+        client = PNCPClient(client=http_clients.get("pncp"))
+        try:
+            async with async_session_factory() as session:
+                stats = await DeadLetterService.retry_due(session, client, limit=limit)
+        finally:
+            await client.close()
+    return {"status": "success", **stats}
+
+async def task_rescore(ctx, dry_run: bool = False):
+    """
+    Reclassifica as licitações já gravadas com as regras de filtro atuais (ver
+    RescoreService). Disparado a cada edição de regra; edições feitas durante
+    a varredura disparam outra passada em seguida.
+    """
+    async with single_flight(ctx["redis"], "rescore", settings.SYNC_SOURCE_TIMEOUT) as acquired:
+        if not acquired:
+            return {"status": "skipped", "reason": "already_running"}
+
+        await FilterRuleService.refresh(async_session_factory, force=True)
+        await RelevanceService.refresh(async_session_factory, force=True)
+        scanned = changed = 0
+        while True:
+            async with async_session_factory() as session:
+                report = await RescoreService.rescore(session, dry_run=dry_run)
+            scanned += report.scanned
+            changed += report.changed
+            if dry_run or not await FilterRuleService.refresh(async_session_factory, force=True):
+                break
+    logger.info(f"✅ [Worker] Rescore: {changed} licitações reclassificadas.")
+    return {"status": "success", "scanned": scanned, "changed": changed, "rules_version": report.rules_version}
+
+async def task_train_relevance(ctx):
+    """
+    Treino incremental do classificador de relevância com as decisões novas do
+    kanban (ver RelevanceService). Se o modelo mudou, enfileira o rescore para
+    atualizar a relevância do que já está no banco.
+    """
+    async with single_flight(ctx["redis"], "relevance", settings.SYNC_SOURCE_TIMEOUT) as acquired:
+        if not acquired:
+            return {"status": "skipped", "reason": "already_running"}
+
+        async with async_session_factory() as session:
+            examples = await RelevanceService.train(session)
+    if not examples:
+        return {"status": "success", "examples": 0}
+    job = await ctx["redis"].enqueue_job("task_rescore")
+    return {"status": "success", "examples": examples, "rescore_job_id": job.job_id if job else None}
+
+async def task_backfill_window(ctx, window_id: int):
+    """
+    Processa uma janela do backfill histórico (fila BACKFILL_QUEUE) a partir do
+    checkpoint. Se uma página falhar (ex.: tempestade de 429), o job é reagendado
+    com backoff e retoma da última página gravada.
+    """
+    ttl = settings.BACKFILL_WINDOW_TIMEOUT + LOCK_MARGIN_SECONDS
+    async with single_flight(ctx["redis"], f"backfill:{window_id}", ttl) as acquired:
+        if not acquired:
+            return {"status": "skipped", "window_id": window_id, "reason": "already_running"}
+
+        client = PNCPClient(client=http_clients.get("pncp_backfill"), concurrency=settings.PNCP_BACKFILL_CONCURRENCY)
+        try:
+            async with async_session_factory() as session:
+                window = await BackfillService.run_window(session, client, window_id)
+        except BackfillPageError as e:
+            job_try = ctx.get("job_try", 1)
+            if job_try < settings.BACKFILL_MAX_TRIES:
+                logger.warning(f"⏳ [Backfill] Janela {window_id}: {e}; nova tentativa #{job_try + 1}.")
+                raise Retry(defer=min(600, 30 * 2 ** job_try))
+            logger.error(f"❌ [Backfill] Janela {window_id} desistiu após {job_try} tentativas: {e}")
+            return {"status": "failed", "window_id": window_id, "error": str(e)}
 
-async def task_sync_all(ctx, days: int = 3):
-    """
-    Tarefa periódica ou sob demanda para sincronizar todas as fontes.
-    """
-    logger.info(f"🔄 [Worker] Iniciando sincronização programada ({days} dias)...")
-    
-    try:
-        async with AsyncSession(engine) as session:
-            count = await IngestionService.sync_all(session, days=days)
-            
-            # Envia aviso no chat interno do sistema
-            from datetime import datetime
-            msg = AgentMessage(
-                sender="Sistema (Automático)",
-                content=f"🔍 Radar atualizado! Encontrei {count} novas oportunidades no PNCP e outras fontes.",
-                created_at=datetime.utcnow().isoformat()
-            )
-            session.add(msg)
-            await session.commit()
-            
-            logger.info(f"✅ [Worker] Sincronização concluída: {count} novos itens.")
-            return {"status": "success", "new_items": count}
-            
-    except Exception as e:
-        logger.error(f"❌ [Worker] Falha na sincronização: {str(e)}")
-        return {"status": "error", "message": str(e)}
+    if window is None:
+        return {"status": "error", "window_id": window_id, "error": "Janela não encontrada"}
+    return {"status": window.status, "window_id": window_id, "pages": window.last_page, "new_items": window.new_items}
+
+async def notify(content: str):
+    """Envia aviso no chat interno do sistema."""
+    async with AsyncSession(engine) as session:
+        session.add(AgentMessage(
+            sender="Sistema (Automático)",
+            content=content,
+            created_at=datetime.utcnow().isoformat()
+        ))
+        await session.commit()
+
+
+# ─── Cron ─────────────────────────────────────────────────────────────────────
+
+def cron_schedule(interval_minutes: int, offset: int = 0) -> dict:
+    """Converte um intervalo em minutos nos campos `hour`/`minute` do cron do arq."""
+    if interval_minutes < 60:
+        return {"minute": set(range(offset % interval_minutes, 60, interval_minutes))}
+    return {"hour": set(range(0, 24, interval_minutes // 60)), "minute": offset % 60}
+
+def _cron_job(source: str):
+    async def run(ctx):
+        # Fonte dividida em shards: enfileira um job por shard (cada worker pega um)
+        if source in IngestionService.UF_SOURCES and settings.SYNC_UF_SHARDS > 1:
+            jobs = await enqueue_sync(ctx["redis"], [source], uf_sources=IngestionService.UF_SOURCES)
+            return {"status": "queued", "jobs": jobs}
+        return await task_sync_source(ctx, source)
+    run.__qualname__ = run.__name__ = f"cron_sync_{source}"
+    return run
+
+# Cada fonte com sua cadência; offsets diferentes para não dispararem juntas
+CRON_JOBS = [
+    cron(
+        _cron_job(source),
+        name=f"cron_sync_{source}",
+        timeout=source_timeout(source) + LOCK_MARGIN_SECONDS,
+        **cron_schedule(settings.SYNC_INTERVAL_MINUTES[source], offset=i * 3),
+    )
+    for i, source in enumerate(IngestionService.SOURCES)
+    if settings.SYNC_INTERVAL_MINUTES.get(source)
+]
+if settings.SYNC_INTERVAL_MINUTES.get(PNCPClient.UPDATES_SYNC_SOURCE):
+    CRON_JOBS.append(cron(
+        task_sync_updates,
+        name="cron_sync_updates",
+        timeout=source_timeout("pncp") + LOCK_MARGIN_SECONDS,
+        **cron_schedule(settings.SYNC_INTERVAL_MINUTES[PNCPClient.UPDATES_SYNC_SOURCE], offset=5),
+    ))
+if settings.DEAD_LETTER_RETRY_MINUTES:
+    CRON_JOBS.append(cron(
+        task_retry_dead_letters,
+        name="cron_retry_dead_letters",
+        timeout=source_timeout("pncp") + LOCK_MARGIN_SECONDS,
+        **cron_schedule(settings.DEAD_LETTER_RETRY_MINUTES, offset=7),
+    ))
+
+if settings.RELEVANCE_TRAIN_MINUTES:
+    CRON_JOBS.append(cron(
+        task_train_relevance,
+        name="cron_train_relevance",
+        timeout=settings.SYNC_SOURCE_TIMEOUT,
+        **cron_schedule(settings.RELEVANCE_TRAIN_MINUTES, offset=11),
+    ))
 
 # Configuração da Classe Worker para o Arq rodar
 class WorkerSettings:
-    functions = [task_sync_all]
-    redis_settings = RedisSettings(host=REDIS_HOST, port=REDIS_PORT)
+    functions = [task_sync_source, task_sync_all, task_sync_updates, task_retry_dead_letters, task_rescore,
+                 task_train_relevance]
+    cron_jobs = CRON_JOBS
+    redis_settings = redis_settings()
+    on_startup = startup
+    on_job_start = on_job_start
+    on_shutdown = shutdown
+    job_timeout = max(source_timeout(s) for s in IngestionService.SOURCES) + LOCK_MARGIN_SECONDS
+
+
+# Worker separado para o backfill histórico: `arq worker.BackfillWorkerSettings`.
+# Fila própria, para que milhares de janelas nunca atrasem os jobs do sync ao vivo.
+class BackfillWorkerSettings:
+    queue_name = settings.BACKFILL_QUEUE
+    functions = [task_backfill_window]
+    redis_settings = redis_settings()
     on_startup = startup
+    on_job_start = on_job_start
     on_shutdown = shutdown
-    # Podemos adicionar agendamento (cron) aqui se necessário
+    max_jobs = settings.BACKFILL_MAX_JOBS
+    max_tries = settings.BACKFILL_MAX_TRIES
+    job_timeout = settings.BACKFILL_WINDOW_TIMEOUT
+    keep_result = 0  # libera o _job_id fixo da janela para ser reenfileirado
@@ -121,11 +121,11 @@ export default function Home() {
   const handleSync = async () => {
     try {
       setLoading(true);
-      // Endpoint /api/sync na V4 (messages.py)
+      // Endpoint /api/sync (sync.py): enfileira um job por fonte no worker e retorna na hora
       const res = await fetch(`http://127.0.0.1:8000/api/sync?days=${syncDays}`, { method: "POST" });
       const data = await res.json();
-      if (data.status === 'success') {
-        alert(`${data.new_items} novas oportunidades encontradas!`);
+      if (data.status === 'queued') {
+        alert(`Sincronização iniciada (${Object.keys(data.jobs).length} jobs). Novas oportunidades aparecem em instantes.`);
       }
       setPage(1);
       await fetchData();